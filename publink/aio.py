@@ -0,0 +1,287 @@
+"""Asyncio counterparts of publink search clients.
+
+Requires the optional aiohttp package, ``pip install publink[async]``.
+"""
+
+# Import packages
+import asyncio
+
+from publink import eventdata
+from publink import jsonstream
+from publink import publink
+from publink import throttle
+from publink import xdd_search
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+def _require_aiohttp():
+    """Raise informative error if aiohttp is not installed."""
+    if aiohttp is None:
+        raise ImportError(
+            "publink.aio requires aiohttp, install with `pip install aiohttp`"
+        )
+
+
+class _Session:
+    """Use a provided aiohttp session or open and close a new one."""
+
+    def __init__(self, session=None):
+        _require_aiohttp()
+        self.session = session
+        self.owner = session is None
+
+    async def __aenter__(self):
+        if self.owner:
+            connect, read = throttle.DEFAULT_TIMEOUT
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            )
+        return self.session
+
+    async def __aexit__(self, *exc):
+        if self.owner:
+            await self.session.close()
+
+
+async def _bounded(semaphore, coro):
+    """Await coroutine while holding semaphore, if provided."""
+    if semaphore is None:
+        return await coro
+    async with semaphore:
+        return await coro
+
+
+class AsyncSearchXdd(xdd_search.SearchXdd):
+    """Class allowing for async searching of xDD publication database."""
+
+    async def get_data(self, session=None, semaphore=None):
+        """Get data from xDD for all search terms concurrently.
+
+        Parameters
+        ----------
+        session: aiohttp.ClientSession, default None
+            session to reuse, a new session is opened if None
+        semaphore: asyncio.Semaphore, default None
+            bounds concurrent requests, share one semaphore across
+            searches to bound a whole event loop
+
+        Notes
+        ----------
+        Cancelling the awaiting task cancels all in flight requests.
+
+        """
+        async with _Session(session) as s:
+            results = await asyncio.gather(
+                *[self.query_xdd(s, url, semaphore) for url in self.search_urls]
+            )
+        for status, message, hits, data in results:
+            self.response_data.extend(data)
+            if status == "success":
+                self.response_hits += hits
+            if status == "success" or self.response_status != "success":
+                self.response_status = status
+                self.response_message = message
+
+    async def query_xdd(self, session, url, semaphore=None):
+        """Query xDD for results for specific query.
+
+        Parameters
+        ----------
+        session: aiohttp.ClientSession
+        url: str
+            xDD query url, see build_query_urls
+        semaphore: asyncio.Semaphore, default None
+
+        Returns
+        ----------
+        tuple
+            response status, response message, hits and data of query
+
+        """
+        data = []
+        hits = 0
+        status = "error"
+        message = "No request made."
+        next_url = url
+        while next_url != "":
+            status_code, json_response = await _bounded(
+                semaphore, _get_json(session, next_url)
+            )
+            if status_code == 200 and "success" in json_response:
+                hits = json_response["success"]["hits"]
+                data.extend(json_response["success"]["data"])
+                next_url = json_response["success"]["next_page"]
+                status = "success"
+                message = "Successful response."
+            elif status_code == 200:
+                status = "no data"
+                message = "Request returned no data. Verify request is valid."
+                break
+            else:
+                status = "error"
+                message = f"Request returned status code: {status_code}."
+                break
+        return status, message, hits, data
+
+
+class AsyncSearchEventdata(eventdata.SearchEventdata):
+    """Class allowing for async searching of crossref eventdata by DOI."""
+
+    async def get_data(self, session=None, semaphore=None):
+        """Get data from eventdata.
+
+        Parameters
+        ----------
+        session: aiohttp.ClientSession, default None
+            session to reuse, a new session is opened if None
+        semaphore: asyncio.Semaphore, default None
+            bounds concurrent requests
+
+        """
+        if self.search_url is not None:
+            self.next_url = self.search_url
+            async with _Session(session) as s:
+                await self.query_eventdata(s, semaphore)
+
+    async def query_eventdata(self, session, semaphore=None):
+        """Query eventdata."""
+        while self.next_url is not None:
+            status_code, json_response = await _bounded(
+                semaphore, _get_json(session, self.next_url, self._decode)
+            )
+            if status_code == 200 and json_response["status"] == "ok":
+                self.response_hits = json_response["message"]["total-results"]
+                self.response_data.extend(json_response["message"]["events"])
+                cursor = json_response["message"]["next-cursor"]
+                if cursor is None:
+                    self.next_url = None
+                else:
+                    self.next_url = f"{self.search_url}&cursor={cursor}"
+                self.response_status = "success"
+                self.response_message = "Successful response."
+            else:
+                self.next_url = None
+                if status_code == 200 and json_response["status"] == "failed":
+                    self.response_status = "no data"
+                    self.response_message = (
+                        f"failed request: {json_response['message']}"
+                    )
+                elif status_code != 200:
+                    self.response_status = "error"
+                    self.response_message = f"failed request: status code {status_code}"
+                else:
+                    self.response_status = "error"
+                    self.response_message = "Unknown error."
+
+    async def _decode(self, r):
+        """Decode eventdata page, projected if self.projected."""
+        if not self.projected:
+            return await r.json(content_type=None)
+        decoder = jsonstream.StreamingArrayDecoder(
+            [],
+            "events",
+            fields=eventdata.RELATED_FIELDS,
+            predicate=eventdata.is_reference,
+        )
+        events = []
+        async for chunk in r.content.iter_chunked(65536):
+            events.extend(decoder.feed(chunk))
+        decoder.close()
+        json_response = decoder.metadata
+        if json_response.get("status") == "ok":
+            json_response["message"]["events"] = events
+        return json_response
+
+
+async def _get_json(session, url, decode=None):
+    """Get url and decode json body of successful responses."""
+    async with session.get(url) as r:
+        if r.status != 200:
+            return r.status, {}
+        if decode is None:
+            return r.status, await r.json(content_type=None)
+        return r.status, await decode(r)
+
+
+async def resolve_doi(doi, session=None, semaphore=None):
+    """Test if DOI resolves, see publink.resolve_doi.
+
+    Parameters
+    ----------
+    doi: str
+        example format, e.g. '10.5066/F79021VS'
+    session: aiohttp.ClientSession, default None
+    semaphore: asyncio.Semaphore, default None
+
+    Returns
+    ----------
+    Bool
+        True: DOI resolves, False: DOI fails to resolve or doi.org could
+        not be reached, None: request timed out
+
+    """
+    async with _Session(session) as s:
+        try:
+            return await _bounded(
+                semaphore, _head_status(s, f"https://doi.org/{doi}")
+            )
+        except asyncio.TimeoutError:
+            return None
+        except aiohttp.ClientError:
+            return False
+
+
+async def _head_status(session, url):
+    """Test if HEAD request of url is redirected."""
+    async with session.head(url, allow_redirects=False) as r:
+        return r.status == 302
+
+
+async def validate_dois(
+    doi_list, session=None, limit=20, doi_index=None, return_timed_out=False
+):
+    """Validate that each DOI in list resolves, see publink.validate_dois.
+
+    Parameters
+    ----------
+    doi_list: list of strings
+        example format ['10.5066/F79021VS']
+    session: aiohttp.ClientSession, default None
+    limit: int or asyncio.Semaphore, default 20
+        maximum concurrent requests to doi.org
+    doi_index: obj, default None
+        doi_index.DoiIndex of registered DOIs, DOIs in the index are
+        accepted without a request to doi.org
+    return_timed_out: bool, default False
+        True also returns timed_out_dois
+
+    Returns
+    ----------
+    resolving_dois: list of strings
+        DOIs that did resolve
+    non_resolving_dois: list of strings
+        DOIs that did not resolve
+    timed_out_dois: list of strings
+        DOIs whose request timed out, only with return_timed_out
+
+    """
+    unique_dois = list(set(doi_list))
+    semaphore = limit if isinstance(limit, asyncio.Semaphore) else None
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit)
+    known_dois = set()
+    if doi_index is not None:
+        known_dois = set(i for i in unique_dois if i in doi_index)
+    unknown_dois = [i for i in unique_dois if i not in known_dois]
+    resolved = {i: True for i in known_dois}
+    if unknown_dois:
+        async with _Session(session) as s:
+            checks = await asyncio.gather(
+                *[resolve_doi(i, s, semaphore) for i in unknown_dois]
+            )
+        resolved.update(zip(unknown_dois, checks))
+    return publink.split_checks(unique_dois, resolved, return_timed_out)
@@ -0,0 +1,186 @@
+"""Compare computed relationships with existing DataCite metadata."""
+
+# Import packages
+import json
+
+from publink.formatting import doi_formatting
+
+
+def load_snapshot(path, relation_types=("IsCitedBy",)):
+    """Index related identifiers of a local DataCite metadata export.
+
+    Parameters
+    ----------
+    path: str
+        JSON or JSON lines file.  Records may be DataCite REST API
+        records ({'attributes': {'doi', 'relatedIdentifiers'}}), their
+        attributes, or publink.to_related_identifiers records.  A JSON
+        file may hold a list of records or an API page ({'data': [...]}).
+    relation_types: tuple of str, default ("IsCitedBy",)
+        relation types indexed, None indexes all relation types
+
+    Returns
+    ----------
+    index: dict
+        DOI to set of (relation type, related DOI) pairs, DOIs are
+        formatted with formatting.doi_formatting
+        e.g. {'10.5066/F7K935KT': {('IsCitedBy', '10.1002/ESP.4023')}}
+
+    """
+    index = {}
+    for record in _read_records(path):
+        doi, relations = _record_relations(record)
+        if doi is None:
+            continue
+        index.setdefault(doi, set()).update(
+            i for i in relations if relation_types is None or i[0] in relation_types
+        )
+    return index
+
+
+def _read_records(path):
+    """Yield records of JSON or JSON lines file."""
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from json.load(f)
+            return
+        content = f.readline()
+        try:
+            record = json.loads(content)
+        except ValueError:
+            # Single pretty printed JSON document
+            f.seek(0)
+            record = json.load(f)
+            yield from record.get("data", [record])
+            return
+        if "data" in record and isinstance(record["data"], list):
+            yield from record["data"]
+        else:
+            yield record
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _record_relations(record):
+    """Get DOI and (relation type, related DOI) pairs of record."""
+    record = record.get("attributes", record)
+    if "doi" not in record:
+        return None, []
+    relations = []
+    if "relatedIdentifiers" in record:
+        for i in record["relatedIdentifiers"] or []:
+            if i.get("relatedIdentifierType", "DOI") == "DOI":
+                relations.append(
+                    (i["relationType"], doi_formatting(i["relatedIdentifier"]))
+                )
+    for i in record.get("related-identifiers", []):
+        relations.append(
+            (i["relation-type-id"], doi_formatting(i["related-identifier"]))
+        )
+    return doi_formatting(record["doi"]), relations
+
+
+def diff_related_identifiers(
+    related_identifiers,
+    snapshot,
+    relation_types=("IsCitedBy",),
+    full_sync=False,
+    unchecked_dois=None,
+):
+    """Get relations to add and remove per DOI.
+
+    Relations are only removed with full_sync.  Otherwise a relation
+    missing from related_identifiers may just not have been harvested or
+    validated this cycle, e.g. after a validation timeout or an
+    incremental harvest, and is kept.
+
+    Parameters
+    ----------
+    related_identifiers: list of dict
+        publink.to_related_identifiers output
+    snapshot: dict
+        index of current DataCite metadata, see load_snapshot
+    relation_types: tuple of str, default ("IsCitedBy",)
+        relation types managed by publink, only these are removed
+    full_sync: bool, default False
+        True when related_identifiers is the complete harvest, managed
+        relations of snapshot DOIs missing from it are removed.  False
+        only adds relations.
+    unchecked_dois: iterable of str, default None
+        DOIs not checked this cycle, e.g. timed out DOIs of
+        publink.validate_dois, relations of or to them are not removed
+
+    Returns
+    ----------
+    deltas: list of dict
+        DOIs with changes, relations in to_related_identifiers format
+        e.g. [{'doi': '10.5066/F7K935KT',
+               'identifier': 'https://doi.org/10.5066/F7K935KT',
+               'add': [{'relation-type-id': 'IsCitedBy',
+                        'related-identifier': 'https://doi.org/10.1002/ESP.4023'}],
+               'remove': []}]
+
+    """
+    computed = {}
+    for record in related_identifiers:
+        doi, relations = _record_relations(record)
+        if doi is not None:
+            computed.setdefault(doi, set()).update(relations)
+    if full_sync:
+        for doi in snapshot:
+            computed.setdefault(doi, set())
+    unchecked = {doi_formatting(i) for i in unchecked_dois or []}
+
+    deltas = []
+    for doi in sorted(computed):
+        current = snapshot.get(doi, set())
+        add = computed[doi] - current
+        remove = set()
+        if full_sync and doi not in unchecked:
+            remove = {
+                i for i in current - computed[doi]
+                if (relation_types is None or i[0] in relation_types)
+                and i[1] not in unchecked
+            }
+        if add or remove:
+            deltas.append(
+                {
+                    "doi": doi,
+                    "identifier": f"https://doi.org/{doi}",
+                    "add": _to_related(add),
+                    "remove": _to_related(remove),
+                }
+            )
+    return deltas
+
+
+def _to_related(relations):
+    """Format (relation type, DOI) pairs as related identifiers."""
+    return [
+        {"relation-type-id": i[0], "related-identifier": f"https://doi.org/{i[1]}"}
+        for i in sorted(relations)
+    ]
+
+
+def delta_batches(deltas, batch_size=100):
+    """Split deltas into write-back batches.
+
+    Parameters
+    ----------
+    deltas: list of dict
+        see diff_related_identifiers
+    batch_size: int, default 100
+        maximum DOIs per batch
+
+    Returns
+    ----------
+    generator of list of dict
+
+    """
+    for i in range(0, len(deltas), batch_size):
+        yield deltas[i:i + batch_size]
@@ -0,0 +1,83 @@
+"""Deadline budgets and cooperative cancellation for network calls."""
+
+# Import packages
+import threading
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a deadline expires or is cancelled before a request."""
+
+
+class RequestTimeout(DeadlineExceeded):
+    """Raised when a request times out on every attempt."""
+
+
+class Deadline:
+    """Class tracking the time budget of a search or pipeline call."""
+
+    def __init__(self, seconds=None):
+        """Initialize deadline.
+
+        Parameters
+        ----------
+        seconds: float, default None
+            time budget from now, None never expires but can be cancelled
+
+        """
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancel work sharing this deadline, e.g. from another thread."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """Test if deadline was cancelled."""
+        return self._cancelled.is_set()
+
+    def remaining(self):
+        """Get seconds left, None if deadline has no time budget."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        """Test if deadline passed or was cancelled."""
+        return self.cancelled or self.remaining() == 0.0
+
+    def check(self):
+        """Raise DeadlineExceeded if deadline passed or was cancelled."""
+        if self.cancelled:
+            raise DeadlineExceeded("Deadline cancelled.")
+        if self.remaining() == 0.0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds} seconds exceeded.")
+
+    def cap(self, timeout):
+        """Limit request timeout to the time remaining.
+
+        Parameters
+        ----------
+        timeout: float or tuple
+            requests timeout, seconds or (connect, read) seconds
+
+        Returns
+        ----------
+        float or tuple
+
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if isinstance(timeout, tuple):
+            return tuple(min(i, remaining) for i in timeout)
+        return min(timeout, remaining)
+
+
+def as_deadline(deadline):
+    """Get Deadline from seconds, a Deadline or None."""
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(deadline)
@@ -0,0 +1,182 @@
+"""Extract DOIs of many registered prefixes from text in a single pass."""
+
+# Import packages
+import re
+
+from publink.xdd_search import tolerant_pattern
+
+# Characters ending a DOI suffix in reference text
+TERMINATORS = ",;:)]}>\"'"
+
+# Suffix characters stripped from the end of a suffix, e.g. a full stop
+TRAILING = "._/-"
+
+
+class DoiExtractor:
+    """Class extracting DOIs for a table of registered DOI prefixes."""
+
+    def __init__(self):
+        """Initialize extractor with an empty prefix table.
+
+        Prefixes are registered with their own suffix grammar, see
+        register.  All prefixes are found with one combined regex, so a
+        highlight is scanned once however many prefixes are tracked.
+
+        """
+        self.grammars = {}
+        self._pattern = None
+
+    def register(
+        self,
+        prefix,
+        length=None,
+        char_class="A-Z0-9._/-",
+        terminators=TERMINATORS,
+        min_length=1,
+    ):
+        """Register a DOI prefix and the grammar of its suffixes.
+
+        Parameters
+        ----------
+        prefix: str
+            DOI prefix, e.g. "10.5066"
+        length: int, default None
+            fixed suffix length, e.g. 8 for USGS data DOIs.  Fixed length
+            suffixes split by whitespace are joined.  None allows any
+            length of at least min_length.
+        char_class: str, default "A-Z0-9._/-"
+            regex character class of suffix characters, matched against
+            upper case text.  TRAILING characters are allowed within a
+            suffix but stripped from its end, e.g. "10.1002/ESP.4023."
+            is "10.1002/ESP.4023".
+        terminators: str, default TERMINATORS
+            characters ending a suffix
+        min_length: int, default 1
+            minimum length of variable length suffixes
+
+        Returns
+        ----------
+        self
+
+        """
+        self.grammars[prefix.upper()] = {
+            "length": length,
+            "char": re.compile(f"[{char_class}]"),
+            "terminators": terminators,
+            "min_length": min_length,
+        }
+        self._pattern = None
+        return self
+
+    @property
+    def pattern(self):
+        """Combined regex matching any registered prefix and "/"."""
+        if self._pattern is None:
+            prefixes = sorted(self.grammars, key=len, reverse=True)
+            alternatives = "|".join(
+                f"(?P<p{n}>{tolerant_pattern(p)})" for n, p in enumerate(prefixes)
+            )
+            self._prefixes = prefixes
+            self._pattern = re.compile(rf"(?<![0-9.])(?:{alternatives})\s*/\s*")
+        return self._pattern
+
+    def extract(self, text):
+        """Extract DOIs of all registered prefixes from text.
+
+        Parameters
+        ----------
+        text: str
+            upper case text, e.g. cleaned xDD highlight
+
+        Returns
+        ----------
+        list of tuple
+            (doi, certainty, prefix), certainty is "most certain" for
+            contiguous suffixes, "certain" for fixed length suffixes
+            joined across whitespace and "less certain" for fixed length
+            suffixes followed by more suffix characters
+
+        """
+        dois = []
+        for match in self.pattern.finditer(text):
+            n = int(match.lastgroup[1:])
+            prefix = self._prefixes[n]
+            suffix, certainty = parse_suffix(text, match.end(), self.grammars[prefix])
+            if suffix is not None:
+                dois.append((f"{prefix}/{suffix}", certainty, prefix))
+        return dois
+
+
+def parse_suffix(text, pos, grammar):
+    """Parse DOI suffix starting at position of text.
+
+    Parameters
+    ----------
+    text: str
+    pos: int
+        position after prefix and "/"
+    grammar: dict
+        suffix grammar, see DoiExtractor.register
+
+    Returns
+    ----------
+    suffix: str
+        None if no valid suffix
+    certainty: str
+
+    """
+    length = grammar["length"]
+    suffix = []
+    joined = False
+    i = pos
+    while i < len(text) and (length is None or len(suffix) < length):
+        c = text[i]
+        if c in grammar["terminators"]:
+            break
+        if c.isspace():
+            j = i
+            while j < len(text) and text[j].isspace():
+                j += 1
+            if (
+                length is not None
+                and suffix
+                and j < len(text)
+                and grammar["char"].match(text[j])
+            ):
+                joined = True
+                i = j
+                continue
+            break
+        if not grammar["char"].match(c):
+            break
+        suffix.append(c)
+        i += 1
+
+    if length is None:
+        suffix = "".join(suffix).rstrip(TRAILING)
+        if len(suffix) < grammar["min_length"]:
+            return None, None
+        return suffix, "most certain"
+    if len(suffix) < length:
+        return None, None
+    if _continues(text, i, grammar):
+        certainty = "less certain"
+    elif joined:
+        certainty = "certain"
+    else:
+        certainty = "most certain"
+    return "".join(suffix), certainty
+
+
+def _continues(text, pos, grammar):
+    """Test if suffix characters other than trailing punctuation follow pos."""
+    while pos < len(text) and grammar["char"].match(text[pos]):
+        if text[pos] not in TRAILING:
+            return True
+        pos += 1
+    return False
+
+
+def usgs_extractor():
+    """Get extractor for USGS data DOIs, 10.5066 with 8 character suffix."""
+    return DoiExtractor().register("10.5066", length=8)
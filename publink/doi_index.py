@@ -0,0 +1,99 @@
+"""Offline index of registered DOIs for validating DOIs without doi.org."""
+
+# Import packages
+import mmap
+import struct
+
+from publink.formatting import doi_formatting
+
+_MAGIC = b"PLDOI001"
+_HEADER = struct.Struct("<8sII")
+
+
+def build_doi_index(doi_files, index_path):
+    """Build sorted fixed width DOI index from DOI list files.
+
+    Parameters
+    ----------
+    doi_files: list of str
+        paths of text files with one DOI per line, e.g. a registry
+        export of 10.5066 DOIs.  DOIs are formatted with
+        formatting.doi_formatting.
+    index_path: str
+        path of index file to write
+
+    Returns
+    ----------
+    count: int
+        number of unique DOIs in index
+
+    """
+    dois = set()
+    for path in doi_files:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    dois.add(doi_formatting(line).encode("utf-8"))
+    dois = sorted(dois)
+    width = max((len(i) for i in dois), default=1)
+    with open(index_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, width, len(dois)))
+        for doi in dois:
+            f.write(doi.ljust(width, b"\0"))
+    return len(dois)
+
+
+class DoiIndex:
+    """Class testing DOI membership in a memory mapped DOI index."""
+
+    def __init__(self, index_path):
+        """Open DOI index built by build_doi_index.
+
+        Parameters
+        ----------
+        index_path: str
+            path of index file
+
+        """
+        self.index_path = index_path
+        self._file = open(index_path, "rb")
+        magic, self.width, self.count = _HEADER.unpack(
+            self._file.read(_HEADER.size)
+        )
+        if magic != _MAGIC:
+            self._file.close()
+            raise ValueError(f"{index_path} is not a publink DOI index")
+        if self.count:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mmap = None
+
+    def _record(self, i):
+        """Get DOI at position i."""
+        start = _HEADER.size + i * self.width
+        return self._mmap[start:start + self.width].rstrip(b"\0")
+
+    def __contains__(self, doi):
+        """Test if DOI is in index using binary search."""
+        if not self.count:
+            return False
+        target = doi_formatting(doi).encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < self.count and self._record(lo) == target
+
+    def __len__(self):
+        """Count DOIs in index."""
+        return self.count
+
+    def close(self):
+        """Close index file."""
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
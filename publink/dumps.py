@@ -0,0 +1,194 @@
+"""Ingest locally downloaded eventdata snapshot dumps."""
+
+# Import packages
+import gzip
+import json
+
+from publink import eventdata
+from publink import jsonstream
+from publink.formatting import doi_formatting
+
+
+class EventFilter:
+    """Class testing eventdata events against DOI prefixes or a DOI set."""
+
+    def __init__(self, prefixes=None, dois=None, relation_type="references"):
+        """Initialize event filter.
+
+        Parameters
+        ----------
+        prefixes: list of str, default None
+            obj_id DOI prefixes kept, e.g. ["10.5066"]
+        dois: list of str, default None
+            obj_id DOIs kept, e.g. ["10.5066/F7K935KT"]
+        relation_type: str, default "references"
+            relation_type_id kept, None keeps all relation types
+
+        Notes
+        ----------
+        Events matching prefixes or dois are kept, when both are None
+        events of every DOI are kept.
+
+        """
+        self.prefixes = sorted(set(doi_formatting(i) for i in prefixes or []))
+        self.dois = set(doi_formatting(i) for i in dois or [])
+        self.relation_type = relation_type
+        self._prefixes = tuple(f"{i}/" for i in self.prefixes)
+        # Lower case needles for a cheap test of raw lines before decoding
+        needles = [i.lower() for i in self.prefixes] + [
+            i.split("/")[0].lower() for i in self.dois
+        ]
+        self.needles = sorted(set(needles))
+
+    def may_match(self, line):
+        """Test if a raw JSON line can hold a matching event.
+
+        Parameters
+        ----------
+        line: str
+
+        Returns
+        ----------
+        Bool
+            False only if the event can not match, avoiding decoding
+
+        """
+        if self.relation_type is not None and self.relation_type not in line:
+            return False
+        if not self.needles:
+            return True
+        line = line.lower()
+        return any(i in line for i in self.needles)
+
+    def __call__(self, event):
+        """Test if a decoded event matches."""
+        if (
+            self.relation_type is not None
+            and event.get("relation_type_id") != self.relation_type
+        ):
+            return False
+        if not self.prefixes and not self.dois:
+            return True
+        doi = doi_formatting(event.get("obj_id", ""))
+        return doi in self.dois or doi.startswith(self._prefixes)
+
+
+def read_events(path, event_filter=None, fields=eventdata.RELATED_FIELDS):
+    """Stream matching events from an eventdata dump file.
+
+    Files ending in ".jsonl" or ".jsonl.gz" hold one event per line,
+    other files hold a JSON document with an "events" array, e.g. a saved
+    eventdata API response.  Files ending in ".gz" are decompressed while
+    read.
+
+    Parameters
+    ----------
+    path: str
+    event_filter: obj, default None
+        EventFilter, None keeps every event
+    fields: list of str, default eventdata.RELATED_FIELDS
+        keys kept from each event, None keeps all keys
+
+    Returns
+    ----------
+    generator of dict
+        projected events
+
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    jsonl = path.endswith((".jsonl", ".jsonl.gz"))
+    with opener(path, "rt", encoding="utf-8") as f:
+        if jsonl:
+            for line in f:
+                if not line.strip():
+                    continue
+                if event_filter is not None and not event_filter.may_match(line):
+                    continue
+                event = json.loads(line)
+                if event_filter is None or event_filter(event):
+                    yield jsonstream.project(event, fields)
+        else:
+            chunks = iter(lambda: f.read(65536), "")
+            yield from jsonstream.StreamingArrayDecoder(
+                chunks, "events", fields=fields, predicate=event_filter
+            )
+
+
+def _scan_file(args):
+    """Read matching events of one file, run in worker processes."""
+    path, event_filter, fields = args
+    return list(read_events(path, event_filter, fields))
+
+
+def ingest(
+    paths,
+    prefixes=None,
+    dois=None,
+    relation_type="references",
+    processes=None,
+    fields=eventdata.RELATED_FIELDS,
+):
+    """Stream matching events from many dump files.
+
+    Files are scanned in parallel by a pool of processes, each returning
+    only the projected events matching the filter.
+
+    Parameters
+    ----------
+    paths: list of str
+        dump files, see read_events
+    prefixes: list of str, default None
+        obj_id DOI prefixes kept, see EventFilter
+    dois: list of str, default None
+        obj_id DOIs kept, see EventFilter
+    relation_type: str, default "references"
+        relation_type_id kept, None keeps all relation types
+    processes: int, default None
+        worker processes, default is number of CPUs, 1 scans files in
+        this process
+    fields: list of str, default eventdata.RELATED_FIELDS
+        keys kept from each event
+
+    Returns
+    ----------
+    generator of dict
+        events of each file as soon as the file is scanned
+
+    """
+    event_filter = EventFilter(prefixes, dois, relation_type)
+    tasks = [(path, event_filter, fields) for path in paths]
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield from read_events(*task)
+        return
+
+    import multiprocessing
+
+    with multiprocessing.Pool(processes) as pool:
+        for events in pool.imap_unordered(_scan_file, tasks):
+            yield from events
+
+
+def ingest_related(paths, prefixes=None, dois=None, processes=None):
+    """Get related DOIs of "references" events in dump files.
+
+    Parameters
+    ----------
+    paths: list of str
+        dump files, see read_events
+    prefixes: list of str, default None
+        obj_id DOI prefixes kept, e.g. ["10.5066"]
+    dois: list of str, default None
+        obj_id DOIs kept
+    processes: int, default None
+        worker processes, see ingest
+
+    Returns
+    ----------
+    mention: obj
+        eventdata.GetRelated object containing related DOIs
+
+    """
+    mention = eventdata.GetRelated(ingest(paths, prefixes, dois, processes=processes))
+    mention.get_related_dois()
+    return mention
@@ -1,13 +1,31 @@
 """Extract info from crossref eventdata (https://www.eventdata.crossref.org)."""
 
 # Import packages
-import requests
+import math
+
+from publink import deadline
+from publink import jsonstream
+from publink import sharding
+from publink import spill
+from publink import throttle
+
+# Event fields read by GetRelated
+RELATED_FIELDS = ["id", "obj_id", "subj_id", "relation_type_id", "source_id"]
 
 
 class SearchEventdata:
     """Class allowing for searching of crossref eventdata by DOI."""
 
-    def __init__(self, search_term, search_type="doi", mailto=""):
+    def __init__(
+        self,
+        search_term,
+        search_type="doi",
+        mailto="",
+        relation_type=None,
+        projected=False,
+        max_records=None,
+        spill_dir=None,
+    ):
         """Initialize search eventdata obj.
 
         See eventdata docs @ https://www.eventdata.crossref.org/guide/
@@ -23,6 +41,19 @@ class SearchEventdata:
         mailto: str
             email contact, requested by crossref to help understand
             who is using their api
+        relation_type: str, default None
+            server side relation-type filter, e.g. "references".
+            None returns events of all relation types.
+        projected: bool, default False
+            True streams each page through jsonstream, keeping only
+            RELATED_FIELDS of "references" events.  This bounds memory
+            to what GetRelated needs, it does not reduce decode time,
+            decoding event by event is slightly slower than r.json().
+        max_records: int, default None
+            maximum events held in memory, past this events spill to disk
+            (see spill.SpillBuffer).  None holds all events in memory.
+        spill_dir: str, default None
+            directory of spill files, default is system temp directory
 
         Notes
         ----------
@@ -36,11 +67,33 @@ class SearchEventdata:
         self.mailto = mailto
         self.search_term = str(search_term).upper()
         self.search_type = str(search_type).lower()
+        self.relation_type = relation_type
+        self.projected = projected
+        self.date_window = None
         self.search_url = None
         self.response_hits = 0
-        self.response_data = []
+        self.response_data = spill.response_buffer(max_records, spill_dir)
         self.response_status = "error"
         self.response_message = "No request made."
+        self.timeout = throttle.DEFAULT_TIMEOUT
+        self.deadline = None
+        self.request_count = 0
+
+    def set_deadline(self, seconds):
+        """Set time budget of the search.
+
+        When the budget runs out, or the deadline is cancelled, the
+        search stops, keeps events collected so far and sets
+        response_status to "timeout".
+
+        Parameters
+        ----------
+        seconds: float or obj
+            seconds from now or a deadline.Deadline shared with other
+            searches
+
+        """
+        self.deadline = deadline.as_deadline(seconds)
 
     def build_query_url(self, rows=10000):
         """Build eventdata query url to search user defined DOI.
@@ -53,25 +106,118 @@ class SearchEventdata:
         """
         if self.search_type == "doi":
             q = f"mailto={self.mailto}&rows={rows}&obj-id={self.search_term}"
-            self.search_url = f"{self.base_url}{q}"
         elif self.search_type == "doi_prefix":
             q = f"mailto={self.mailto}&rows={rows}&obj-id.prefix={self.search_term}"
-            self.search_url = f"{self.base_url}{q}"
         else:
             self.response_message = "Incorrect search type"
+            return
+        if self.relation_type is not None:
+            q = f"{q}&relation-type={self.relation_type}"
+        if self.date_window is not None:
+            field, from_date, until_date = self.date_window
+            q = f"{q}&from-{field}-date={from_date}&until-{field}-date={until_date}"
+        self.search_url = f"{self.base_url}{q}"
 
-    def get_data(self):
-        """Get data from eventdata."""
-        if self.search_url is not None:
+    def set_date_window(self, from_date, until_date, date_field="occurred"):
+        """Limit search to events within a date window.
+
+        Parameters
+        ----------
+        from_date: str
+            first day of window formatted "YYYY-MM-DD"
+        until_date: str
+            last day of window formatted "YYYY-MM-DD", inclusive
+        date_field: str, default "occurred"
+            - ``'occurred'``: filter on date the event occurred.
+            - ``'updated'``: filter on date the event was updated.
+
+        """
+        self.date_window = (date_field, from_date, until_date)
+
+    def get_total_results(self):
+        """Probe eventdata for the number of matching events.
+
+        Requests a single row so only the page metadata is transferred.
+
+        Returns
+        ----------
+        self.response_hits: int
+            total-results reported by eventdata, None if probe failed
+
+        """
+        self.build_query_url(rows=1)
+        if self.search_url is None:
+            return None
+        self.request_count += 1
+        try:
+            r = throttle.request(
+                "get", self.search_url, timeout=self.timeout, deadline=self.deadline
+            )
+        except deadline.DeadlineExceeded as e:
+            self.response_hits = None
+            self.response_status = "timeout"
+            self.response_message = str(e)
+            self.build_query_url()
+            return None
+        if r.status_code == 200 and r.json()["status"] == "ok":
+            self.response_hits = r.json()["message"]["total-results"]
+            self.response_status = "success"
+            self.response_message = "Successful response."
+        else:
+            self.response_hits = None
+            self.response_status = "error"
+            self.response_message = f"failed probe: status code {r.status_code}"
+        self.build_query_url()
+        return self.response_hits
+
+    def get_data(self, hits_only=False, limit=None):
+        """Get data from eventdata.
+
+        Parameters
+        ----------
+        hits_only: bool, default False
+            True only probes total-results, see get_total_results
+        limit: int, default None
+            stop paging once limit "references" events are collected,
+            e.g. 1 tests if a DOI is cited at all
+
+        """
+        if hits_only:
+            self.get_total_results()
+        elif self.search_url is not None:
             self.next_url = self.search_url
-            self.query_eventdata()
+            self.query_eventdata(limit)
+
+    def query_eventdata(self, limit=None):
+        """Query eventdata.
 
-    def query_eventdata(self):
-        """Query eventdata."""
+        Parameters
+        ----------
+        limit: int, default None
+            stop paging once limit "references" events are collected
+
+        """
+        references = 0
         while self.next_url is not None:
-            r = requests.get(self.next_url)
-            if r.status_code == 200 and r.json()["status"] == "ok":
-                json_response = r.json()
+            self.request_count += 1
+            try:
+                r = throttle.request(
+                    "get",
+                    self.next_url,
+                    stream=self.projected,
+                    timeout=self.timeout,
+                    deadline=self.deadline,
+                )
+            except deadline.DeadlineExceeded as e:
+                self.response_status = "timeout"
+                self.response_message = f"{e} Results are partial."
+                return
+            # Streamed responses hold their connection until closed
+            try:
+                json_response = self.decode_page(r) if r.status_code == 200 else {}
+            finally:
+                r.close()
+            if r.status_code == 200 and json_response["status"] == "ok":
                 self.response_hits = json_response["message"]["total-results"]
                 page_data = json_response["message"]["events"]
                 self.response_data.extend(page_data)
@@ -80,14 +226,20 @@ class SearchEventdata:
                 else:
                     next = json_response["message"]["next-cursor"]
                     self.next_url = f"{self.search_url}&cursor={next}"
+                if limit is not None:
+                    references += sum(1 for i in page_data if is_reference(i))
+                    if references >= limit:
+                        self.next_url = None
 
                 self.response_status = "success"
                 self.response_message = "Successful response."
             else:
-                self.next_url = ""
-                if r.status_code == 200 and r.json()["status"] == "failed":
+                self.next_url = None
+                if r.status_code == 200 and json_response["status"] == "failed":
                     self.response_status = "no data"
-                    self.response_message = f"failed request: {r.json()['message']}"
+                    self.response_message = (
+                        f"failed request: {json_response['message']}"
+                    )
                 elif r.status_code != 200:
                     self.response_status = "error"
                     self.response_message = (
@@ -99,6 +251,34 @@ class SearchEventdata:
                     self.response_message = "Unknown error."
                     break
 
+    def decode_page(self, r):
+        """Decode eventdata response page.
+
+        Parameters
+        ----------
+        r: requests.Response
+
+        Returns
+        ----------
+        json_response: dict
+            page as returned by eventdata, when self.projected is True
+            events only include RELATED_FIELDS of "references" events
+
+        """
+        if not self.projected:
+            return r.json()
+        decoder = jsonstream.StreamingArrayDecoder(
+            r.iter_content(chunk_size=65536),
+            "events",
+            fields=RELATED_FIELDS,
+            predicate=is_reference,
+        )
+        events = list(decoder)
+        json_response = decoder.metadata
+        if json_response.get("status") == "ok":
+            json_response["message"]["events"] = events
+        return json_response
+
 
 class GetRelated:
     """Class extracting relations from eventdata response."""
@@ -128,13 +308,9 @@ class GetRelated:
 
         """
         self.related_dois = []
+        doi_prefix = "https://doi.org/"
         for event in self.events:
-            doi_prefix = "https://doi.org/"
-            if (
-                doi_prefix in event["obj_id"]
-                and doi_prefix in event["subj_id"]
-                and event["relation_type_id"] == "references"
-            ):
+            if is_reference(event):
 
                 related = {
                     "event_id": event["id"],
@@ -143,3 +319,494 @@ class GetRelated:
                     "source": event["source_id"],
                 }
                 self.related_dois.append(related)
+
+    def save(self, store, harvest_date=None):
+        """Write related DOIs to a mention store.
+
+        Parameters
+        ----------
+        store: obj
+            mention_store.MentionStore
+        harvest_date: str, default None
+            date of harvest formatted "YYYY-MM-DD", default is today (UTC)
+
+        Returns
+        ----------
+        int
+            number of relations written
+
+        """
+        return store.upsert_relations(self.related_dois, harvest_date)
+
+
+class BatchSearchEventdata:
+    """Class searching eventdata for a list of DOIs."""
+
+    def __init__(
+        self,
+        search_terms,
+        mailto="",
+        relation_type="references",
+        max_workers=8,
+        seconds_per_request=1.0,
+        seconds_per_event=0.0005,
+        projected=False,
+        max_records=None,
+        spill_dir=None,
+    ):
+        """Initialize batch search eventdata obj.
+
+        A list of DOIs can be harvested either by querying each DOI
+        (fan-out) or by crawling each DOI prefix and keeping only events
+        for the listed DOIs.  The cheaper strategy is chosen from
+        total-results probes, see estimate_cost.
+
+        Parameters
+        ----------
+        search_terms: list of str
+            DOIs formatted like "10.5066/P9IGEC9G"
+        mailto: str
+            email contact, requested by crossref to help understand
+            who is using their api
+        relation_type: str, default "references"
+            server side relation-type filter, GetRelated only keeps
+            "references" events
+        max_workers: int, default 8
+            number of concurrent requests used in fan-out
+        seconds_per_request: float, default 1.0
+            expected round trip time of one eventdata request
+        seconds_per_event: float, default 0.0005
+            expected transfer and decode time of one event
+        projected: bool, default False
+            stream pages keeping only fields read by GetRelated, lowers
+            memory but not decode time, see SearchEventdata
+        max_records: int, default None
+            maximum events held in memory by each search, see SearchEventdata
+        spill_dir: str, default None
+            directory of spill files
+
+        """
+        self.search_terms = sorted(set(str(i).upper() for i in search_terms))
+        self.prefixes = sorted(set(i.split("/")[0] for i in self.search_terms))
+        self.mailto = mailto
+        self.relation_type = relation_type
+        self.max_workers = max_workers
+        self.seconds_per_request = seconds_per_request
+        self.seconds_per_event = seconds_per_event
+        self.projected = projected
+        self.max_records = max_records
+        self.spill_dir = spill_dir
+        self.prefix_hits = {}
+        self.sample_hits = {}
+        self.cost = {}
+        self.strategy = None
+        self.searches = []
+        self.response_hits = 0
+        self.response_data = spill.response_buffer(max_records, spill_dir)
+        self.response_status = "error"
+        self.response_message = "No request made."
+        self.timeout = throttle.DEFAULT_TIMEOUT
+        self.deadline = None
+
+    def set_deadline(self, seconds):
+        """Set time budget shared by all searches, see SearchEventdata.
+
+        Parameters
+        ----------
+        seconds: float or obj
+            seconds from now or a deadline.Deadline
+
+        """
+        self.deadline = deadline.as_deadline(seconds)
+
+    def _share_deadline(self, search):
+        """Give search the timeout and deadline of this crawl."""
+        search.timeout = self.timeout
+        search.deadline = self.deadline
+        return search
+
+    def probe(self, sample_size=5):
+        """Probe total-results for each prefix and a sample of DOIs.
+
+        Parameters
+        ----------
+        sample_size: int, default 5
+            number of DOIs probed to estimate events per DOI
+
+        """
+        for prefix in self.prefixes:
+            search = self._share_deadline(
+                SearchEventdata(prefix, "doi_prefix", self.mailto, self.relation_type)
+            )
+            self.prefix_hits[prefix] = search.get_total_results()
+
+        step = max(1, len(self.search_terms) // max(1, sample_size))
+        for doi in self.search_terms[::step][:sample_size]:
+            search = self._share_deadline(
+                SearchEventdata(doi, "doi", self.mailto, self.relation_type)
+            )
+            self.sample_hits[doi] = search.get_total_results()
+
+    def estimate_cost(self, rows=10000):
+        """Estimate wall time of fan-out and prefix crawl strategies.
+
+        Fan-out issues at least one request per DOI spread across
+        max_workers, and transfers only events of the listed DOIs
+        (estimated from the sampled DOIs).  A prefix crawl pages
+        serially through every event of each prefix.
+
+        Parameters
+        ----------
+        rows: int, default 10000
+            page size used by eventdata requests
+
+        Returns
+        ----------
+        self.cost: dict
+            estimated requests, events and seconds per strategy
+        self.strategy: str
+            cheapest strategy, "fanout" or "prefix"
+
+        """
+        n_dois = len(self.search_terms)
+        sampled = [i for i in self.sample_hits.values() if i is not None]
+        mean_hits = sum(sampled) / len(sampled) if sampled else 0
+        fanout_events = mean_hits * n_dois
+        fanout_requests = n_dois + math.ceil(fanout_events / rows)
+        fanout_rounds = math.ceil(fanout_requests / max(1, self.max_workers))
+        self.cost["fanout"] = {
+            "requests": fanout_requests,
+            "events": fanout_events,
+            "seconds": fanout_rounds * self.seconds_per_request
+            + fanout_events * self.seconds_per_event,
+        }
+
+        if any(i is None for i in self.prefix_hits.values()):
+            prefix_events = None
+            prefix_requests = None
+            prefix_seconds = math.inf
+        else:
+            prefix_events = sum(self.prefix_hits.values())
+            prefix_requests = sum(
+                max(1, math.ceil(i / rows)) for i in self.prefix_hits.values()
+            )
+            prefix_seconds = (
+                prefix_requests * self.seconds_per_request
+                + prefix_events * self.seconds_per_event
+            )
+        self.cost["prefix"] = {
+            "requests": prefix_requests,
+            "events": prefix_events,
+            "seconds": prefix_seconds,
+        }
+
+        if self.cost["prefix"]["seconds"] < self.cost["fanout"]["seconds"]:
+            self.strategy = "prefix"
+        else:
+            self.strategy = "fanout"
+
+    def get_data(self, strategy=None):
+        """Get data from eventdata for all DOIs.
+
+        Parameters
+        ----------
+        strategy: str, default None
+            - ``'fanout'``: query each DOI concurrently.
+            - ``'prefix'``: crawl each prefix and filter to DOI list.
+            - ``None``: probe and use cheapest strategy.
+
+        """
+        if strategy is None:
+            if not self.cost:
+                self.probe()
+                self.estimate_cost()
+            strategy = self.strategy
+        self.strategy = strategy
+
+        if strategy == "fanout":
+            self.searches = [
+                SearchEventdata(
+                    i,
+                    "doi",
+                    self.mailto,
+                    self.relation_type,
+                    self.projected,
+                    self.max_records,
+                    self.spill_dir,
+                )
+                for i in self.search_terms
+            ]
+        elif strategy == "prefix":
+            self.searches = [
+                SearchEventdata(
+                    i,
+                    "doi_prefix",
+                    self.mailto,
+                    self.relation_type,
+                    self.projected,
+                    self.max_records,
+                    self.spill_dir,
+                )
+                for i in self.prefixes
+            ]
+        else:
+            self.response_message = "Incorrect strategy"
+            return
+        for search in self.searches:
+            self._share_deadline(search)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(_run_search, self.searches))
+
+        doi_set = set(self.search_terms)
+        for search in self.searches:
+            if strategy == "prefix":
+                self.response_data.extend(filter_events(search.response_data, doi_set))
+            else:
+                self.response_data.extend(search.response_data)
+        self.response_hits = len(self.response_data)
+
+        failed = [i.search_term for i in self.searches if i.response_status == "error"]
+        timed_out = [
+            i.search_term for i in self.searches if i.response_status == "timeout"
+        ]
+        if timed_out:
+            self.response_status = "timeout"
+            self.response_message = (
+                f"Timed out requests for: {','.join(timed_out)}. Results are partial."
+            )
+        elif len(failed) == len(self.searches):
+            self.response_status = "error"
+            self.response_message = "All requests failed."
+        elif failed:
+            self.response_status = "partial"
+            self.response_message = f"Failed requests for: {','.join(failed)}"
+        else:
+            self.response_status = "success"
+            self.response_message = "Successful response."
+
+
+class ShardedSearchEventdata:
+    """Class crawling eventdata in concurrent date window shards."""
+
+    def __init__(
+        self,
+        search_term,
+        search_type="doi_prefix",
+        mailto="",
+        relation_type="references",
+        start_date="1900-01-01",
+        end_date=None,
+        date_field="occurred",
+        max_shard_hits=50000,
+        max_workers=8,
+        projected=False,
+        max_records=None,
+        spill_dir=None,
+    ):
+        """Initialize sharded search eventdata obj.
+
+        Cursor pagination of a single eventdata query is serial.  The
+        query is split into disjoint date windows, windows with more than
+        max_shard_hits events (from total-results probes) are halved until
+        small enough or one day long, then the windows are crawled
+        concurrently.
+
+        Parameters
+        ----------
+        search_term: str
+            doi prefix formatted like "10.5066" or doi
+        search_type: str, default "doi_prefix"
+            see SearchEventdata
+        mailto: str
+            email contact, requested by crossref
+        relation_type: str, default "references"
+            server side relation-type filter
+        start_date: str, default "1900-01-01"
+            first day crawled formatted "YYYY-MM-DD"
+        end_date: str, default None
+            last day crawled formatted "YYYY-MM-DD", default is today (UTC)
+        date_field: str, default "occurred"
+            "occurred" or "updated", see SearchEventdata.set_date_window
+        max_shard_hits: int, default 50000
+            windows with more events are subdivided
+        max_workers: int, default 8
+            number of concurrent requests
+        projected: bool, default False
+            see SearchEventdata
+        max_records: int, default None
+            maximum events held in memory, see SearchEventdata
+        spill_dir: str, default None
+            directory of spill files
+
+        """
+        if end_date is None:
+            end_date = sharding.today()
+        self.search_term = search_term
+        self.search_type = search_type
+        self.mailto = mailto
+        self.relation_type = relation_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.date_field = date_field
+        self.max_shard_hits = max_shard_hits
+        self.max_workers = max_workers
+        self.projected = projected
+        self.max_records = max_records
+        self.spill_dir = spill_dir
+        self.shards = []
+        self.searches = []
+        self.response_hits = 0
+        self.response_data = spill.response_buffer(max_records, spill_dir)
+        self.response_status = "error"
+        self.response_message = "No request made."
+        self.timeout = throttle.DEFAULT_TIMEOUT
+        self.deadline = None
+
+    def set_deadline(self, seconds):
+        """Set time budget shared by all searches, see SearchEventdata.
+
+        Parameters
+        ----------
+        seconds: float or obj
+            seconds from now or a deadline.Deadline
+
+        """
+        self.deadline = deadline.as_deadline(seconds)
+
+    def _share_deadline(self, search):
+        """Give search the timeout and deadline of this crawl."""
+        search.timeout = self.timeout
+        search.deadline = self.deadline
+        return search
+
+    def _search(self, window, max_records=None):
+        """Create SearchEventdata limited to date window."""
+        search = SearchEventdata(
+            self.search_term,
+            self.search_type,
+            self.mailto,
+            self.relation_type,
+            self.projected,
+            max_records,
+            self.spill_dir,
+        )
+        search.set_date_window(window[0], window[1], self.date_field)
+        return self._share_deadline(search)
+
+    def plan_shards(self):
+        """Split date range into windows using total-results probes.
+
+        Returns
+        ----------
+        self.shards: list of dict
+            disjoint windows with probed hits, e.g.
+            [{'from': '1900-01-01', 'until': '2009-12-31', 'hits': 1200}]
+
+        """
+        self.shards = sharding.plan_windows(
+            self.start_date,
+            self.end_date,
+            lambda w: self._search(w).get_total_results(),
+            self.max_shard_hits,
+            self.max_workers,
+        )
+
+    def get_data(self):
+        """Crawl all shards concurrently and merge events by id."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        if not self.shards:
+            self.plan_shards()
+        self.searches = [
+            self._search((i["from"], i["until"]), self.max_records)
+            for i in self.shards
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(_run_search, self.searches))
+
+        seen = set()
+        for search in self.searches:
+            for event in search.response_data:
+                if event.get("id") in seen:
+                    continue
+                seen.add(event.get("id"))
+                self.response_data.append(event)
+        self.response_hits = len(self.response_data)
+
+        failed = [
+            f"{i.date_window[1]}/{i.date_window[2]}"
+            for i in self.searches
+            if i.response_status == "error"
+        ]
+        timed_out = [i for i in self.searches if i.response_status == "timeout"]
+        if timed_out:
+            self.response_status = "timeout"
+            self.response_message = (
+                f"{len(timed_out)} of {len(self.searches)} shards timed out. "
+                "Results are partial."
+            )
+        elif self.searches and len(failed) == len(self.searches):
+            self.response_status = "error"
+            self.response_message = "All requests failed."
+        elif failed:
+            self.response_status = "partial"
+            self.response_message = f"Failed requests for windows: {','.join(failed)}"
+        else:
+            self.response_status = "success"
+            self.response_message = "Successful response."
+
+
+def _run_search(search):
+    """Build url and get data for a SearchEventdata object."""
+    search.build_query_url()
+    search.get_data()
+    return search
+
+
+def is_reference(event):
+    """Test if event is a "references" relation between two DOIs.
+
+    Parameters
+    ----------
+    event: dict
+        eventdata event
+
+    Returns
+    ----------
+    Bool
+
+    """
+    doi_prefix = "https://doi.org/"
+    return (
+        event.get("relation_type_id") == "references"
+        and doi_prefix in event.get("obj_id", "")
+        and doi_prefix in event.get("subj_id", "")
+    )
+
+
+def filter_events(events, doi_set):
+    """Keep events whose obj_id is one of a set of DOIs.
+
+    Parameters
+    ----------
+    events: list of dict
+        eventdata events, e.g. SearchEventdata response_data
+    doi_set: set of str
+        upper case DOIs formatted like "10.5066/P9IGEC9G"
+
+    Returns
+    ----------
+    list of dict
+        events citing a DOI in doi_set
+
+    """
+    doi_prefix = "https://doi.org/"
+    return [
+        event
+        for event in events
+        if event.get("obj_id", "").upper().replace(doi_prefix.upper(), "")
+        in doi_set
+    ]
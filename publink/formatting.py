@@ -0,0 +1,46 @@
+"""Format identifiers found in publications and search results."""
+
+
+def doi_formatting(input_doi):
+    """Reformat loosely structured DOIs.
+
+    Currently only doing simplistic removal of 8 common http prefixes
+    and changing case to upper.
+    End DOI should be in format 10.NNNN/*, not as url
+
+    Parameters
+    ----------
+    input_doi: str
+
+    Notes
+    ----------
+    This focuses on known potential issues.  This currently
+    returns no errors, potential improvement for updates.
+
+    """
+    input_doi = input_doi.upper()
+    input_doi = input_doi.replace(" ", "")
+    # All DOI prefixes begin with '10'
+    if str(input_doi).startswith("10"):
+        formatted_doi = str(input_doi)
+    elif str(input_doi).startswith("DOI:"):
+        formatted_doi = input_doi[4:]
+    elif str(input_doi).startswith("HTTPS://DOI.ORG/DOI:"):
+        formatted_doi = input_doi[20:]
+    elif str(input_doi).startswith("HTTPS://DX.DOI.ORG/DOI:"):
+        formatted_doi = input_doi[23:]
+    elif str(input_doi).startswith("HTTP://DOI.ORG/DOI:"):
+        formatted_doi = input_doi[19:]
+    elif str(input_doi).startswith("HTTP://DX.DOI.ORG/DOI:"):
+        formatted_doi = input_doi[22:]
+    elif str(input_doi).startswith("HTTPS://DOI.ORG/"):
+        formatted_doi = input_doi[16:]
+    elif str(input_doi).startswith("HTTPS://DX.DOI.ORG/"):
+        formatted_doi = input_doi[19:]
+    elif str(input_doi).startswith("HTTP://DOI.ORG/"):
+        formatted_doi = input_doi[15:]
+    elif str(input_doi).startswith("HTTP://DX.DOI.ORG/"):
+        formatted_doi = input_doi[18:]
+    else:
+        formatted_doi = str(input_doi)
+    return formatted_doi
@@ -0,0 +1,156 @@
+"""Incrementally decode large JSON arrays from a stream of text chunks."""
+
+# Import packages
+import codecs
+import json
+import re
+
+
+class StreamingArrayDecoder:
+    """Class decoding one array of a JSON document item by item."""
+
+    def __init__(self, chunks, array_key, fields=None, predicate=None):
+        """Initialize streaming decoder.
+
+        Items of the array named array_key are decoded one at a time as
+        chunks arrive, so only the current item and a small read buffer
+        are held in memory.  Everything outside the array is collected
+        and decoded once the stream is exhausted, see self.metadata.
+
+        Chunks are either pulled from chunks by iterating the decoder, or
+        pushed with feed and close, e.g. from an async stream.  Each item
+        is fully decoded before projection, so decoding takes slightly
+        longer than json.loads of the whole document, the gain is memory.
+
+        Parameters
+        ----------
+        chunks: iterable of str or bytes
+            pieces of a JSON document, e.g. requests iter_content, empty
+            when chunks are pushed with feed
+        array_key: str
+            key of the array to stream, e.g. "events"
+        fields: list of str, default None
+            keys kept from each item, None keeps all keys
+        predicate: function, default None
+            called on each decoded item, items returning False are dropped
+
+        Notes
+        ----------
+        The first key in the document equal to array_key and holding an
+        array is streamed, its value in self.metadata is an empty list.
+
+        """
+        self.chunks = iter(chunks)
+        self.array_key = array_key
+        self.fields = fields
+        self.predicate = predicate
+        self.metadata = None
+        self.items_seen = 0
+        self.items_kept = 0
+        self._decoder = json.JSONDecoder()
+        self._bytes_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._array_start = re.compile(rf'"{re.escape(array_key)}"\s*:\s*\[')
+        self._skeleton = []
+        self._buf = ""
+        self._state = "start"
+
+    def __iter__(self):
+        """Yield projected items of the streamed array."""
+        for chunk in self.chunks:
+            yield from self.feed(chunk)
+        self.close()
+
+    def feed(self, chunk):
+        """Decode items completed by the next chunk of the document.
+
+        Parameters
+        ----------
+        chunk: str or bytes
+
+        Returns
+        ----------
+        list of dict
+            projected items kept, possibly empty
+
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._bytes_decoder.decode(chunk)
+        if self._state == "rest":
+            self._skeleton.append(chunk)
+            return []
+        self._buf = f"{self._buf}{chunk}"
+        items = []
+        if self._state == "start":
+            # Find start of array
+            match = self._array_start.search(self._buf)
+            if match is None:
+                return items
+            self._skeleton.append(self._buf[: match.start()])
+            self._skeleton.append(f'"{self.array_key}": []')
+            self._buf = self._buf[match.end():]
+            self._state = "array"
+
+        pos = 0
+        while True:
+            pos = _skip_separators(self._buf, pos)
+            if pos < len(self._buf) and self._buf[pos] == "]":
+                self._skeleton.append(self._buf[pos + 1:])
+                self._buf = ""
+                self._state = "rest"
+                break
+            try:
+                item, end = self._decoder.raw_decode(self._buf, pos)
+            except ValueError:
+                # Item is incomplete, keep it for the next chunk
+                self._buf = self._buf[pos:]
+                break
+            pos = end
+            self.items_seen += 1
+            if self.predicate is None or self.predicate(item):
+                self.items_kept += 1
+                items.append(project(item, self.fields))
+        return items
+
+    def close(self):
+        """Decode the remainder of the document into self.metadata.
+
+        Raises
+        ----------
+        ValueError
+            if the document ends inside the streamed array
+
+        """
+        self.feed(self._bytes_decoder.decode(b"", final=True))
+        if self._state == "array":
+            # Raises the decode error of the incomplete item
+            self._decoder.raw_decode(self._buf, _skip_separators(self._buf, 0))
+            raise ValueError(f"Unterminated array {self.array_key}")
+        if self._state == "start":
+            self._skeleton.append(self._buf)
+        self.metadata = json.loads("".join(self._skeleton))
+
+
+def _skip_separators(buf, pos):
+    """Advance position past whitespace and commas."""
+    while pos < len(buf) and buf[pos] in " \t\r\n,":
+        pos += 1
+    return pos
+
+
+def project(item, fields=None):
+    """Keep a subset of keys from a dictionary.
+
+    Parameters
+    ----------
+    item: dict
+    fields: list of str, default None
+        keys to keep, None returns item unchanged
+
+    Returns
+    ----------
+    dict
+
+    """
+    if fields is None:
+        return item
+    return {k: item[k] for k in fields if k in item}
@@ -0,0 +1,321 @@
+"""Persistent SQLite store of harvested mentions and relations."""
+
+# Import packages
+import datetime
+import sqlite3
+
+from publink.formatting import doi_formatting
+
+# Upserts keep the first harvest date and metadata of sparser harvests
+_EARLIEST = (
+    "harvest_date = min(coalesce(harvest_date, excluded.harvest_date), "
+    "excluded.harvest_date)"
+)
+
+UPSERT_DOCUMENT = (
+    "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (source, doc_id) DO UPDATE SET "
+    "pub_doi = coalesce(excluded.pub_doi, pub_doi), "
+    "pub_title = coalesce(nullif(excluded.pub_title, ''), pub_title), "
+    "pub_date = coalesce(nullif(excluded.pub_date, ''), pub_date), "
+    "pub_journal = coalesce(nullif(excluded.pub_journal, ''), pub_journal), "
+    f"{_EARLIEST}"
+)
+
+UPSERT_MENTION = (
+    "INSERT INTO mentions VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (xdd_id, search_term) DO UPDATE SET "
+    "pub_doi = coalesce(excluded.pub_doi, pub_doi), "
+    "certainty = coalesce(excluded.certainty, certainty), "
+    "highlight = coalesce(nullif(excluded.highlight, ''), highlight), "
+    f"{_EARLIEST}"
+)
+
+UPSERT_RELATION = (
+    "INSERT INTO relations VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (event_id, search_term) DO UPDATE SET "
+    "pub_doi = coalesce(excluded.pub_doi, pub_doi), "
+    "source = coalesce(excluded.source, source), "
+    f"{_EARLIEST}"
+)
+
+
+class MentionStore:
+    """Class storing xDD mentions and eventdata relations in SQLite."""
+
+    def __init__(self, path=":memory:"):
+        """Open or create a mention store.
+
+        Publications are kept in a documents table keyed by source and
+        document id (xDD _gddid or eventdata event id).  xDD mentions are
+        keyed by (xdd_id, search_term) and eventdata relations by
+        (event_id, search_term), so harvests can be written again without
+        creating duplicates.  Rows written again keep their first
+        harvest_date, and empty metadata does not replace stored values.
+        Search terms and publication DOIs are stored formatted with
+        formatting.doi_formatting.  Requires SQLite 3.24 or newer.
+
+        Parameters
+        ----------
+        path: str, default ":memory:"
+            path of SQLite database file
+
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                source TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                pub_doi TEXT,
+                pub_title TEXT,
+                pub_date TEXT,
+                pub_journal TEXT,
+                harvest_date TEXT,
+                PRIMARY KEY (source, doc_id)
+            );
+            CREATE TABLE IF NOT EXISTS mentions (
+                xdd_id TEXT NOT NULL,
+                search_term TEXT NOT NULL,
+                pub_doi TEXT,
+                certainty TEXT,
+                highlight TEXT,
+                harvest_date TEXT,
+                PRIMARY KEY (xdd_id, search_term)
+            );
+            CREATE TABLE IF NOT EXISTS relations (
+                event_id TEXT NOT NULL,
+                search_term TEXT NOT NULL,
+                pub_doi TEXT,
+                source TEXT,
+                harvest_date TEXT,
+                PRIMARY KEY (event_id, search_term)
+            );
+            CREATE INDEX IF NOT EXISTS documents_pub_doi ON documents (pub_doi);
+            CREATE INDEX IF NOT EXISTS documents_pub_date ON documents (pub_date);
+            CREATE INDEX IF NOT EXISTS mentions_search_term
+                ON mentions (search_term);
+            CREATE INDEX IF NOT EXISTS mentions_pub_doi ON mentions (pub_doi);
+            CREATE INDEX IF NOT EXISTS mentions_harvest_date
+                ON mentions (harvest_date);
+            CREATE INDEX IF NOT EXISTS relations_search_term
+                ON relations (search_term);
+            CREATE INDEX IF NOT EXISTS relations_pub_doi ON relations (pub_doi);
+            CREATE INDEX IF NOT EXISTS relations_harvest_date
+                ON relations (harvest_date);
+            """
+        )
+        self.conn.commit()
+
+    def close(self):
+        """Close database connection."""
+        self.conn.close()
+
+    def upsert_mentions(self, mentions, harvest_date=None, batch_size=1000):
+        """Insert or update xDD mentions and their publications.
+
+        Parameters
+        ----------
+        mentions: iterable of dict
+            xdd_search GetMentions.mentions
+        harvest_date: str, default None
+            date of harvest formatted "YYYY-MM-DD", default is today (UTC)
+        batch_size: int, default 1000
+            rows written per executemany call
+
+        Returns
+        ----------
+        int
+            number of mentions written
+
+        """
+        harvest_date = harvest_date or _today()
+        count = 0
+        for batch in _batches(mentions, batch_size):
+            documents = [
+                (
+                    "xdd",
+                    i["xdd_id"],
+                    _format(i.get("pub_doi")),
+                    i.get("pub_title", ""),
+                    i.get("pub_date", ""),
+                    i.get("pub_journal", ""),
+                    harvest_date,
+                )
+                for i in batch
+            ]
+            rows = [
+                (
+                    i["xdd_id"],
+                    doi_formatting(i["search_term"]),
+                    _format(i.get("pub_doi")),
+                    i.get("certainty"),
+                    i.get("highlight", ""),
+                    harvest_date,
+                )
+                for i in batch
+            ]
+            with self.conn:
+                self.conn.executemany(UPSERT_DOCUMENT, documents)
+                self.conn.executemany(UPSERT_MENTION, rows)
+            count += len(rows)
+        return count
+
+    def upsert_relations(self, related_dois, harvest_date=None, batch_size=1000):
+        """Insert or update eventdata relations.
+
+        Parameters
+        ----------
+        related_dois: iterable of dict
+            eventdata GetRelated.related_dois
+        harvest_date: str, default None
+            date of harvest formatted "YYYY-MM-DD", default is today (UTC)
+        batch_size: int, default 1000
+            rows written per executemany call
+
+        Returns
+        ----------
+        int
+            number of relations written
+
+        """
+        harvest_date = harvest_date or _today()
+        count = 0
+        for batch in _batches(related_dois, batch_size):
+            documents = [
+                (
+                    "eventdata",
+                    i["event_id"],
+                    _format(i["pub_doi"]),
+                    "",
+                    "",
+                    "",
+                    harvest_date,
+                )
+                for i in batch
+            ]
+            rows = [
+                (
+                    i["event_id"],
+                    doi_formatting(i["search_term"]),
+                    _format(i["pub_doi"]),
+                    i.get("source"),
+                    harvest_date,
+                )
+                for i in batch
+            ]
+            with self.conn:
+                self.conn.executemany(UPSERT_DOCUMENT, documents)
+                self.conn.executemany(UPSERT_RELATION, rows)
+            count += len(rows)
+        return count
+
+    def citing(self, search_term):
+        """Get publications citing a search term in xDD or eventdata.
+
+        Parameters
+        ----------
+        search_term: str
+            e.g. data DOI '10.5066/F7K935KT'
+
+        Returns
+        ----------
+        list of dict
+            one record per publication DOI sorted by DOI, e.g.
+            [{'pub_doi': '10.1002/ESP.4023',
+              'sources': ['eventdata', 'xdd'],
+              'xdd_ids': ['585b4a6ccf58f1a722da91ea'],
+              'event_ids': ['6cbe2817-1e54-42dd-929e-8444ada767bc']}]
+
+        """
+        term = doi_formatting(search_term)
+        rows = self.conn.execute(
+            "SELECT pub_doi, 'xdd', xdd_id FROM mentions WHERE search_term = ? "
+            "UNION ALL "
+            "SELECT pub_doi, 'eventdata', event_id FROM relations "
+            "WHERE search_term = ?",
+            (term, term),
+        )
+        citing = {}
+        for pub_doi, source, doc_id in rows:
+            record = citing.setdefault(
+                pub_doi,
+                {"pub_doi": pub_doi, "sources": [], "xdd_ids": [], "event_ids": []},
+            )
+            if source not in record["sources"]:
+                record["sources"].append(source)
+            key = "xdd_ids" if source == "xdd" else "event_ids"
+            record[key].append(doc_id)
+        for record in citing.values():
+            record["sources"].sort()
+        return [citing[i] for i in sorted(citing, key=lambda x: x or "")]
+
+    def cited_by(self, pub_doi):
+        """Get search terms mentioned by a publication.
+
+        Parameters
+        ----------
+        pub_doi: str
+
+        Returns
+        ----------
+        list of str
+            sorted search terms
+
+        """
+        doi = doi_formatting(pub_doi)
+        rows = self.conn.execute(
+            "SELECT search_term FROM mentions WHERE pub_doi = ? "
+            "UNION SELECT search_term FROM relations WHERE pub_doi = ?",
+            (doi, doi),
+        )
+        return sorted(i[0] for i in rows)
+
+    def citation_counts(self, since=None):
+        """Count distinct citing publications of each search term.
+
+        Parameters
+        ----------
+        since: str, default None
+            only count mentions and relations first harvested on or after
+            this date formatted "YYYY-MM-DD"
+
+        Returns
+        ----------
+        dict
+            e.g. {'10.5066/F7K935KT': 2}
+
+        """
+        since = since or ""
+        rows = self.conn.execute(
+            "SELECT search_term, count(DISTINCT pub_doi) FROM ("
+            "SELECT search_term, pub_doi FROM mentions WHERE harvest_date >= ? "
+            "UNION SELECT search_term, pub_doi FROM relations "
+            "WHERE harvest_date >= ?"
+            ") GROUP BY search_term",
+            (since, since),
+        )
+        return dict(rows)
+
+
+def _today():
+    """Get today's date (UTC) formatted "YYYY-MM-DD"."""
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+def _format(doi):
+    """Format DOI, keeping missing DOIs as None."""
+    return doi_formatting(doi) if doi else None
+
+
+def _batches(records, batch_size):
+    """Yield lists of at most batch_size records."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,376 @@
+"""Schedule recurring searches of monitored DOIs by citation velocity."""
+
+# Import packages
+import datetime
+import random
+import sqlite3
+import time
+import zlib
+
+DAY = 86400.0
+
+
+class CheckError(RuntimeError):
+    """Error of a failed check, carrying the requests it made."""
+
+    def __init__(self, message, requests=1):
+        super().__init__(message)
+        self.requests = requests
+
+
+class MonitorSchedule:
+    """Class scheduling re-checks of DOIs with adaptive intervals."""
+
+    def __init__(
+        self,
+        path,
+        sources=("xdd", "eventdata"),
+        daily_budget=None,
+        min_interval=1.0,
+        max_interval=90.0,
+        initial_interval=7.0,
+        smoothing=0.3,
+    ):
+        """Open or create a monitoring schedule.
+
+        Every DOI is checked on each source at its own interval.  Checks
+        finding new citing publications halve the interval, checks
+        finding none grow it by half, within min_interval and
+        max_interval.  Citation velocity, the smoothed rate of new citing
+        publications per day, orders due checks so active datasets are
+        checked first when the daily budget is short.  Next checks are
+        jittered so DOIs added together spread out over time.
+
+        Parameters
+        ----------
+        path: str
+            path of SQLite database file
+        sources: tuple of str, default ("xdd", "eventdata")
+            upstreams each DOI is checked on
+        daily_budget: dict, default None
+            maximum requests per UTC day per source, e.g.
+            {"xdd": 5000, "eventdata": 20000}, missing sources are not
+            limited.  Checks start while budget remains, so the last
+            check of a day can exceed it by its own requests.
+        min_interval: float, default 1.0
+            shortest re-check interval in days
+        max_interval: float, default 90.0
+            longest re-check interval in days
+        initial_interval: float, default 7.0
+            interval of new DOIs in days, first checks are spread across it
+        smoothing: float, default 0.3
+            weight of the latest check in citation velocity
+
+        """
+        self.path = path
+        self.sources = tuple(sources)
+        self.daily_budget = daily_budget or {}
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.smoothing = smoothing
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS schedule (
+                doi TEXT NOT NULL,
+                source TEXT NOT NULL,
+                next_check REAL NOT NULL,
+                last_checked REAL,
+                interval REAL NOT NULL,
+                velocity REAL NOT NULL DEFAULT 0,
+                mentions INTEGER NOT NULL DEFAULT 0,
+                checks INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (doi, source)
+            );
+            CREATE INDEX IF NOT EXISTS schedule_due
+                ON schedule (source, next_check);
+            CREATE TABLE IF NOT EXISTS usage (
+                day TEXT NOT NULL,
+                source TEXT NOT NULL,
+                requests INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, source)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def close(self):
+        """Close database connection."""
+        self.conn.close()
+
+    def add(self, dois, now=None):
+        """Add DOIs to the schedule, DOIs already scheduled are kept.
+
+        First checks are staggered across initial_interval by a hash of
+        the DOI, so a large inventory does not come due at once.
+
+        Parameters
+        ----------
+        dois: list of str
+        now: float, default None
+            unix time, default is current time
+
+        """
+        now = time.time() if now is None else now
+        rows = []
+        for doi in dois:
+            for source in self.sources:
+                offset = zlib.crc32(f"{doi}|{source}".encode("utf-8")) / 2 ** 32
+                rows.append(
+                    (
+                        doi,
+                        source,
+                        now + offset * self.initial_interval * DAY,
+                        self.initial_interval,
+                    )
+                )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO schedule (doi, source, next_check, interval) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def remaining_budget(self, source, now=None):
+        """Get requests left today for source, None if not limited."""
+        budget = self.daily_budget.get(source)
+        if budget is None:
+            return None
+        row = self.conn.execute(
+            "SELECT requests FROM usage WHERE day = ? AND source = ?",
+            (_day(now), source),
+        ).fetchone()
+        return max(0, budget - (row[0] if row else 0))
+
+    def due(self, source, now=None, limit=None):
+        """Get DOIs due for a check, highest citation velocity first.
+
+        Parameters
+        ----------
+        source: str
+        now: float, default None
+            unix time, default is current time
+        limit: int, default None
+            maximum DOIs, also bounded by the remaining daily budget
+            assuming one request per check
+
+        Returns
+        ----------
+        list of str
+
+        """
+        now = time.time() if now is None else now
+        remaining = self.remaining_budget(source, now)
+        if remaining is not None:
+            limit = remaining if limit is None else min(limit, remaining)
+        sql = (
+            "SELECT doi FROM schedule WHERE source = ? AND next_check <= ? "
+            "ORDER BY velocity DESC, next_check"
+        )
+        params = (source, now)
+        if limit is not None:
+            sql = f"{sql} LIMIT ?"
+            params = params + (limit,)
+        return [i[0] for i in self.conn.execute(sql, params)]
+
+    def record(self, doi, source, new_mentions, requests=1, now=None):
+        """Record result of a check and schedule the next one.
+
+        Parameters
+        ----------
+        doi: str
+        source: str
+        new_mentions: int
+            citing publications found that were not known before
+        requests: int, default 1
+            requests made by the check, counted against the daily budget
+        now: float, default None
+            unix time, default is current time
+
+        Returns
+        ----------
+        float
+            unix time of next check
+
+        """
+        now = time.time() if now is None else now
+        last_checked, interval, velocity = self.conn.execute(
+            "SELECT last_checked, interval, velocity FROM schedule "
+            "WHERE doi = ? AND source = ?",
+            (doi, source),
+        ).fetchone()
+        elapsed = interval if last_checked is None else (now - last_checked) / DAY
+        rate = new_mentions / max(elapsed, self.min_interval)
+        velocity += self.smoothing * (rate - velocity)
+        if new_mentions > 0:
+            interval = interval / 2
+        else:
+            interval = interval * 1.5
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        # Jitter spreads checks found due together
+        next_check = now + interval * DAY * random.uniform(0.9, 1.1)
+        with self.conn:
+            self.conn.execute(
+                "UPDATE schedule SET next_check = ?, last_checked = ?, "
+                "interval = ?, velocity = ?, mentions = mentions + ?, "
+                "checks = checks + 1 WHERE doi = ? AND source = ?",
+                (next_check, now, interval, velocity, new_mentions, doi, source),
+            )
+            self._use(source, requests, now)
+        return next_check
+
+    def _use(self, source, requests, now):
+        """Count requests against the daily budget of source."""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO usage (day, source) VALUES (?, ?)",
+            (_day(now), source),
+        )
+        self.conn.execute(
+            "UPDATE usage SET requests = requests + ? WHERE day = ? AND source = ?",
+            (requests, _day(now), source),
+        )
+
+    def postpone(self, doi, source, seconds, requests=0, now=None):
+        """Delay next check of a DOI without changing its interval.
+
+        Parameters
+        ----------
+        doi: str
+        source: str
+        seconds: float
+            delay from now
+        requests: int, default 0
+            requests made by a failed check, counted against the daily
+            budget
+        now: float, default None
+            unix time, default is current time
+
+        """
+        now = time.time() if now is None else now
+        with self.conn:
+            self.conn.execute(
+                "UPDATE schedule SET next_check = ? WHERE doi = ? AND source = ?",
+                (now + seconds, doi, source),
+            )
+            self._use(source, requests, now)
+
+    def next_due(self):
+        """Get unix time of the earliest scheduled check, None if empty."""
+        row = self.conn.execute("SELECT min(next_check) FROM schedule").fetchone()
+        return row[0]
+
+    def run_once(self, check, now=None, retry_seconds=3600):
+        """Run checks that are due within the daily budget of each source.
+
+        Parameters
+        ----------
+        check: function
+            called with doi and source, returns (new_mentions, requests),
+            see make_check.  Failing checks are retried after
+            retry_seconds, their requests are counted from the requests
+            attribute of CheckError, other errors count one request.
+        now: float, default None
+            unix time, default is current time
+        retry_seconds: float, default 3600
+            delay before a failed check is due again
+
+        Returns
+        ----------
+        dict
+            number of checks run per source
+
+        """
+        counts = {}
+        for source in self.sources:
+            counts[source] = 0
+            for doi in self.due(source, now):
+                remaining = self.remaining_budget(source, now)
+                if remaining is not None and remaining <= 0:
+                    break
+                try:
+                    new_mentions, requests = check(doi, source)
+                except Exception as e:
+                    requests = getattr(e, "requests", 1)
+                    self.postpone(doi, source, retry_seconds, requests, now)
+                    continue
+                self.record(doi, source, new_mentions, requests, now)
+                counts[source] += 1
+        return counts
+
+    def run(self, check, poll_seconds=60, stop=None):
+        """Run due checks until stopped.
+
+        Parameters
+        ----------
+        check: function
+            see run_once
+        poll_seconds: float, default 60
+            longest sleep between runs
+        stop: obj, default None
+            threading.Event, set to stop the scheduler
+
+        """
+        while stop is None or not stop.is_set():
+            self.run_once(check)
+            next_due = self.next_due()
+            now = time.time()
+            wait = poll_seconds
+            # Checks still due wait for budget of the next day
+            if next_due is not None and next_due > now:
+                wait = min(poll_seconds, next_due - now)
+            if stop is None:
+                time.sleep(wait)
+            else:
+                stop.wait(wait)
+
+
+def make_check(store, mailto=""):
+    """Make check searching a DOI and storing its mentions.
+
+    Parameters
+    ----------
+    store: obj
+        mention_store.MentionStore, new mentions are citing publications
+        not in the store before the check
+    mailto: str
+        email contact, requested by crossref
+
+    Returns
+    ----------
+    function
+        check for MonitorSchedule.run_once, returning requests sent
+        including follow-up pages, and raising CheckError if the search
+        failed or timed out
+
+    """
+    from publink import publink
+
+    def check(doi, source):
+        before = len(store.citing(doi))
+        if source == "xdd":
+            search = publink.search_xdd(doi, account_for_spaces=False)
+            requests = search.request_count
+            if search.response_status in ("error", "timeout"):
+                raise CheckError(search.response_message, requests)
+            publink.xdd_mentions(search.response_data, [doi], is_doi=True, store=store)
+        elif source == "eventdata":
+            search = publink.search_eventdata(
+                doi, "doi", mailto, relation_type="references", projected=True
+            )
+            requests = search.request_count
+            if search.response_status in ("error", "timeout"):
+                raise CheckError(search.response_message, requests)
+            publink.eventdata_mentions(search.response_data, store=store)
+        else:
+            raise ValueError(f"Unknown source: {source}")
+        return len(store.citing(doi)) - before, requests
+
+    return check
+
+
+def _day(now=None):
+    """Get UTC day of unix time formatted "YYYY-MM-DD"."""
+    now = time.time() if now is None else now
+    utc = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+    return utc.strftime("%Y-%m-%d")
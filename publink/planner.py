@@ -0,0 +1,346 @@
+"""Estimate cost of xDD and eventdata sweeps before running them."""
+
+# Import packages
+import json
+import math
+import time
+
+from publink import deadline as deadline_
+from publink import eventdata
+from publink import throttle
+from publink import xdd_search
+
+
+class SweepPlanner:
+    """Class probing planned queries to estimate documents, bytes and time."""
+
+    def __init__(
+        self,
+        seconds_per_event=0.0005,
+        rows=10000,
+        max_workers=8,
+        timeout=throttle.DEFAULT_TIMEOUT,
+    ):
+        """Initialize sweep planner.
+
+        Each planned query is probed once, xDD queries by their first
+        page and eventdata queries by a single event request.  Pages,
+        bytes and wall time of the full crawl are extrapolated from the
+        reported hits, the probe response size and its latency.  Probes
+        run concurrently, a probe that fails, times out or is not sent
+        before the deadline fails its estimate only.
+
+        Parameters
+        ----------
+        seconds_per_event: float, default 0.0005
+            transfer and decode time per eventdata event, see
+            eventdata.BatchSearchEventdata
+        rows: int, default 10000
+            page size of eventdata crawls
+        max_workers: int, default 8
+            number of concurrent probes
+        timeout: float or tuple, default throttle.DEFAULT_TIMEOUT
+            seconds or (connect, read) seconds of each probe
+
+        """
+        self.seconds_per_event = seconds_per_event
+        self.rows = rows
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.deadline = None
+        self.estimates = []
+
+    def set_deadline(self, seconds):
+        """Set time budget of all probes.
+
+        Parameters
+        ----------
+        seconds: float or obj
+            seconds from now or a deadline.Deadline
+
+        """
+        self.deadline = deadline_.as_deadline(seconds)
+
+    def _run_probes(self, probe, urls):
+        """Run probe on each url concurrently, keeping url order."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(
+                executor.map(lambda url: probe(url, self.timeout, self.deadline), urls)
+            )
+
+    def probe_xdd(
+        self,
+        search_terms,
+        account_for_spaces=True,
+        anchors=False,
+        params="full_results&clean&inclusive=True",
+    ):
+        """Estimate cost of publink.search_xdd for each search term.
+
+        Parameters
+        ----------
+        search_terms: list of str
+        account_for_spaces: Bool, default True
+            see publink.search_xdd
+        anchors: Bool, default False
+            see publink.search_xdd
+        params: str
+            xDD query parameters, see SearchXdd.build_query_urls
+
+        Returns
+        ----------
+        list of dict
+            estimates added to self.estimates, see estimate
+
+        """
+        queries = []
+        for term in search_terms:
+            search = xdd_search.SearchXdd(term)
+            if anchors:
+                search.anchor_search_terms()
+            elif account_for_spaces:
+                search.all_search_terms()
+            search.build_query_urls(params=params)
+            queries.append((term, search.search_urls))
+        probes = iter(
+            self._run_probes(_probe_xdd, [url for _, urls in queries for url in urls])
+        )
+        estimates = [
+            estimate("xdd", term, [next(probes) for _ in urls])
+            for term, urls in queries
+        ]
+        self.estimates.extend(estimates)
+        return estimates
+
+    def probe_eventdata(
+        self, search_terms, search_type="doi", mailto="", relation_type=None
+    ):
+        """Estimate cost of publink.search_eventdata for each search term.
+
+        Parameters
+        ----------
+        search_terms: list of str
+        search_type: str, default "doi"
+            see publink.search_eventdata
+        mailto: str
+            email contact, requested by crossref
+        relation_type: str, default None
+            server side relation-type filter
+
+        Returns
+        ----------
+        list of dict
+            estimates added to self.estimates, see estimate
+
+        """
+        urls = []
+        for term in search_terms:
+            search = eventdata.SearchEventdata(term, search_type, mailto, relation_type)
+            search.build_query_url(rows=1)
+            urls.append(search.search_url)
+        estimates = []
+        for term, probe in zip(search_terms, self._run_probes(_probe_eventdata, urls)):
+            if probe is not None:
+                pages = max(1, math.ceil(probe["documents"] / self.rows))
+                probe["requests"] = pages
+                probe["seconds"] = (
+                    probe["seconds"] * pages
+                    + probe["documents"] * self.seconds_per_event
+                )
+            estimates.append(estimate("eventdata", term, [probe]))
+        self.estimates.extend(estimates)
+        return estimates
+
+    def ordered(self, key="seconds"):
+        """Get estimates sorted by cost, failed probes last.
+
+        Parameters
+        ----------
+        key: str, default "seconds"
+            "seconds", "requests", "bytes" or "documents"
+
+        Returns
+        ----------
+        list of dict
+
+        """
+        return sorted(
+            self.estimates,
+            key=lambda x: math.inf if x[key] is None else x[key],
+        )
+
+    def totals(self):
+        """Sum documents, requests, bytes and seconds of all estimates.
+
+        Returns
+        ----------
+        dict
+            totals of successful probes and number of failed probes
+
+        """
+        totals = {"documents": 0, "requests": 0, "bytes": 0, "seconds": 0.0}
+        failed = 0
+        for i in self.estimates:
+            if i["status"] != "success":
+                failed += 1
+                continue
+            for key in totals:
+                totals[key] += i[key]
+        totals["failed"] = failed
+        return totals
+
+    def select(self, max_seconds=None, max_requests=None, max_bytes=None):
+        """Pick cheapest queries fitting within a budget.
+
+        Queries are taken in order of estimated seconds while the running
+        totals stay within every budget given.  Queries whose probe
+        failed are never selected.
+
+        Parameters
+        ----------
+        max_seconds: float, default None
+        max_requests: int, default None
+        max_bytes: int, default None
+
+        Returns
+        ----------
+        selected: list of dict
+            estimates within budget, cheapest first
+        deferred: list of dict
+            remaining estimates
+
+        """
+        budget = {"seconds": max_seconds, "requests": max_requests, "bytes": max_bytes}
+        used = {key: 0 for key in budget}
+        selected = []
+        deferred = []
+        for i in self.ordered():
+            fits = i["status"] == "success" and all(
+                limit is None or used[key] + i[key] <= limit
+                for key, limit in budget.items()
+            )
+            if fits:
+                selected.append(i)
+                for key in used:
+                    used[key] += i[key]
+            else:
+                deferred.append(i)
+        return selected, deferred
+
+
+def estimate(source, search_term, probes):
+    """Combine probes of the queries of one search term.
+
+    Parameters
+    ----------
+    source: str
+        "xdd" or "eventdata"
+    search_term: str
+    probes: list of dict
+        documents, requests, bytes and seconds per query, None if the
+        probe failed
+
+    Returns
+    ----------
+    dict
+        e.g. {'source': 'xdd', 'search_term': '10.5066/F7K935KT',
+              'queries': 11, 'documents': 20, 'requests': 11,
+              'bytes': 40960, 'seconds': 5.5, 'status': 'success'}
+        documents of space variant queries are summed, counting
+        documents found by several variants more than once
+
+    """
+    result = {"source": source, "search_term": search_term, "queries": len(probes)}
+    if any(i is None for i in probes):
+        result.update(
+            {
+                "documents": None,
+                "requests": None,
+                "bytes": None,
+                "seconds": None,
+                "status": "error",
+            }
+        )
+        return result
+    for key in ["documents", "requests", "bytes", "seconds"]:
+        result[key] = sum(i[key] for i in probes)
+    result["status"] = "success"
+    return result
+
+
+def _get_json(url, timeout=throttle.DEFAULT_TIMEOUT, deadline=None):
+    """Get url, returning response, decoded body and latency.
+
+    Returns None if the request failed, timed out, was not sent before
+    the deadline or did not return JSON with status code 200.
+
+    """
+    import requests
+
+    start = time.monotonic()
+    try:
+        r = throttle.request("get", url, timeout=timeout, deadline=deadline)
+        json_response = r.json() if r.status_code == 200 else None
+    except (
+        requests.exceptions.RequestException,
+        deadline_.DeadlineExceeded,
+        ValueError,
+    ):
+        return None
+    if json_response is None:
+        return None
+    return r, json_response, time.monotonic() - start
+
+
+def _probe_xdd(url, timeout=throttle.DEFAULT_TIMEOUT, deadline=None):
+    """Extrapolate crawl cost of an xDD query from its first page."""
+    response = _get_json(url, timeout, deadline)
+    if response is None:
+        return None
+    r, json_response, latency = response
+    if "success" not in json_response:
+        return {
+            "documents": 0,
+            "requests": 1,
+            "bytes": len(r.content),
+            "seconds": latency,
+        }
+    hits = json_response["success"]["hits"]
+    page_size = len(json_response["success"]["data"])
+    if json_response["success"]["next_page"] == "" or page_size == 0:
+        pages = 1
+    else:
+        pages = math.ceil(hits / page_size)
+    return {
+        "documents": hits,
+        "requests": pages,
+        "bytes": len(r.content) * pages,
+        "seconds": latency * pages,
+    }
+
+
+def _probe_eventdata(url, timeout=throttle.DEFAULT_TIMEOUT, deadline=None):
+    """Estimate crawl cost of an eventdata query from a single event.
+
+    Requests and seconds are of the probe only, SweepPlanner scales them
+    to the page size of the crawl.
+
+    """
+    if url is None:
+        return None
+    response = _get_json(url, timeout, deadline)
+    if response is None or response[1].get("status") != "ok":
+        return None
+    r, json_response, latency = response
+    message = json_response["message"]
+    hits = message["total-results"]
+    events = message["events"]
+    event_bytes = len(json.dumps(events[0]).encode("utf-8")) if events else 0
+    return {
+        "documents": hits,
+        "requests": 1,
+        "bytes": hits * event_bytes,
+        "seconds": latency,
+    }
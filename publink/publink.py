@@ -1,11 +1,25 @@
 """General functions to extract and relate publications to data."""
-import requests
-
-from publink import xdd_search
+from publink import deadline as deadline_
+from publink import doi_extractor
 from publink import eventdata
-
-
-def search_xdd(search_terms, account_for_spaces=True):
+from publink import spill
+from publink import throttle
+from publink import xdd_search
+from publink.formatting import doi_formatting  # noqa: F401
+
+
+def search_xdd(
+    search_terms,
+    account_for_spaces=True,
+    index=None,
+    anchors=False,
+    max_records=None,
+    deadline=None,
+    hits_only=False,
+    limit=None,
+    profile=None,
+    spill_dir=None,
+):
     """Search xDD by term.
 
     Parameters
@@ -17,6 +31,38 @@ def search_xdd(search_terms, account_for_spaces=True):
             position to account for line or page breaks in the middle of a word
             (see xdd_search.SearchXdd.all_search_terms)
         False only searches exact match of provided search terms,
+    index: obj, default None
+        snippet_index.SnippetIndex, when provided results are added to
+        the local index for offline searching
+    anchors: Bool, default False
+        True searches each term and two anchor terms instead of space
+        iterations (see xdd_search.SearchXdd.anchor_search_terms), use
+        xdd_mentions with search_type "tolerant" and search.input_terms
+    max_records: int, default None
+        maximum response records held in memory before spilling to disk
+    deadline: float or obj, default None
+        time budget in seconds or a deadline.Deadline, when it runs out
+        the search stops with response_status "timeout" and partial results
+    hits_only: Bool, default False
+        True requests only the first page of one query per search term
+        and reports response_hits without crawling results.  Space
+        variants and anchors are not searched, as their hits overlap and
+        would count documents more than once.
+    limit: int, default None
+        stop once limit documents confirmed to mention a search term are
+        found, e.g. 1 tests if a term is mentioned at all.  Remaining
+        pages and search term variants are not queried and confirmed xDD
+        ids are in search.confirmed.
+    profile: str, default None
+        xDD payload profile, e.g. "dois" or the xdd_mentions search_type
+        results are extracted with, requesting only the fields the
+        extraction reads (see xdd_search.query_params).  Default None
+        requests "full", the unchanged xDD parameters.  search.response_bytes
+        counts bytes received and search.measure_savings() estimates
+        bytes saved compared to "full".
+    spill_dir: str, default None
+        directory of spill files with max_records, default is system
+        temp directory
 
     Returns
     ----------
@@ -24,16 +70,32 @@ def search_xdd(search_terms, account_for_spaces=True):
         SearchXdd object containing search results and messages
 
     """
-    search = xdd_search.SearchXdd(search_terms)
-    if account_for_spaces:
+    search = xdd_search.SearchXdd(
+        search_terms, max_records=max_records, spill_dir=spill_dir
+    )
+    search.set_deadline(deadline)
+    # Hits of variant queries overlap, count hits of input terms only
+    if anchors and not hits_only:
+        search.anchor_search_terms()
+    elif account_for_spaces and not hits_only:
         search.all_search_terms()
-    search.build_query_urls(params="full_results&clean&inclusive=True")
-    search.get_data()
+    search.build_query_urls(params=xdd_search.query_params(profile or "full"))
+    search.get_data(hits_only, limit)
+    if index is not None and search.response_status == "success":
+        index.add_documents(search.response_data)
 
     return search
 
 
-def xdd_mentions(xdd_response, search_terms, search_type="exact_match", is_doi=False):
+def xdd_mentions(
+    xdd_response,
+    search_terms,
+    search_type="exact_match",
+    is_doi=False,
+    extractor=None,
+    store=None,
+    title_index=None,
+):
     """Get mentions of search term from xDD.
 
     Parameters
@@ -47,6 +109,21 @@ def xdd_mentions(xdd_response, search_terms, search_type="exact_match", is_doi=F
         representation of the search term(s) provided.
         - ``'usgs'``: This search type searches for usgs dois which
         have a specific format allowing for refined search.
+        - ``'tolerant'``: Searches for search term(s) allowing for
+        whitespace and hyphenation breaks within the term.
+        - ``'doi_pattern'``: Searches for dois of every prefix registered
+        in extractor in a single pass.
+        - ``'title'``: Searches for dataset titles of title_index
+        allowing for casing, punctuation and truncation differences.
+    extractor: obj, default None
+        doi_extractor.DoiExtractor used by search type 'doi_pattern',
+        default extracts usgs dois
+    store: obj, default None
+        mention_store.MentionStore, when provided mentions are upserted
+        into the store
+    title_index: obj, default None
+        title_match.TitleIndex used by search type 'title', default
+        indexes search_terms
 
     Returns
     ----------
@@ -59,11 +136,36 @@ def xdd_mentions(xdd_response, search_terms, search_type="exact_match", is_doi=F
         mention.get_exact_mention(is_doi)
     elif search_type == "usgs":
         mention.get_usgs_doi_mentions()
+    elif search_type == "tolerant":
+        mention.get_tolerant_mention(is_doi)
+    elif search_type == "doi_pattern":
+        if extractor is None:
+            extractor = doi_extractor.usgs_extractor()
+        mention.get_doi_mentions(extractor)
+    elif search_type == "title":
+        if title_index is None:
+            from publink import title_match
+
+            title_index = title_match.TitleIndex(search_terms)
+        mention.get_title_mentions(title_index)
+    if store is not None:
+        mention.save(store)
 
     return mention
 
 
-def search_eventdata(search_term, search_type, mailto):
+def search_eventdata(
+    search_term,
+    search_type,
+    mailto,
+    relation_type=None,
+    projected=False,
+    max_records=None,
+    deadline=None,
+    hits_only=False,
+    limit=None,
+    spill_dir=None,
+):
     """Search eventdata by term.
 
     See eventdata docs @ https://www.eventdata.crossref.org/guide/
@@ -79,6 +181,25 @@ def search_eventdata(search_term, search_type, mailto):
     mailto: str
         email contact, requested by crossref to help understand
         who is using their api
+    relation_type: str, default None
+        server side relation-type filter, e.g. "references"
+    projected: bool, default False
+        True streams pages and keeps only fields of "references" events
+        used by eventdata_mentions, reducing memory of large crawls
+    max_records: int, default None
+        maximum events held in memory before spilling to disk
+    deadline: float or obj, default None
+        time budget in seconds or a deadline.Deadline, when it runs out
+        the search stops with response_status "timeout" and partial results
+    hits_only: Bool, default False
+        True requests a single event and reports total-results as
+        response_hits without crawling events
+    limit: int, default None
+        stop paging once limit "references" events are found, e.g. 1
+        tests if a DOI is cited at all.  Events are in eventdata order.
+    spill_dir: str, default None
+        directory of spill files with max_records, default is system
+        temp directory
 
     Returns
     ----------
@@ -91,20 +212,74 @@ def search_eventdata(search_term, search_type, mailto):
     several attempts before getting successful return
 
     """
-    search = eventdata.SearchEventdata(search_term, search_type, mailto)
-    search.build_query_url()
-    search.get_data()
+    search = eventdata.SearchEventdata(
+        search_term,
+        search_type,
+        mailto,
+        relation_type,
+        projected,
+        max_records,
+        spill_dir,
+    )
+    search.set_deadline(deadline)
+    if limit is None:
+        search.build_query_url()
+    else:
+        # Small pages return the first events in one short round trip
+        search.build_query_url(rows=min(10000, max(100, limit)))
+    search.get_data(hits_only, limit)
 
     return search
 
 
-def eventdata_mentions(eventdata_response):
+def search_eventdata_batch(
+    search_terms, mailto, strategy=None, max_workers=8, deadline=None
+):
+    """Search eventdata for a list of DOIs.
+
+    Parameters
+    ----------
+    search_terms: list of str
+        DOIs formatted like "10.5066/P9IGEC9G"
+    mailto: str
+        email contact, requested by crossref to help understand
+        who is using their api
+    strategy: str, default None
+        - ``'fanout'``: query each DOI concurrently.
+        - ``'prefix'``: crawl each DOI prefix and filter to the DOI list.
+        - ``None``: probe total-results and use the cheapest strategy.
+    max_workers: int, default 8
+        number of concurrent requests
+    deadline: float or obj, default None
+        time budget in seconds or a deadline.Deadline shared by all
+        requests, see search_eventdata
+
+    Returns
+    ----------
+    search: obj
+        BatchSearchEventdata object containing search results, cost
+        estimates and messages
+
+    """
+    search = eventdata.BatchSearchEventdata(
+        search_terms, mailto, max_workers=max_workers
+    )
+    search.set_deadline(deadline)
+    search.get_data(strategy)
+
+    return search
+
+
+def eventdata_mentions(eventdata_response, store=None):
     """Get mentions of search term from xDD.
 
     Parameters
     ----------
     eventdata_response: json
         Response from eventdata query.  SearchEventdata response_data
+    store: obj, default None
+        mention_store.MentionStore, when provided related DOIs are
+        upserted into the store
 
     Returns
     ----------
@@ -114,11 +289,20 @@ def eventdata_mentions(eventdata_response):
     """
     mention = eventdata.GetRelated(eventdata_response)
     mention.get_related_dois()
+    if store is not None:
+        mention.save(store)
 
     return mention
 
 
-def to_related_identifiers(mentions):
+def to_related_identifiers(
+    mentions,
+    doi_index=None,
+    deadline=None,
+    validator=None,
+    max_pairs=None,
+    spill_dir=None,
+):
     """Reformat mentions to match DataCite's schema for storing identifier relationships.
 
     Reformats mentions relating two DOIs to DataCite's schema that is
@@ -139,6 +323,21 @@ def to_related_identifiers(mentions):
               'search_term': '10.5066/P9LYUFRH',
               'highlight': 'str that ref usgs doi 10.5066/P9LYUFRH''
                }]
+    doi_index: obj, default None
+        doi_index.DoiIndex of registered DOIs, see validate_dois
+    deadline: float or obj, default None
+        time budget of DOI validation, see validate_dois.  Pairs with a
+        DOI not checked before it runs out are left out.
+    validator: obj, default None
+        validation.PipelinedValidator already resolving DOIs of mentions,
+        only DOIs still in flight or not yet submitted are waited for
+    max_pairs: int, default None
+        maximum unique pairs held in memory, see get_unique_pairs.  Pairs
+        are then streamed twice, before and after DOI validation, so
+        mentions must be iterable more than once, e.g. a list or a
+        spill.SpillBuffer.
+    spill_dir: str, default None
+        directory of run files, see get_unique_pairs
 
     Returns
     ----------
@@ -159,49 +358,56 @@ def to_related_identifiers(mentions):
         ]
 
     """
-    # Get unique pairs
-    unique_pairs = get_unique_pairs(mentions)
+    # Get unique pairs, held in memory or streamed from disk
+    pairs = get_unique_pairs(mentions) if max_pairs is None else None
 
-    # Get unique list of search term DOIs
-    search_dois = list(set(
-        [i["search_term"] for i in unique_pairs]
-    ))
+    def unique_pairs():
+        if pairs is not None:
+            return pairs
+        return get_unique_pairs(mentions, max_pairs, spill_dir)
 
-    # Get unique list of related pub dois
-    pub_dois = list(set(
-        [i["pub_doi"] for i in unique_pairs]
-    ))
+    # Get unique lists of search term and related pub DOIs
+    search_dois = set()
+    pub_dois = set()
+    for i in unique_pairs():
+        search_dois.add(i["search_term"])
+        pub_dois.add(i["pub_doi"])
 
     # Reduce overall list of dois to test resolve
-    unique_dois = list(set(pub_dois + search_dois))
+    unique_dois = list(pub_dois | search_dois)
 
-    resolving_dois, non_resolving_dois = validate_dois(unique_dois)
+    if validator is None:
+        resolving_dois, non_resolving_dois = validate_dois(
+            unique_dois, doi_index, deadline
+        )
+    else:
+        resolving_dois, non_resolving_dois = validator.results(unique_dois)
+
+    resolving_dois = set(resolving_dois)
+    related_ids = {}
+    for i in unique_pairs():
+        if i["pub_doi"] in resolving_dois and i["search_term"] in resolving_dois:
+            # Set to DataCite Schema
+            related_ids.setdefault(i["search_term"], []).append(
+                {
+                    "relation-type-id": "IsCitedBy",
+                    "related-identifier": f"https://doi.org/{i['pub_doi']}",
+                }
+            )
 
     related_identifiers = []
-    for doi in search_dois:
-        # Set to DataCite Schema
-        related_ids = [
-            {
-                "relation-type-id": "IsCitedBy",
-                "related-identifier": f"https://doi.org/{i['pub_doi']}",
-            }
-            for i in unique_pairs
-            if i["pub_doi"] in resolving_dois and i["search_term"] in resolving_dois
-        ]
-        related_ids = [dict(t) for t in {tuple(d.items()) for d in related_ids}]
-
-        if len(related_ids) > 0:
-            related = {
-                "doi": doi,
-                "identifier": f"https://doi.org/{doi}",
-                "related-identifiers": related_ids,
-            }
-            related_identifiers.append(related)
+    for doi, ids in related_ids.items():
+        related = {
+            "doi": doi,
+            "identifier": f"https://doi.org/{doi}",
+            "related-identifiers": ids,
+        }
+        related_identifiers.append(related)
 
     return related_identifiers
 
 
-def resolve_doi(doi):
+def resolve_doi(doi, deadline=None):
     """Test if DOI resolves.
 
     Validate that a DOI resolves correctly by
@@ -214,11 +420,14 @@ def resolve_doi(doi):
     ----------
     doi: str
         example format, e.g. '10.5066/F79021VS'
+    deadline: obj, default None
+        deadline.Deadline, DOIs not checked before it passes are None
 
     Returns
     ----------
     Bool
-        True: DOI resolves, False: DOI fails to resolve
+        True: DOI resolves, False: DOI fails to resolve, None: DOI was
+        not checked before the deadline
 
     Note: This logic is based off initial testing.
     A better understanding of requests.head and 302
@@ -228,14 +437,17 @@ def resolve_doi(doi):
 
     """
     doi_url = f"https://doi.org/{doi}"
-    r = requests.head(doi_url)
+    try:
+        r = throttle.request("head", doi_url, allow_redirects=False, deadline=deadline)
+    except deadline_.DeadlineExceeded:
+        return None
     if r.status_code == 302:
         return True
     else:
         return False
 
 
-def validate_dois(doi_list):
+def validate_dois(doi_list, doi_index=None, deadline=None, return_timed_out=False):
     """Validate that each DOI in list resolves.
 
     Parameters
@@ -243,6 +455,15 @@ def validate_dois(doi_list):
     doi_list: list of strings
         list of DOIs
         example format ['10.5066/F79021VS']
+    doi_index: obj, default None
+        doi_index.DoiIndex of registered DOIs, DOIs in the index are
+        accepted without a request to doi.org
+    deadline: float or obj, default None
+        time budget in seconds or a deadline.Deadline.  DOIs not checked
+        before it runs out are in neither resolving_dois nor
+        non_resolving_dois.
+    return_timed_out: bool, default False
+        True also returns timed_out_dois
 
     Returns
     ----------
@@ -250,16 +471,49 @@ def validate_dois(doi_list):
         DOIs that did resolve
     non_resolving_dois: list of strings
         DOIs that did not resolve
+    timed_out_dois: list of strings
+        DOIs not checked before the deadline, only with return_timed_out
 
     """
+    deadline = deadline_.as_deadline(deadline)
     # Ensure we are validating each DOI only once
     unique_dois = list(set(doi_list))
-    resolving_dois = [i for i in unique_dois if resolve_doi(i)]
-    non_resolving_dois = [i for i in unique_dois if i not in resolving_dois]
-    return resolving_dois, non_resolving_dois
+    if doi_index is None:
+        known_dois = set()
+    else:
+        known_dois = set(i for i in unique_dois if i in doi_index)
+    checks = {i: i in known_dois or resolve_doi(i, deadline) for i in unique_dois}
+    return split_checks(unique_dois, checks, return_timed_out)
+
 
+def split_checks(doi_list, checks, return_timed_out=False):
+    """Split DOIs by result of resolve_doi.
 
-def get_unique_pairs(mentions):
+    Parameters
+    ----------
+    doi_list: list of strings
+    checks: dict
+        result of resolve_doi keyed by DOI
+    return_timed_out: bool, default False
+        True also returns timed_out_dois
+
+    Returns
+    ----------
+    resolving_dois: list of strings
+    non_resolving_dois: list of strings
+    timed_out_dois: list of strings
+        only with return_timed_out
+
+    """
+    resolving_dois = [i for i in doi_list if checks[i]]
+    non_resolving_dois = [i for i in doi_list if checks[i] is False]
+    if not return_timed_out:
+        return resolving_dois, non_resolving_dois
+    timed_out_dois = [i for i in doi_list if checks[i] is None]
+    return resolving_dois, non_resolving_dois, timed_out_dois
+
+
+def get_unique_pairs(mentions, max_pairs=None, spill_dir=None):
     """Get unique pairs of search term and pub DOI.
 
     Parameters
@@ -271,17 +525,39 @@ def get_unique_pairs(mentions):
               'search_term': '10.5066/P9LYUFRH',
               'highlight': 'str that ref usgs doi 10.5066/P9LYUFRH'
                }]
+    max_pairs: int, default None
+        maximum unique pairs held in memory while deduplicating, past
+        this pairs are sorted into runs on disk and merged (see
+        spill.external_unique).  None deduplicates in memory.
+    spill_dir: str, default None
+        directory of run files, default is system temp directory
 
     Returns
     ----------
-    unique_pairs: dictionary
+    unique_pairs: list or generator of dictionaries
         unique sets of publication, search term pairs
         example format below
         [{'pub_doi': '10.3133/OFR20191040',
           'search_term': '10.5066/P9LYUFRH'
           }]
+        a list without max_pairs.  With max_pairs a generator streaming
+        pairs sorted by pub_doi and search_term from disk, so memory
+        stays within max_pairs however many pairs are unique.
 
     """
+    if max_pairs is not None:
+        keys = (
+            (i["pub_doi"], i["search_term"])
+            for i in mentions
+            if "pub_doi" in i and "search_term" in i
+        )
+        return (
+            {"pub_doi": pub_doi, "search_term": search_term}
+            for pub_doi, search_term in spill.external_unique(
+                keys, max_pairs, spill_dir
+            )
+        )
+
     pairs = [
         {"pub_doi": i["pub_doi"],
          "search_term": i["search_term"]
@@ -294,46 +570,87 @@ def get_unique_pairs(mentions):
     return unique_pairs
 
 
-def doi_formatting(input_doi):
-    """Reformat loosely structured DOIs.
+def merge_relations(xdd_mentions=(), eventdata_related=(), max_provenance=10):
+    """Merge xDD mentions and eventdata relations by pub DOI and search term.
 
-    Currently only doing simplistic removal of 8 common http prefixes
-    and changing case to upper.
-    End DOI should be in format 10.NNNN/*, not as url
+    Both inputs are consumed once, so generators can be passed.  DOIs are
+    canonicalized with doi_formatting and pairs are joined in a hash
+    table holding one record per unique pair.
 
     Parameters
     ----------
-    input_doi: str
+    xdd_mentions: iterable of dict
+        e.g. xdd_search GetMentions.mentions
+    eventdata_related: iterable of dict
+        e.g. eventdata GetRelated.related_dois
+    max_provenance: int, default 10
+        maximum xdd_ids and event_ids kept per pair, bounds memory
+        for frequently cited pairs
 
-    Notes
+    Returns
     ----------
-    This focuses on known potential issues.  This currently
-    returns no errors, potential improvement for updates.
+    relations: generator of dict
+        one record per unique pair, usable by to_related_identifiers
+        e.g. {'pub_doi': '10.1007/S10040-016-1406-Y',
+              'search_term': '10.5066/F7GB2257',
+              'xdd_ids': ['5d41e5e40b45c76cafa2778c'],
+              'event_ids': ['6cbe2817-1e54-42dd-929e-8444ada767bc'],
+              'sources': ['crossref', 'xdd'],
+              'certainty': 'most certain'}
 
     """
-    input_doi = input_doi.upper()
-    input_doi = input_doi.replace(" ", "")
-    # All DOI prefixes begin with '10'
-    if str(input_doi).startswith("10"):
-        formatted_doi = str(input_doi)
-    elif str(input_doi).startswith("DOI:"):
-        formatted_doi = input_doi[4:]
-    elif str(input_doi).startswith("HTTPS://DOI.ORG/DOI:"):
-        formatted_doi = input_doi[20:]
-    elif str(input_doi).startswith("HTTPS://DX.DOI.ORG/DOI:"):
-        formatted_doi = input_doi[23:]
-    elif str(input_doi).startswith("HTTP://DOI.ORG/DOI:"):
-        formatted_doi = input_doi[19:]
-    elif str(input_doi).startswith("HTTP://DX.DOI.ORG/DOI:"):
-        formatted_doi = input_doi[22:]
-    elif str(input_doi).startswith("HTTPS://DOI.ORG/"):
-        formatted_doi = input_doi[16:]
-    elif str(input_doi).startswith("HTTPS://DX.DOI.ORG/"):
-        formatted_doi = input_doi[19:]
-    elif str(input_doi).startswith("HTTP://DOI.ORG/"):
-        formatted_doi = input_doi[15:]
-    elif str(input_doi).startswith("HTTP://DX.DOI.ORG/"):
-        formatted_doi = input_doi[18:]
-    else:
-        formatted_doi = str(input_doi)
-    return formatted_doi
+    certainty_rank = {None: 0, "less certain": 1, "certain": 2, "most certain": 3}
+    pairs = {}
+
+    def _canonical(term):
+        formatted = doi_formatting(term)
+        return formatted if formatted.startswith("10.") else term.strip().upper()
+
+    def _pair(mention):
+        pub_doi = _canonical(mention.get("pub_doi", ""))
+        search_term = _canonical(mention.get("search_term", ""))
+        if not pub_doi or not search_term:
+            return None
+        key = (pub_doi, search_term)
+        if key not in pairs:
+            pairs[key] = {
+                "pub_doi": pub_doi,
+                "search_term": search_term,
+                "xdd_ids": [],
+                "event_ids": [],
+                "sources": [],
+                "certainty": None,
+            }
+        return pairs[key]
+
+    for mention in xdd_mentions:
+        relation = _pair(mention)
+        if relation is None:
+            continue
+        if (
+            mention.get("xdd_id") not in relation["xdd_ids"]
+            and len(relation["xdd_ids"]) < max_provenance
+        ):
+            relation["xdd_ids"].append(mention.get("xdd_id"))
+        if "xdd" not in relation["sources"]:
+            relation["sources"].append("xdd")
+        certainty = mention.get("certainty")
+        if certainty_rank.get(certainty, 0) > certainty_rank[relation["certainty"]]:
+            relation["certainty"] = certainty
+
+    for mention in eventdata_related:
+        relation = _pair(mention)
+        if relation is None:
+            continue
+        if (
+            mention.get("event_id") not in relation["event_ids"]
+            and len(relation["event_ids"]) < max_provenance
+        ):
+            relation["event_ids"].append(mention.get("event_id"))
+        source = mention.get("source", "eventdata")
+        if source not in relation["sources"]:
+            relation["sources"].append(source)
+
+    for relation in pairs.values():
+        relation["sources"].sort()
+        yield relation
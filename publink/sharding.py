@@ -0,0 +1,83 @@
+"""Split date ranges into windows for concurrent crawls."""
+
+# Import packages
+import datetime
+
+
+def today():
+    """Get today's date (UTC) formatted "YYYY-MM-DD"."""
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+def split_window(from_date, until_date):
+    """Split inclusive date window into two disjoint halves.
+
+    Parameters
+    ----------
+    from_date: str
+        formatted "YYYY-MM-DD"
+    until_date: str
+        formatted "YYYY-MM-DD"
+
+    Returns
+    ----------
+    list of tuple
+        two (from, until) windows, empty if window is a single day
+
+    """
+    start = datetime.datetime.strptime(from_date, "%Y-%m-%d").date()
+    end = datetime.datetime.strptime(until_date, "%Y-%m-%d").date()
+    if end <= start:
+        return []
+    mid = start + (end - start) // 2
+    return [
+        (start.isoformat(), mid.isoformat()),
+        ((mid + datetime.timedelta(days=1)).isoformat(), end.isoformat()),
+    ]
+
+
+def plan_windows(start_date, end_date, count, max_hits, max_workers=8):
+    """Split date range into windows holding at most max_hits records.
+
+    Windows are probed level by level, windows with more than max_hits
+    records are halved until small enough or one day long.  Windows
+    without records are dropped.
+
+    Parameters
+    ----------
+    start_date: str
+        first day formatted "YYYY-MM-DD"
+    end_date: str
+        last day formatted "YYYY-MM-DD"
+    count: function
+        called with a (from, until) window, returns number of records
+        or None if the probe failed
+    max_hits: int
+        windows with more records are subdivided
+    max_workers: int, default 8
+        number of concurrent probes
+
+    Returns
+    ----------
+    shards: list of dict
+        disjoint windows sorted by date, e.g.
+        [{'from': '1900-01-01', 'until': '2009-12-31', 'hits': 1200}]
+
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    shards = []
+    pending = [(start_date, end_date)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending:
+            hits = list(executor.map(count, pending))
+            next_pending = []
+            for window, n in zip(pending, hits):
+                halves = split_window(*window)
+                if n is not None and n > max_hits and halves:
+                    next_pending.extend(halves)
+                elif n != 0:
+                    shards.append({"from": window[0], "until": window[1], "hits": n})
+            pending = next_pending
+    shards.sort(key=lambda x: x["from"])
+    return shards
@@ -0,0 +1,313 @@
+"""Local full-text index of harvested xDD snippets."""
+
+# Import packages
+import datetime
+import json
+import sqlite3
+import zlib
+
+from publink import xdd_search
+
+
+class SnippetIndex:
+    """Class storing xDD snippets in a local SQLite FTS5 index."""
+
+    def __init__(self, path=":memory:"):
+        """Open or create a snippet index.
+
+        Highlights are stored zlib compressed in a documents table keyed
+        by _gddid, while a contentless FTS5 table indexes their text.
+        The trigram tokenizer is used when available so candidate
+        documents match on substrings, like GetMentions.
+
+        Parameters
+        ----------
+        path: str, default ":memory:"
+            path of SQLite database file
+
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.trigram = _has_trigram(self.conn)
+        tokenize = "trigram" if self.trigram else "unicode61"
+        self.conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                gddid TEXT UNIQUE NOT NULL,
+                doi TEXT,
+                title TEXT,
+                cover_date TEXT,
+                pubname TEXT,
+                highlights BLOB
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS highlight_fts
+                USING fts5(text, content='', tokenize='{tokenize}');
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS watermarks (
+                term TEXT PRIMARY KEY,
+                max_acquired TEXT
+            );
+            """
+        )
+        self.conn.commit()
+
+    def close(self):
+        """Close database connection."""
+        self.conn.close()
+
+    def add_documents(self, response_data, harvest_date=None):
+        """Add or update xDD documents in the index.
+
+        Highlights of documents already in the index are merged with the
+        new highlights.
+
+        Parameters
+        ----------
+        response_data: list of dict
+            SearchXdd response_data
+        harvest_date: str, default None
+            date of harvest formatted "YYYY-MM-DD", default is today (UTC)
+
+        """
+        cur = self.conn.cursor()
+        for ref in response_data:
+            row = cur.execute(
+                "SELECT id, highlights FROM documents WHERE gddid = ?",
+                (ref["_gddid"],),
+            ).fetchone()
+            highlights = list(ref.get("highlight", []))
+            if row is not None:
+                old = _decompress(row[1])
+                cur.execute(
+                    "INSERT INTO highlight_fts(highlight_fts, rowid, text) "
+                    "VALUES('delete', ?, ?)",
+                    (row[0], "\n".join(old)),
+                )
+                highlights = old + [i for i in highlights if i not in old]
+            values = (
+                ref["_gddid"],
+                ref.get("doi", ""),
+                ref.get("title", ""),
+                ref.get("coverDate", ""),
+                ref.get("pubname", ""),
+                _compress(highlights),
+            )
+            if row is None:
+                cur.execute(
+                    "INSERT INTO documents "
+                    "(gddid, doi, title, cover_date, pubname, highlights) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    values,
+                )
+                doc_id = cur.lastrowid
+            else:
+                doc_id = row[0]
+                cur.execute(
+                    "UPDATE documents SET doi = ?, title = ?, cover_date = ?, "
+                    "pubname = ?, highlights = ? WHERE id = ?",
+                    values[1:] + (doc_id,),
+                )
+            cur.execute(
+                "INSERT INTO highlight_fts(rowid, text) VALUES (?, ?)",
+                (doc_id, "\n".join(highlights)),
+            )
+
+        if harvest_date is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            harvest_date = now.strftime("%Y-%m-%d")
+        last = self.last_harvest()
+        if last is None or harvest_date > last:
+            cur.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_harvest', ?)",
+                (harvest_date,),
+            )
+        self.conn.commit()
+
+    def last_harvest(self):
+        """Get date of most recent harvest in index.
+
+        Returns
+        ----------
+        str
+            date formatted "YYYY-MM-DD", None if index is empty
+
+        """
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'last_harvest'"
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def max_acquired(self, term):
+        """Get newest date xDD acquired a document found by update of term.
+
+        Parameters
+        ----------
+        term: str
+            search term, e.g. "10.5066/F7K935KT"
+
+        Returns
+        ----------
+        str
+            date formatted "YYYY-MM-DD", None if term was never updated
+            or none of its documents reported an acquired date
+
+        """
+        row = self.conn.execute(
+            "SELECT max_acquired FROM watermarks WHERE term = ?", (term.upper(),)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def __len__(self):
+        """Count documents in index."""
+        return self.conn.execute("SELECT count(*) FROM documents").fetchone()[0]
+
+    def candidates(self, search_terms):
+        """Get indexed documents that may mention any search term.
+
+        Parameters
+        ----------
+        search_terms: list of str
+
+        Returns
+        ----------
+        response_data: list of dict
+            documents in SearchXdd response_data format
+
+        """
+        terms = [i for i in search_terms if i]
+        if self.trigram and all(len(i) >= 3 for i in terms):
+            query = " OR ".join(_fts_phrase(i) for i in terms)
+            sql = (
+                "SELECT d.gddid, d.doi, d.title, d.cover_date, d.pubname, "
+                "d.highlights FROM documents d JOIN ("
+                "SELECT rowid FROM highlight_fts WHERE highlight_fts MATCH ?"
+                ") f ON d.id = f.rowid"
+            )
+            rows = self.conn.execute(sql, (query,))
+        else:
+            # Tokens can not express substrings, check every document
+            rows = self.conn.execute(
+                "SELECT gddid, doi, title, cover_date, pubname, highlights "
+                "FROM documents"
+            )
+
+        response_data = []
+        for row in rows:
+            ref = {
+                "_gddid": row[0],
+                "title": row[2],
+                "coverDate": row[3],
+                "pubname": row[4],
+                "highlight": _decompress(row[5]),
+            }
+            if row[1]:
+                ref["doi"] = row[1]
+            response_data.append(ref)
+        return response_data
+
+    def search(self, search_terms, search_type="exact_match", is_doi=False):
+        """Get mentions of search terms from the local index.
+
+        Parameters
+        ----------
+        search_terms: list of str
+            terms to search, e.g. SearchXdd search_terms
+        search_type: str
+            - ``'exact_match'``: GetMentions.get_exact_mention.
+            - ``'usgs'``: GetMentions.get_usgs_doi_mentions.
+        is_doi: bool, default False
+            passed to GetMentions.get_exact_mention
+
+        Returns
+        ----------
+        mention: obj
+            xdd_search.GetMentions object containing mentions
+
+        """
+        mention = xdd_search.GetMentions(self.candidates(search_terms), search_terms)
+        if search_type == "exact_match":
+            mention.get_exact_mention(is_doi)
+        elif search_type == "usgs":
+            mention.get_usgs_doi_mentions()
+        return mention
+
+    def update(self, search_terms, params="full_results&clean&inclusive=True"):
+        """Add documents acquired by xDD since the last update of each term.
+
+        Each term is requested from its own max_acquired on, so
+        documents xDD acquired before a harvest but indexed later are
+        still found, and a term never updated before is crawled in full.
+        A term is also crawled in full while none of its documents
+        reported an xDD "acquired" date.  The watermark of a term only
+        advances when its search succeeds.
+
+        Parameters
+        ----------
+        search_terms: str
+            comma separated search terms, no spaces e.g. "10.5066,10.4344"
+        params: str
+            xDD query parameters, see SearchXdd.build_query_urls
+
+        Returns
+        ----------
+        searches: list of obj
+            SearchXdd object of each term containing search results and
+            messages
+
+        """
+        searches = []
+        for term in search_terms.split(","):
+            last = self.max_acquired(term)
+            search = xdd_search.SearchXdd(term)
+            if last is None:
+                search.build_query_urls(params=params)
+            else:
+                search.build_query_urls(params=f"{params}&min_acquired={last}")
+            search.get_data()
+            searches.append(search)
+            if search.response_status != "success":
+                continue
+            self.add_documents(search.response_data)
+            acquired = [
+                i["acquired"][:10] for i in search.response_data if i.get("acquired")
+            ]
+            if acquired and (last is None or max(acquired) > last):
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO watermarks (term, max_acquired) "
+                    "VALUES (?, ?)",
+                    (term.upper(), max(acquired)),
+                )
+                self.conn.commit()
+        return searches
+
+
+def _has_trigram(conn):
+    """Test if SQLite build supports the FTS5 trigram tokenizer."""
+    try:
+        conn.execute(
+            "CREATE VIRTUAL TABLE temp.trigram_test USING fts5(t, tokenize='trigram')"
+        )
+        conn.execute("DROP TABLE temp.trigram_test")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _fts_phrase(term):
+    """Quote term as an FTS5 phrase."""
+    term = term.replace('"', '""')
+    return f'"{term}"'
+
+
+def _compress(highlights):
+    """Compress list of highlights."""
+    return zlib.compress(json.dumps(highlights).encode("utf-8"))
+
+
+def _decompress(blob):
+    """Decompress list of highlights."""
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
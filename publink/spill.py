@@ -0,0 +1,192 @@
+"""List-like response buffers that spill to disk past a memory ceiling."""
+
+# Import packages
+import heapq
+import json
+import os
+import tempfile
+
+
+class SpillBuffer:
+    """Class accumulating records in memory and spilling them to disk."""
+
+    def __init__(self, max_records=100000, directory=None):
+        """Initialize spill buffer.
+
+        Records are held in memory until more than max_records are
+        buffered, then written to an append-only JSON lines segment
+        file.  Iterating the buffer streams spilled records from disk
+        followed by those still in memory, in the order they were added.
+
+        Parameters
+        ----------
+        max_records: int, default 100000
+            maximum records held in memory
+        directory: str, default None
+            directory of segment file, default is system temp directory
+
+        """
+        self.max_records = max_records
+        self.directory = directory
+        self.path = None
+        self.spilled = 0
+        self._memory = []
+        self._file = None
+
+    def append(self, record):
+        """Add record to buffer."""
+        self._memory.append(record)
+        if len(self._memory) > self.max_records:
+            self.spill()
+
+    def extend(self, records):
+        """Add records to buffer."""
+        for record in records:
+            self.append(record)
+
+    def spill(self):
+        """Write records held in memory to segment file."""
+        if not self._memory:
+            return
+        if self._file is None:
+            fd, self.path = tempfile.mkstemp(
+                suffix=".jsonl", prefix="publink_", dir=self.directory
+            )
+            self._file = os.fdopen(fd, "w", encoding="utf-8")
+        for record in self._memory:
+            self._file.write(json.dumps(record))
+            self._file.write("\n")
+        self._file.flush()
+        self.spilled += len(self._memory)
+        self._memory = []
+
+    def __iter__(self):
+        """Stream spilled records then records in memory."""
+        if self.path is not None:
+            with open(self.path, encoding="utf-8") as f:
+                for n, line in enumerate(f):
+                    if n >= self.spilled:
+                        break
+                    yield json.loads(line)
+        yield from list(self._memory)
+
+    def __len__(self):
+        """Count records in buffer."""
+        return self.spilled + len(self._memory)
+
+    def close(self):
+        """Remove segment file and clear buffer."""
+        if self._file is not None:
+            self._file.close()
+            os.remove(self.path)
+        self._file = None
+        self.path = None
+        self.spilled = 0
+        self._memory = []
+
+    def __del__(self):
+        """Remove segment file when buffer is garbage collected."""
+        try:
+            self.close()
+        except Exception:  # nosec
+            pass
+
+
+def response_buffer(max_records=None, directory=None):
+    """Get container for accumulating response data.
+
+    Parameters
+    ----------
+    max_records: int, default None
+        maximum records held in memory, None keeps all records in a list
+    directory: str, default None
+        directory of spill segment files
+
+    Returns
+    ----------
+    list or SpillBuffer
+
+    """
+    if max_records is None:
+        return []
+    return SpillBuffer(max_records, directory)
+
+
+def external_unique(keys, max_keys=1000000, directory=None, max_files=64):
+    """Get sorted unique keys using bounded memory.
+
+    Unique keys are collected in memory up to max_keys, then sorted and
+    written to a JSON lines run file.  Runs are merged with a k-way
+    merge, dropping duplicates across runs, so memory holds at most
+    max_keys keys plus one key per open run.  Runs beyond max_files are
+    first merged in groups of max_files into longer runs, so at most
+    max_files files are open at once.
+
+    Parameters
+    ----------
+    keys: iterable of tuple of str
+        e.g. (pub_doi, search_term) pairs
+    max_keys: int, default 1000000
+        maximum unique keys held in memory
+    directory: str, default None
+        directory of run files, default is system temp directory
+    max_files: int, default 64
+        maximum run files merged at once, at least 2
+
+    Returns
+    ----------
+    generator of tuple
+        unique keys in sorted order, run files are removed once the
+        generator is exhausted or closed
+
+    """
+    runs = []
+    try:
+        batch = set()
+        for key in keys:
+            batch.add(tuple(key))
+            if len(batch) >= max_keys:
+                runs.append(_write_run(sorted(batch), directory))
+                batch = set()
+        if not runs:
+            yield from sorted(batch)
+            return
+        if batch:
+            runs.append(_write_run(sorted(batch), directory))
+        batch = None
+        while len(runs) > max_files:
+            group, runs = runs[:max_files], runs[max_files:]
+            try:
+                runs.append(_write_run(_merge_runs(group), directory))
+            finally:
+                for path in group:
+                    os.remove(path)
+        yield from _merge_runs(runs)
+    finally:
+        for path in runs:
+            os.remove(path)
+
+
+def _merge_runs(paths):
+    """Merge sorted run files, dropping duplicate keys."""
+    files = [open(path, encoding="utf-8") for path in paths]
+    try:
+        streams = [(tuple(json.loads(line)) for line in f) for f in files]
+        last = None
+        for key in heapq.merge(*streams):
+            if key != last:
+                yield key
+                last = key
+    finally:
+        for f in files:
+            f.close()
+
+
+def _write_run(keys, directory=None):
+    """Write sorted keys to a run file and return its path."""
+    fd, path = tempfile.mkstemp(suffix=".jsonl", prefix="publink_run_", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for key in keys:
+            f.write(json.dumps(key))
+            f.write("\n")
+    return path
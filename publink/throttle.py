@@ -0,0 +1,311 @@
+"""Adaptive per host concurrency control for requests to upstream APIs."""
+
+# Import packages
+import collections
+import threading
+import time
+from urllib.parse import urlparse
+
+from publink import deadline as deadline_
+
+# Status codes signalling an overloaded upstream
+THROTTLE_STATUS = (429, 500, 502, 503, 504)
+
+# Default (connect, read) timeout in seconds of each request
+DEFAULT_TIMEOUT = (10, 120)
+
+# Longest wait in seconds honored from a Retry-After header
+MAX_RETRY_AFTER = 300
+
+
+class AdaptiveLimiter:
+    """Class limiting concurrent requests with AIMD control."""
+
+    def __init__(
+        self,
+        initial_limit=4,
+        min_limit=1,
+        max_limit=64,
+        decrease_factor=0.5,
+        latency_factor=3.0,
+        history_size=1000,
+    ):
+        """Initialize adaptive limiter.
+
+        The limit grows additively, by about one request per limit
+        healthy responses, and shrinks multiplicatively on throttling,
+        server errors or responses slower than latency_factor times the
+        smoothed baseline latency.  Congestion of requests started before
+        the last decrease is ignored, so a burst of failures counts once.
+
+        Parameters
+        ----------
+        initial_limit: int, default 4
+            concurrent requests allowed at start
+        min_limit: int, default 1
+        max_limit: int, default 64
+        decrease_factor: float, default 0.5
+            multiplier applied to the limit on congestion
+        latency_factor: float, default 3.0
+            responses slower than this multiple of baseline latency count
+            as congestion
+        history_size: int, default 1000
+            number of limit changes kept in self.history
+
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.baseline_latency = None
+        self.in_flight = 0
+        self.history = collections.deque(maxlen=history_size)
+        self._tickets = 0
+        self._decrease_ticket = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, deadline=None):
+        """Wait for a free request slot.
+
+        Parameters
+        ----------
+        deadline: obj, default None
+            deadline.Deadline, waiting stops when it passes or is
+            cancelled
+
+        Returns
+        ----------
+        ticket: int
+            pass to release when the request completes
+
+        Raises
+        ----------
+        deadline.DeadlineExceeded
+            deadline passed or was cancelled before a slot was free
+
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                deadline.check()
+                # Wake up periodically to notice cancellation
+                remaining = deadline.remaining()
+                self._cond.wait(1.0 if remaining is None else min(remaining, 1.0))
+            self.in_flight += 1
+            self._tickets += 1
+            return self._tickets
+
+    def release(self, ticket, status_code=None, latency=None):
+        """Free request slot and adapt limit to the response.
+
+        Parameters
+        ----------
+        ticket: int
+            returned by acquire
+        status_code: int, default None
+            response status code, None if the request failed to connect
+        latency: float, default None
+            response time in seconds
+
+        """
+        with self._cond:
+            self.in_flight -= 1
+            slow = (
+                latency is not None
+                and self.baseline_latency is not None
+                and latency > self.latency_factor * self.baseline_latency
+            )
+            congested = status_code is None or status_code in THROTTLE_STATUS or slow
+            if congested:
+                if ticket > self._decrease_ticket:
+                    reason = "slow" if slow else f"status {status_code}"
+                    self._set_limit(self.limit * self.decrease_factor, reason)
+                    self._decrease_ticket = self._tickets
+            else:
+                if latency is not None:
+                    if self.baseline_latency is None:
+                        self.baseline_latency = latency
+                    else:
+                        self.baseline_latency += 0.1 * (latency - self.baseline_latency)
+                self._set_limit(self.limit + 1 / int(self.limit), None)
+            self._cond.notify_all()
+
+    def cancel(self, ticket):
+        """Free request slot without adapting limit, e.g. invalid request.
+
+        Parameters
+        ----------
+        ticket: int
+            returned by acquire
+
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _set_limit(self, limit, reason):
+        """Set limit within bounds and record changes of whole slots."""
+        old = int(self.limit)
+        self.limit = min(self.max_limit, max(self.min_limit, limit))
+        if int(self.limit) != old:
+            self.history.append(
+                {
+                    "time": time.time(),
+                    "limit": int(self.limit),
+                    "reason": reason or "healthy",
+                }
+            )
+
+    def snapshot(self):
+        """Get current state for monitoring.
+
+        Returns
+        ----------
+        dict
+            limit, in flight requests, baseline latency and history
+
+        """
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "baseline_latency": self.baseline_latency,
+                "history": list(self.history),
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(host):
+    """Get shared limiter of an upstream host.
+
+    Parameters
+    ----------
+    host: str
+        host name, e.g. "geodeepdive.org"
+
+    Returns
+    ----------
+    AdaptiveLimiter
+
+    """
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveLimiter()
+        return _limiters[host]
+
+
+def limiter_snapshots():
+    """Get state of limiters of all hosts, see AdaptiveLimiter.snapshot."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {host: limiter.snapshot() for host, limiter in limiters.items()}
+
+
+def request(
+    method,
+    url,
+    retries=3,
+    backoff=1.0,
+    timeout=DEFAULT_TIMEOUT,
+    deadline=None,
+    **kwargs,
+):
+    """Send request through the limiter of the url's host.
+
+    Throttled (429) and server error (5xx) responses, connection errors
+    and timeouts are retried with exponential backoff, honoring
+    Retry-After up to MAX_RETRY_AFTER seconds.  Waiting for a request
+    slot honors deadline, the slot is freed whatever the request raises
+    and responses discarded for a retry are closed.
+
+    Parameters
+    ----------
+    method: str
+        "get" or "head"
+    url: str
+    retries: int, default 3
+        attempts after the first request
+    backoff: float, default 1.0
+        seconds waited before first retry, doubled for each retry
+    timeout: float or tuple, default DEFAULT_TIMEOUT
+        seconds or (connect, read) seconds of each attempt
+    deadline: obj, default None
+        deadline.Deadline, caps timeouts and backoff to the time left
+    kwargs:
+        passed to requests
+
+    Returns
+    ----------
+    requests.Response
+        last response, connection errors of the last attempt are raised
+
+    Raises
+    ----------
+    deadline.DeadlineExceeded
+        deadline passed or was cancelled before a request was sent,
+        including while waiting for a request slot
+    deadline.RequestTimeout
+        last attempt timed out
+
+    """
+    import requests
+
+    limiter = get_limiter(urlparse(url).netloc)
+    for attempt in range(retries + 1):
+        if deadline is not None:
+            deadline.check()
+        ticket = limiter.acquire(deadline)
+        if deadline is not None:
+            kwargs["timeout"] = deadline.cap(timeout)
+        else:
+            kwargs["timeout"] = timeout
+        start = time.monotonic()
+        r = None
+        error = None
+        try:
+            r = requests.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = e
+        finally:
+            if r is not None:
+                limiter.release(ticket, r.status_code, time.monotonic() - start)
+            elif error is not None:
+                limiter.release(ticket, None)
+            else:
+                # Invalid requests and interrupts say nothing about the host
+                limiter.cancel(ticket)
+        if error is not None:
+            if attempt == retries and isinstance(error, requests.exceptions.Timeout):
+                raise deadline_.RequestTimeout(f"Request timed out: {url}") from error
+            if attempt == retries:
+                raise error
+            _sleep(backoff * 2 ** attempt, deadline)
+            continue
+        if r.status_code not in THROTTLE_STATUS or attempt == retries:
+            return r
+        # Return pooled connection of streamed responses
+        r.close()
+        _sleep(_retry_after(r, backoff * 2 ** attempt), deadline)
+    return r
+
+
+def _sleep(seconds, deadline=None):
+    """Sleep no longer than the time left before deadline."""
+    if deadline is not None and deadline.remaining() is not None:
+        seconds = min(seconds, deadline.remaining())
+    time.sleep(seconds)
+
+
+def _retry_after(r, default):
+    """Get seconds to wait from Retry-After header, at most MAX_RETRY_AFTER."""
+    try:
+        seconds = float(r.headers.get("Retry-After", default))
+    except ValueError:
+        seconds = default
+    return min(MAX_RETRY_AFTER, max(0, seconds))
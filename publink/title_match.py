@@ -0,0 +1,116 @@
+"""Match dataset titles in xDD highlights allowing for variations."""
+
+# Import packages
+import collections
+import math
+import re
+
+from publink.xdd_search import clean_unicode
+
+
+class TitleIndex:
+    """Class indexing dataset titles for fuzzy matching in highlights."""
+
+    def __init__(self, titles, n=4, threshold=0.8, min_length=12):
+        """Build title index.
+
+        Titles and highlights are lower cased and stripped of whitespace
+        and punctuation, then split into character n-grams.  A title
+        matches a highlight when at least threshold of its n-grams occur
+        in the highlight, which tolerates casing, punctuation, line
+        breaks and truncated titles.
+
+        Only the rarest n-grams of each title are indexed, as many as a
+        match can miss plus one (prefix filtering), so a highlight is
+        compared to few candidate titles while no match is lost.
+
+        Parameters
+        ----------
+        titles: dict or list of str
+            titles keyed by id, e.g. dataset DOI, or list of titles used
+            as their own ids
+        n: int, default 4
+            n-gram length in characters
+        threshold: float, default 0.8
+            minimum fraction of title n-grams found in a highlight
+        min_length: int, default 12
+            titles with fewer normalized characters are not indexed, see
+            self.skipped
+
+        """
+        if not isinstance(titles, dict):
+            titles = {i: i for i in titles}
+        self.n = n
+        self.threshold = threshold
+        self.titles = {}
+        self.grams = {}
+        self.skipped = []
+        for title_id, title in titles.items():
+            if len(normalize(title)) < max(min_length, n):
+                self.skipped.append(title_id)
+                continue
+            self.titles[title_id] = title
+            self.grams[title_id] = ngrams(title, n)
+
+        frequency = collections.Counter(
+            g for grams in self.grams.values() for g in grams
+        )
+        self.index = collections.defaultdict(list)
+        for title_id, grams in self.grams.items():
+            rare = sorted(grams, key=lambda g: (frequency[g], g))
+            required = math.ceil(threshold * len(grams))
+            for g in rare[:len(grams) - required + 1]:
+                self.index[g].append(title_id)
+
+    def __len__(self):
+        """Count indexed titles."""
+        return len(self.titles)
+
+    def match(self, text):
+        """Find titles mentioned in text.
+
+        Parameters
+        ----------
+        text: str
+            e.g. xDD highlight
+
+        Returns
+        ----------
+        list of tuple
+            (title_id, score) sorted by descending score, score is the
+            fraction of title n-grams found in text
+
+        """
+        grams = ngrams(text, self.n)
+        candidates = set()
+        for g in grams:
+            candidates.update(self.index.get(g, ()))
+        matches = []
+        for title_id in candidates:
+            title_grams = self.grams[title_id]
+            score = len(title_grams & grams) / len(title_grams)
+            if score >= self.threshold:
+                matches.append((title_id, round(score, 3)))
+        return sorted(matches, key=lambda x: (-x[1], str(x[0])))
+
+
+def normalize(text):
+    """Lower case text and remove whitespace and punctuation."""
+    return re.sub(r"[\W_]+", "", clean_unicode(text.lower()))
+
+
+def ngrams(text, n=4):
+    """Get set of character n-grams of normalized text.
+
+    Parameters
+    ----------
+    text: str
+    n: int, default 4
+
+    Returns
+    ----------
+    frozenset of str
+
+    """
+    text = normalize(text)
+    return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
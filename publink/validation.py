@@ -0,0 +1,182 @@
+"""Pipelined DOI validation overlapping harvest and mention extraction."""
+
+# Import packages
+from publink import deadline as deadline_
+from publink import publink
+from publink import xdd_search
+
+
+class PipelinedValidator:
+    """Class resolving DOIs in the background as soon as they are seen."""
+
+    def __init__(self, doi_index=None, max_workers=20, deadline=None):
+        """Initialize validator.
+
+        Each DOI is resolved once per validator, so DOIs can be submitted
+        as mentions are extracted, while results are still harvested.
+        Collecting results then only waits for DOIs still in flight.
+
+        Parameters
+        ----------
+        doi_index: obj, default None
+            doi_index.DoiIndex of registered DOIs, DOIs in the index are
+            accepted without a request to doi.org
+        max_workers: int, default 20
+            concurrent requests to doi.org
+        deadline: float or obj, default None
+            time budget in seconds or a deadline.Deadline, DOIs not
+            checked before it runs out are timed out
+
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.doi_index = doi_index
+        self.deadline = deadline_.as_deadline(deadline)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.checks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Cancel queued checks and shut down worker threads."""
+        for check in self.checks.values():
+            if not isinstance(check, bool):
+                check.cancel()
+        self.executor.shutdown(wait=True)
+
+    def submit(self, doi):
+        """Queue DOI for resolution unless already seen.
+
+        Parameters
+        ----------
+        doi: str
+            example format, e.g. '10.5066/F79021VS'
+
+        """
+        if doi in self.checks:
+            return
+        if not doi:
+            self.checks[doi] = False
+        elif self.doi_index is not None and doi in self.doi_index:
+            self.checks[doi] = True
+        else:
+            self.checks[doi] = self.executor.submit(
+                publink.resolve_doi, doi, self.deadline
+            )
+
+    def submit_mentions(self, mentions):
+        """Queue pub DOI and search term of each mention, see submit.
+
+        Parameters
+        ----------
+        mentions: list of dict
+            e.g. xdd_search GetMentions.mentions
+
+        """
+        for mention in mentions:
+            self.submit(mention.get("pub_doi", ""))
+            self.submit(mention.get("search_term", ""))
+
+    def results(self, doi_list=None, return_timed_out=False):
+        """Wait for DOIs still in flight and split them by resolution.
+
+        Parameters
+        ----------
+        doi_list: list of str, default None
+            DOIs to report, submitted if not seen yet, default is all
+            submitted DOIs
+        return_timed_out: bool, default False
+            True also returns timed_out_dois
+
+        Returns
+        ----------
+        resolving_dois: list of strings
+            DOIs that did resolve
+        non_resolving_dois: list of strings
+            DOIs that did not resolve
+        timed_out_dois: list of strings
+            DOIs not checked before the deadline, only with
+            return_timed_out
+
+        """
+        if doi_list is None:
+            doi_list = list(self.checks)
+        unique_dois = list(dict.fromkeys(doi_list))
+        for doi in unique_dois:
+            self.submit(doi)
+        checks = {}
+        for doi in unique_dois:
+            check = self.checks[doi]
+            checks[doi] = check if isinstance(check, bool) else check.result()
+        return publink.split_checks(unique_dois, checks, return_timed_out)
+
+
+def xdd_related_identifiers(
+    search_terms,
+    search_type="exact_match",
+    is_doi=True,
+    doi_index=None,
+    max_workers=20,
+    deadline=None,
+    profile=None,
+):
+    """Harvest xDD, extract mentions and validate DOIs in one pipeline.
+
+    Mentions are extracted from each page as it arrives and their DOIs
+    are resolved in the background, so harvest, extraction and DOI
+    validation overlap.
+
+    Parameters
+    ----------
+    search_terms: str
+        comma separated search terms, no spaces e.g. "10.5066/F7K935KT"
+    search_type: str, default "exact_match"
+        see publink.xdd_mentions
+    is_doi: bool, default True
+        see publink.xdd_mentions
+    doi_index: obj, default None
+        doi_index.DoiIndex of registered DOIs, see PipelinedValidator
+    max_workers: int, default 20
+        concurrent requests to doi.org
+    deadline: float or obj, default None
+        time budget in seconds or a deadline.Deadline shared by harvest
+        and validation
+    profile: str, default None
+        xDD payload profile, e.g. search_type to request only the fields
+        its extraction reads (see xdd_search.query_params).  Default None
+        requests "full".
+
+    Returns
+    ----------
+    search: obj
+        xdd_search.SearchXdd object containing search results and messages
+    mentions: list of dict
+        mentions extracted from all pages
+    related_identifiers: list of dict
+        see publink.to_related_identifiers
+
+    """
+    deadline = deadline_.as_deadline(deadline)
+    mentions = []
+    with PipelinedValidator(doi_index, max_workers, deadline) as validator:
+
+        def on_page(page_data):
+            mention = publink.xdd_mentions(
+                page_data, search.input_terms, search_type, is_doi
+            )
+            mentions.extend(mention.mentions)
+            validator.submit_mentions(mention.mentions)
+
+        search = xdd_search.SearchXdd(search_terms)
+        search.set_deadline(deadline)
+        search.on_page = on_page
+        search.build_query_urls(params=xdd_search.query_params(profile or "full"))
+        search.get_data()
+        related_identifiers = publink.to_related_identifiers(
+            mentions, validator=validator
+        )
+    return search, mentions, related_identifiers
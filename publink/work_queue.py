@@ -0,0 +1,433 @@
+"""SQLite work queue distributing search tasks across worker processes."""
+
+# Import packages
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from publink import mention_store
+from publink import publink
+
+
+class WorkQueue:
+    """Class handing out search tasks to workers with expiring leases."""
+
+    def __init__(self, path, lease_seconds=900, max_attempts=3):
+        """Open or create a work queue.
+
+        Workers lease one task at a time.  A lease expires unless renewed,
+        so tasks of crashed workers are handed out again.  Tasks failing
+        max_attempts times are marked "failed".  The queue can live on a
+        shared filesystem supporting file locks, so workers on several
+        nodes can share it.
+
+        Parameters
+        ----------
+        path: str
+            path of SQLite database file
+        lease_seconds: float, default 900
+            seconds a lease is held without renewal
+        max_attempts: int, default 3
+            leases of a task before it is marked failed
+
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+            """
+        )
+
+    def close(self):
+        """Close database connection."""
+        self.conn.close()
+
+    def put(self, kind, payload, key=None):
+        """Add task, tasks with a key already queued are ignored.
+
+        Parameters
+        ----------
+        kind: str
+            task kind, e.g. "xdd" or "eventdata", see handle_task
+        payload: dict
+            json serializable task arguments
+        key: str, default None
+            unique task key, default is kind and payload
+
+        Returns
+        ----------
+        Bool
+            True if the task was added
+
+        """
+        payload = json.dumps(payload, sort_keys=True)
+        if key is None:
+            key = f"{kind}:{payload}"
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO tasks (key, kind, payload) VALUES (?, ?, ?)",
+            (key, kind, payload),
+        )
+        return cur.rowcount == 1
+
+    def put_many(self, kind, payloads):
+        """Add tasks in one transaction, see put.
+
+        Parameters
+        ----------
+        kind: str
+        payloads: iterable of dict
+
+        Returns
+        ----------
+        int
+            number of tasks added
+
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            added = sum(self.put(kind, i) for i in payloads)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def lease(self, worker):
+        """Lease next pending task or task with an expired lease.
+
+        Parameters
+        ----------
+        worker: str
+            worker id
+
+        Returns
+        ----------
+        task: dict
+            id, key, kind, payload and attempts, None if no task is
+            available
+
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "UPDATE tasks SET status = 'failed', "
+                "error = coalesce(error, 'Lease expired.') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                "SELECT id, key, kind, payload, attempts FROM tasks "
+                "WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE tasks SET status = 'leased', attempts = attempts + 1, "
+                    "worker = ?, lease_expires = ? WHERE id = ?",
+                    (worker, now + self.lease_seconds, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "key": row[1],
+            "kind": row[2],
+            "payload": json.loads(row[3]),
+            "attempts": row[4] + 1,
+        }
+
+    def renew(self, task_id, worker):
+        """Extend lease of a task held by worker.
+
+        Returns
+        ----------
+        Bool
+            False if the lease was lost to another worker
+
+        """
+        cur = self.conn.execute(
+            "UPDATE tasks SET lease_expires = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, task_id, worker),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, task_id, worker):
+        """Mark task held by worker as done."""
+        cur = self.conn.execute(
+            "UPDATE tasks SET status = 'done', lease_expires = NULL, error = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (task_id, worker),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, task_id, worker, error):
+        """Release task held by worker for retry, or mark it failed.
+
+        Parameters
+        ----------
+        task_id: int
+        worker: str
+        error: str
+            error message kept with the task
+
+        """
+        cur = self.conn.execute(
+            "UPDATE tasks SET lease_expires = NULL, error = ?, "
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (error, self.max_attempts, task_id, worker),
+        )
+        return cur.rowcount == 1
+
+    def retry_failed(self):
+        """Reset failed tasks to pending with no attempts."""
+        self.conn.execute(
+            "UPDATE tasks SET status = 'pending', attempts = 0 WHERE status = 'failed'"
+        )
+
+    def counts(self):
+        """Count tasks by status, e.g. {'pending': 10, 'done': 2}."""
+        rows = self.conn.execute("SELECT status, count(*) FROM tasks GROUP BY status")
+        return dict(rows)
+
+
+def enqueue_xdd(queue, search_terms, search_type="exact_match", is_doi=False):
+    """Add one xDD search task per search term.
+
+    Parameters
+    ----------
+    queue: obj
+        WorkQueue
+    search_terms: list of str
+    search_type: str, default "exact_match"
+        see publink.xdd_mentions
+    is_doi: bool, default False
+        see publink.xdd_mentions
+
+    Returns
+    ----------
+    int
+        number of tasks added
+
+    """
+    return queue.put_many(
+        "xdd",
+        (
+            {"search_term": i, "search_type": search_type, "is_doi": is_doi}
+            for i in search_terms
+        ),
+    )
+
+
+def enqueue_eventdata(queue, search_terms, search_type="doi", mailto="", windows=None):
+    """Add one eventdata search task per search term and date window.
+
+    Parameters
+    ----------
+    queue: obj
+        WorkQueue
+    search_terms: list of str
+        DOIs or DOI prefixes
+    search_type: str, default "doi"
+        see publink.search_eventdata
+    mailto: str
+        email contact, requested by crossref
+    windows: list of tuple, default None
+        ("YYYY-MM-DD", "YYYY-MM-DD") occurred date windows, e.g. from
+        sharding.plan_windows, None searches all dates
+
+    Returns
+    ----------
+    int
+        number of tasks added
+
+    """
+    windows = windows or [None]
+    return queue.put_many(
+        "eventdata",
+        (
+            {
+                "search_term": term,
+                "search_type": search_type,
+                "mailto": mailto,
+                "window": window,
+            }
+            for term in search_terms
+            for window in windows
+        ),
+    )
+
+
+def handle_task(task, store):
+    """Run search task and upsert its mentions into a mention store.
+
+    Upserts are idempotent, so tasks retried after a lost lease or
+    failure do not duplicate results.
+
+    Parameters
+    ----------
+    task: dict
+        leased task, see WorkQueue.lease
+    store: obj
+        mention_store.MentionStore
+
+    Raises
+    ----------
+    RuntimeError
+        search failed or timed out, the task is retried
+
+    """
+    payload = task["payload"]
+    if task["kind"] == "xdd":
+        search = publink.search_xdd(payload["search_term"])
+        _check(search)
+        publink.xdd_mentions(
+            search.response_data,
+            search.input_terms,
+            payload["search_type"],
+            payload["is_doi"],
+            store=store,
+        )
+    elif task["kind"] == "eventdata":
+        from publink import eventdata
+
+        search = eventdata.SearchEventdata(
+            payload["search_term"],
+            payload["search_type"],
+            payload["mailto"],
+            relation_type="references",
+            projected=True,
+        )
+        if payload["window"] is not None:
+            search.set_date_window(*payload["window"])
+        search.build_query_url()
+        search.get_data()
+        _check(search)
+        publink.eventdata_mentions(search.response_data, store=store)
+    else:
+        raise ValueError(f"Unknown task kind: {task['kind']}")
+
+
+def _check(search):
+    """Raise RuntimeError if search failed or timed out."""
+    if search.response_status in ("error", "timeout"):
+        raise RuntimeError(search.response_message)
+
+
+def run_worker(
+    queue_path,
+    store_path,
+    worker=None,
+    max_tasks=None,
+    handler=handle_task,
+    lease_seconds=900,
+):
+    """Lease and run tasks until the queue has no available tasks.
+
+    Start any number of workers on machines sharing queue_path and
+    store_path.  Leases are renewed in the background while a task runs.
+
+    Parameters
+    ----------
+    queue_path: str
+        path of WorkQueue database
+    store_path: str
+        path of mention_store.MentionStore database receiving results
+    worker: str, default None
+        worker id, default is host name and process id
+    max_tasks: int, default None
+        stop after this many tasks
+    handler: function, default handle_task
+        called with task and store, raising marks the attempt failed
+    lease_seconds: float, default 900
+        seconds a lease is held without renewal, see WorkQueue
+
+    Returns
+    ----------
+    dict
+        number of tasks "done" and of "failed" attempts by this worker,
+        and of tasks "lost" because their lease expired and the result
+        was not recorded
+
+    """
+    if worker is None:
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(queue_path, lease_seconds)
+    store = mention_store.MentionStore(store_path)
+    stats = {"done": 0, "failed": 0, "lost": 0}
+    try:
+        while max_tasks is None or sum(stats.values()) < max_tasks:
+            task = queue.lease(worker)
+            if task is None:
+                break
+            heartbeat = _Heartbeat(queue, task["id"], worker)
+            heartbeat.start()
+            try:
+                handler(task, store)
+            except Exception as e:
+                heartbeat.stop()
+                if queue.fail(task["id"], worker, f"{type(e).__name__}: {e}"):
+                    stats["failed"] += 1
+                else:
+                    stats["lost"] += 1
+            else:
+                heartbeat.stop()
+                if queue.complete(task["id"], worker):
+                    stats["done"] += 1
+                else:
+                    stats["lost"] += 1
+    finally:
+        queue.close()
+        store.close()
+    return stats
+
+
+class _Heartbeat(threading.Thread):
+    """Thread renewing a task lease until stopped."""
+
+    def __init__(self, queue, task_id, worker):
+        super().__init__(daemon=True)
+        self.queue_path = queue.path
+        self.lease_seconds = queue.lease_seconds
+        self.task_id = task_id
+        self.worker = worker
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # SQLite connections are not shared across threads
+        queue = WorkQueue(self.queue_path, self.lease_seconds)
+        try:
+            while not self._stop_event.wait(queue.lease_seconds / 3):
+                if not queue.renew(self.task_id, self.worker):
+                    break
+        finally:
+            queue.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
@@ -2,16 +2,49 @@
 
 # Import packages
 import re
-import bs4
-import requests
 
-from publink import publink
+from publink import deadline
+from publink import sharding
+from publink import spill
+from publink import throttle
+from publink.formatting import doi_formatting
+
+# xDD document fields read by each GetMentions extraction mode
+EXTRACTION_FIELDS = {
+    "exact_match": ["_gddid", "doi", "title", "coverDate", "pubname", "highlight"],
+    "tolerant": ["_gddid", "doi", "title", "coverDate", "pubname", "highlight"],
+    "title": ["_gddid", "doi", "title", "coverDate", "pubname", "highlight"],
+    "usgs": ["_gddid", "doi", "highlight"],
+    "doi_pattern": ["_gddid", "doi", "title", "coverDate", "pubname", "highlight"],
+}
+
+# xDD query parameters of each payload profile, see query_params
+PROFILES = {
+    "full": {"fields": None, "fragment_limit": None},
+    "mentions": {
+        "fields": ",".join(EXTRACTION_FIELDS["exact_match"]),
+        "fragment_limit": None,
+    },
+    "dois": {"fields": ",".join(EXTRACTION_FIELDS["usgs"]), "fragment_limit": None},
+    "hits": {"fields": "_gddid,highlight", "fragment_limit": 1},
+}
+
+# Payload profile holding the fields of each GetMentions extraction mode
+EXTRACTION_PROFILES = {
+    "exact_match": "mentions",
+    "tolerant": "mentions",
+    "title": "mentions",
+    "usgs": "dois",
+    "doi_pattern": "mentions",
+}
 
 
 class SearchXdd:
     """Class allowing for searching of xDD publication database."""
 
-    def __init__(self, search_terms="10.5066", route="snippets"):
+    def __init__(
+        self, search_terms="10.5066", route="snippets", max_records=None, spill_dir=None
+    ):
         """Initialize search pubs object.
 
         Parameters
@@ -20,21 +53,54 @@ class SearchXdd:
             comma separated search terms, no spaces e.g. "10.5066,10.4344"
         route: str, default "snippets"
             available routes described at https://geodeepdive.org/api
+        max_records: int, default None
+            maximum response records held in memory, past this records
+            spill to disk (see spill.SpillBuffer).  None holds all in memory.
+        spill_dir: str, default None
+            directory of spill files, default is system temp directory
 
         Notes
         ----------
-        Search terms not available for all routes in xDD
+        Search terms not available for all routes in xDD.  Set
+        self.on_page to a function to process each page of records as it
+        arrives, e.g. to extract mentions while harvesting.
 
         """
         self.xdd_api_base = "https://geodeepdive.org/api"
         self.search_terms = search_terms.split(",")
+        self.input_terms = list(self.search_terms)
         self.route = route
-        self.response_data = []
+        self.response_data = spill.response_buffer(max_records, spill_dir)
         self.search_urls = []
         self.next_url = ""
         self.response_hits = 0
         self.response_status = "error"
         self.response_message = "No request made."
+        self.confirmed = []
+        self.params = None
+        self.response_bytes = 0
+        self.request_count = 0
+        self.bytes_saved = None
+        self.on_page = None
+        self.timeout = throttle.DEFAULT_TIMEOUT
+        self.deadline = None
+        self._mention_patterns = None
+
+    def set_deadline(self, seconds):
+        """Set time budget of the search.
+
+        When the budget runs out, or the deadline is cancelled, the
+        search stops, keeps results collected so far and sets
+        response_status to "timeout".
+
+        Parameters
+        ----------
+        seconds: float or obj
+            seconds from now or a deadline.Deadline shared with other
+            searches
+
+        """
+        self.deadline = deadline.as_deadline(seconds)
 
     def all_search_terms(self):
         """Create list of search terms each with space at each position.
@@ -54,23 +120,81 @@ class SearchXdd:
                 search terms = ["fun", "f un", "fu n"]
 
         """
+        new_terms = []
         for term in self.search_terms:
             len_term = len(term)
-            new_terms = []
             for i in range(1, len_term):
                 new_term = f"{term[:i]} {term[i:]}"
                 new_terms.append(new_term)
         self.search_terms.extend(new_terms)
 
+    def anchor_search_terms(self, n_leading=None, min_tail=5):
+        """Add a head and a tail anchor term per search term.
+
+        Each term is queried as is and cut into a head and a tail, for
+        DOIs the head is the prefix plus the first half of the suffix.
+        The cut moves left so the tail keeps min_tail characters, as a
+        short tail, e.g. "UFRH", is found in many unrelated documents.
+        A single line or page break leaves at least one of the two
+        anchors intact, so 3 queries per term replace the len(term)
+        queries of all_search_terms.  A term too short for a specific
+        head, at least the prefix and 3 characters of a DOI, and tail is
+        searched with space iterations instead, see all_search_terms.
+        Use GetMentions.get_tolerant_mention with self.input_terms to
+        confirm mentions in returned highlights.
+
+        Parameters
+        ----------
+        n_leading: int, default None
+            characters of DOI suffix included in head anchor, default is
+            half the suffix rounded up
+        min_tail: int, default 5
+            minimum characters of tail anchor
+
+        Results
+        ----------
+        self.search_terms: list
+            Example:
+                initial search term = ["10.5066/P9LYUFRH"]
+                search terms = ["10.5066/P9LYUFRH", "10.5066/P9L", "YUFRH"]
+
+        """
+        new_terms = []
+        for term in self.search_terms:
+            if "/" in term:
+                slash = term.index("/") + 1
+                min_cut = slash + 3
+                if n_leading is None:
+                    cut = slash + (len(term) - slash + 1) // 2
+                else:
+                    cut = slash + n_leading
+            else:
+                min_cut = min_tail
+                cut = len(term) // 2
+            cut = min(cut, len(term) - min_tail)
+            if cut < min_cut:
+                terms = [term]
+                terms.extend(f"{term[:i]} {term[i:]}" for i in range(1, len(term)))
+            else:
+                terms = [term, term[:cut], term[cut:]]
+            new_terms.extend([i for i in terms if i not in new_terms])
+        self.search_terms = new_terms
+
     def build_query_urls(self, params="full_results&clean&inclusive"):
         """Build xDD query urls to search user defined terms.
 
+        Parameters
+        ----------
+        params: str
+            xDD query parameters, e.g. from query_params
+
         Results
         ----------
         self.search_urls: list of strings
             List of urls to query.
 
         """
+        self.params = params
         for search_term in self.search_terms:
             api_route = f"{self.xdd_api_base}/{self.route}"
             search_term = search_term.replace(" ", "%20")
@@ -78,24 +202,80 @@ class SearchXdd:
             url = f"{api_route}{q}"
             self.search_urls.append(url)
 
-    def get_data(self):
-        """Get data from xDD for all search terms."""
+    def get_data(self, hits_only=False, limit=None, confirm=None):
+        """Get data from xDD for all search terms.
+
+        Parameters
+        ----------
+        hits_only: bool, default False
+            True requests only the first page of each query, response_hits
+            is the sum of hits reported by xDD for all queries
+        limit: int, default None
+            stop paging and skip remaining queries once limit documents
+            are confirmed to mention a search term, e.g. 1 tests if a term
+            is mentioned at all.  Confirmed xDD ids are kept in
+            self.confirmed in the order found.
+        confirm: function, default None
+            function(doc) testing if an xDD document is a mention,
+            default is is_mention
+
+        """
+        if confirm is None:
+            confirm = self.is_mention
+        max_pages = 1 if hits_only else None
         for url in self.search_urls:
             self.next_url = url
-            self.query_xdd()
+            self.query_xdd(max_pages, limit, confirm)
+            if self.response_status == "timeout":
+                break
+            if limit is not None and len(self.confirmed) >= limit:
+                break
 
-    def query_xdd(self):
-        """Query xDD for results for specific query."""
+    def query_xdd(self, max_pages=None, limit=None, confirm=None):
+        """Query xDD for results for specific query.
+
+        Parameters
+        ----------
+        max_pages: int, default None
+            maximum pages requested, None follows every next page
+        limit: int, default None
+            stop paging once limit documents are confirmed, see get_data
+        confirm: function, default None
+            function(doc) testing if an xDD document is a mention
+
+        """
+        pages = 0
+        response_hits = 0
         while self.next_url != "":
-            r = requests.get(self.next_url)
+            self.request_count += 1
+            try:
+                r = throttle.request(
+                    "get", self.next_url, timeout=self.timeout, deadline=self.deadline
+                )
+            except deadline.DeadlineExceeded as e:
+                # Keep hits of pages already added to response_data
+                self.response_hits += response_hits
+                self.response_status = "timeout"
+                self.response_message = f"{e} Results are partial."
+                return
+            self.response_bytes += len(r.content)
             if r.status_code == 200 and "success" in r.json():
                 json_response = r.json()
                 response_hits = json_response["success"]["hits"]
                 page_data = json_response["success"]["data"]
                 self.response_data.extend(page_data)
+                if self.on_page is not None:
+                    self.on_page(page_data)
                 self.next_url = json_response["success"]["next_page"]
                 self.response_status = "success"
                 self.response_message = "Successful response."
+                pages += 1
+                if limit is not None:
+                    self.confirm_page(page_data, confirm or self.is_mention)
+                    if len(self.confirmed) >= limit:
+                        self.next_url = ""
+                if max_pages is not None and pages >= max_pages:
+                    self.next_url = ""
             else:
                 self.next_url = ""
                 if r.status_code == 200 and "success" not in r.json():
@@ -115,6 +295,266 @@ class SearchXdd:
         if self.response_status == "success":
             self.response_hits += response_hits
 
+    def confirm_page(self, page_data, confirm):
+        """Add ids of documents confirmed as mentions to self.confirmed."""
+        for doc in page_data:
+            if doc["_gddid"] not in self.confirmed and confirm(doc):
+                self.confirmed.append(doc["_gddid"])
+
+    def is_mention(self, doc):
+        """Test if xDD document mentions an input term.
+
+        Highlights are cleaned of html and matched allowing for breaks
+        within terms, see GetMentions.get_tolerant_mention, so documents found by space
+        variant or anchor queries are confirmed against the input terms.
+
+        Parameters
+        ----------
+        doc: dict
+            xDD document with highlights
+
+        Returns
+        ----------
+        Bool
+
+        """
+        if self._mention_patterns is None:
+            self._mention_patterns = [
+                re.compile(tolerant_pattern(i.upper())) for i in self.input_terms
+            ]
+        for hl in doc.get("highlight", []):
+            hl = clean_highlight(hl, [])
+            if any(p.search(hl) for p in self._mention_patterns):
+                return True
+        return False
+
+    def measure_savings(self, baseline="full"):
+        """Estimate bytes saved by the query parameters of this search.
+
+        The first page of the first query is requested with self.params
+        and with the baseline profile, the size difference is
+        extrapolated to self.response_bytes.
+
+        Parameters
+        ----------
+        baseline: str, default "full"
+            payload profile compared to, see query_params
+
+        Returns
+        ----------
+        self.bytes_saved: int
+            estimated bytes not transferred, None if a request failed
+
+        """
+        if not self.search_urls or self.params is None:
+            return None
+        url = self.search_urls[0]
+        baseline_url = url.replace(self.params, query_params(baseline))
+        sizes = []
+        for i in [url, baseline_url]:
+            try:
+                r = throttle.request(
+                    "get", i, timeout=self.timeout, deadline=self.deadline
+                )
+            except deadline.DeadlineExceeded:
+                return None
+            if r.status_code != 200:
+                return None
+            sizes.append(len(r.content))
+        page_bytes, baseline_bytes = sizes
+        if page_bytes == 0:
+            return None
+        saved_fraction = (baseline_bytes - page_bytes) / page_bytes
+        self.bytes_saved = int(self.response_bytes * saved_fraction)
+        return self.bytes_saved
+
+    def probe_hits(self, url):
+        """Get number of hits reported on first page of a query.
+
+        Parameters
+        ----------
+        url: str
+            xDD query url
+
+        Returns
+        ----------
+        int
+            hits reported by xDD, 0 if no data, None if request failed
+            or timed out
+
+        """
+        try:
+            r = throttle.request(
+                "get", url, timeout=self.timeout, deadline=self.deadline
+            )
+        except deadline.DeadlineExceeded:
+            return None
+        if r.status_code != 200:
+            return None
+        json_response = r.json()
+        if "success" not in json_response:
+            return 0
+        return json_response["success"]["hits"]
+
+
+class ShardedSearchXdd(SearchXdd):
+    """Class crawling xDD queries in concurrent date window shards."""
+
+    def __init__(
+        self,
+        search_terms="10.5066",
+        route="snippets",
+        start_date="1900-01-01",
+        end_date=None,
+        date_field="published",
+        max_shard_hits=2000,
+        max_workers=8,
+        max_records=None,
+        spill_dir=None,
+    ):
+        """Initialize sharded search pubs object.
+
+        Each query url is split into disjoint date windows using the
+        API's min/max date filters.  Windows with more than
+        max_shard_hits hits on a probe of their first page are halved
+        until small enough or one day long, then all windows are crawled
+        concurrently and documents are deduplicated by _gddid.
+
+        Parameters
+        ----------
+        search_terms: str, default is USGS DOI prefix "10.5066"
+            comma separated search terms, no spaces e.g. "10.5066,10.4344"
+        route: str, default "snippets"
+            available routes described at https://geodeepdive.org/api
+        start_date: str, default "1900-01-01"
+            first day crawled formatted "YYYY-MM-DD"
+        end_date: str, default None
+            last day crawled formatted "YYYY-MM-DD", default is today (UTC)
+        date_field: str, default "published"
+            - ``'published'``: filter on publication date.
+            - ``'acquired'``: filter on date xDD acquired the document.
+        max_shard_hits: int, default 2000
+            windows with more hits are subdivided
+        max_workers: int, default 8
+            number of concurrent requests
+        max_records: int, default None
+            maximum response records held in memory, see SearchXdd
+        spill_dir: str, default None
+            directory of spill files
+
+        """
+        super().__init__(search_terms, route, max_records, spill_dir)
+        self.start_date = start_date
+        self.end_date = sharding.today() if end_date is None else end_date
+        self.date_field = date_field
+        self.max_shard_hits = max_shard_hits
+        self.max_workers = max_workers
+        self.max_records = max_records
+        self.spill_dir = spill_dir
+        self.shards = []
+        self.searches = []
+        self.response_documents = 0
+
+    def window_url(self, url, window):
+        """Add date window filter to query url."""
+        field = self.date_field
+        return f"{url}&min_{field}={window[0]}&max_{field}={window[1]}"
+
+    def plan_shards(self):
+        """Split each query url into date windows using hit probes.
+
+        Returns
+        ----------
+        self.shards: list of dict
+            windows per url, e.g.
+            [{'url': url, 'from': '1900-01-01', 'until': '2009-12-31',
+              'hits': 1200}]
+
+        """
+        self.shards = []
+        for url in self.search_urls:
+            windows = sharding.plan_windows(
+                self.start_date,
+                self.end_date,
+                lambda w, url=url: self.probe_hits(self.window_url(url, w)),
+                self.max_shard_hits,
+                self.max_workers,
+            )
+            self.shards.extend(dict(i, url=url) for i in windows)
+
+    def get_data(self):
+        """Crawl all shards concurrently and deduplicate documents by _gddid.
+
+        Documents of each shard are streamed into self.response_data,
+        spilling to disk past max_records, and the shard's buffer is then
+        released.  A document found again by another query is added again
+        with only the highlights not seen before, or skipped if there are
+        none, so memory holds ids and highlight hashes, not documents.
+
+        Like SearchXdd, self.response_hits sums hits reported by xDD for
+        each query, here over all shards.  self.response_documents
+        counts unique documents.
+
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if not self.shards:
+            self.plan_shards()
+        self.searches = []
+        for shard in self.shards:
+            search = SearchXdd(
+                "", self.route, max_records=self.max_records, spill_dir=self.spill_dir
+            )
+            search.timeout = self.timeout
+            search.deadline = self.deadline
+            search.search_urls = [
+                self.window_url(shard["url"], (shard["from"], shard["until"]))
+            ]
+            self.searches.append(search)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda s: s.get_data(), self.searches))
+
+        seen = {}
+        for search in self.searches:
+            for ref in search.response_data:
+                highlights = seen.get(ref["_gddid"])
+                if highlights is None:
+                    highlights = seen[ref["_gddid"]] = set()
+                    new = ref["highlight"]
+                else:
+                    new = [i for i in ref["highlight"] if hash(i) not in highlights]
+                    if not new:
+                        continue
+                    ref = dict(ref, highlight=new)
+                highlights.update(hash(i) for i in new)
+                self.response_data.append(ref)
+            if hasattr(search.response_data, "close"):
+                search.response_data.close()
+            search.response_data = []
+        self.response_hits = sum(i.response_hits for i in self.searches)
+        self.response_documents = len(seen)
+
+        failed = [i for i in self.searches if i.response_status == "error"]
+        timed_out = [i for i in self.searches if i.response_status == "timeout"]
+        if timed_out:
+            self.response_status = "timeout"
+            self.response_message = (
+                f"{len(timed_out)} of {len(self.searches)} shards timed out. "
+                "Results are partial."
+            )
+        elif self.searches and len(failed) == len(self.searches):
+            self.response_status = "error"
+            self.response_message = "All requests failed."
+        elif failed:
+            self.response_status = "partial"
+            self.response_message = f"{len(failed)} of {len(self.searches)} shards failed."
+        elif self.searches:
+            self.response_status = "success"
+            self.response_message = "Successful response."
+        else:
+            self.response_status = "no data"
+            self.response_message = "Request returned no data."
+
 
 class GetMentions:
     """Class extracting term mentions from xDD snippets."""
@@ -133,6 +573,24 @@ class GetMentions:
         self.search_terms = [i.upper() for i in search_terms]
         self.response_data = xdd_response
 
+    def save(self, store, harvest_date=None):
+        """Write mentions to a mention store.
+
+        Parameters
+        ----------
+        store: obj
+            mention_store.MentionStore
+        harvest_date: str, default None
+            date of harvest formatted "YYYY-MM-DD", default is today (UTC)
+
+        Returns
+        ----------
+        int
+            number of mentions written
+
+        """
+        return store.upsert_mentions(self.mentions, harvest_date)
+
     def get_exact_mention(self, is_doi=False):
         """Get publications from xDD that contain mentions of search terms.
 
@@ -172,7 +630,7 @@ class GetMentions:
                             "pub_title": pub_title,
                             "pub_date":  pub_date,
                             "pub_journal": pub_journal,
-                            "search_term": publink.doi_formatting(i),
+                            "search_term": doi_formatting(i),
                             "highlight": hl,
                         }
                         for i in self.search_terms
@@ -196,6 +654,126 @@ class GetMentions:
                 if len(related) > 0:
                     self.mentions.extend(related)
 
+    def get_tolerant_mention(self, is_doi=False):
+        """Get mentions of search terms allowing for breaks within terms.
+
+        Matches search terms in highlights while tolerating whitespace and
+        hyphenation ("-" followed by whitespace) between any two
+        characters, recovering terms split by line or page breaks.
+        Highlights are cleaned of html like clean_highlight.
+
+        Returns
+        ----------
+        self.mentions: list of dict
+            same format as get_exact_mention
+
+        """
+        patterns = [
+            (term, re.compile(tolerant_pattern(term))) for term in self.search_terms
+        ]
+        self.mentions = []
+        for ref in self.response_data:
+            xdd_id = ref["_gddid"]
+            pub_doi = get_pub_doi(ref)
+
+            for hl in ref["highlight"]:
+                hl = clean_highlight(hl, [])
+                for term, pattern in patterns:
+                    if pattern.search(hl) is None:
+                        continue
+                    search_term = doi_formatting(term) if is_doi else term
+                    self.mentions.append(
+                        {
+                            "xdd_id": xdd_id,
+                            "pub_doi": pub_doi,
+                            "pub_title": ref.get("title", ""),
+                            "pub_date": ref.get("coverDate", ""),
+                            "pub_journal": ref.get("pubname", ""),
+                            "search_term": search_term,
+                            "highlight": hl,
+                        }
+                    )
+
+    def get_doi_mentions(self, extractor):
+        """Pair publications with DOIs of all prefixes registered in extractor.
+
+        Each cleaned highlight is scanned once for every registered prefix,
+        see doi_extractor.DoiExtractor.
+
+        Parameters
+        ----------
+        extractor: obj
+            doi_extractor.DoiExtractor
+
+        Returns
+        ----------
+        self.mentions: list of dict
+            includes publication xDD id, publication DOI, search term,
+            prefix, certainty and highlight
+            e.g. [{'xdd_id':'5d41e5e40b45c76cafa2778c',
+                   'pub_doi': '10.3133/OFR20191040',
+                   'search_term': '10.5066/P9LYUFRH',
+                   'prefix': '10.5066',
+                   'certainty': 'most certain',
+                   'highlight': 'str that ref usgs doi 10.5066/P9LYUFRH'
+                   }]
+
+        """
+        self.mentions = []
+        for ref in self.response_data:
+            xdd_id = ref["_gddid"]
+            pub_doi = get_pub_doi(ref)
+
+            for hl in ref["highlight"]:
+                hl = clean_highlight(hl, [])
+                for doi, certainty, prefix in set(extractor.extract(hl)):
+                    self.mentions.append(
+                        {
+                            "xdd_id": xdd_id,
+                            "pub_doi": pub_doi,
+                            "search_term": doi,
+                            "prefix": prefix,
+                            "certainty": certainty,
+                            "highlight": hl,
+                        }
+                    )
+
+    def get_title_mentions(self, title_index):
+        """Get mentions of dataset titles allowing for variations.
+
+        Parameters
+        ----------
+        title_index: obj
+            title_match.TitleIndex of dataset titles
+
+        Returns
+        ----------
+        self.mentions: list of dict
+            same format as get_exact_mention with search_term set to the
+            title id and a "score", the fraction of title n-grams found
+
+        """
+        self.mentions = []
+        for ref in self.response_data:
+            xdd_id = ref["_gddid"]
+            pub_doi = get_pub_doi(ref)
+
+            for hl in ref["highlight"]:
+                hl = clean_highlight(hl, [])
+                for title_id, score in title_index.match(hl):
+                    self.mentions.append(
+                        {
+                            "xdd_id": xdd_id,
+                            "pub_doi": pub_doi,
+                            "pub_title": ref.get("title", ""),
+                            "pub_date": ref.get("coverDate", ""),
+                            "pub_journal": ref.get("pubname", ""),
+                            "search_term": title_id,
+                            "score": score,
+                            "highlight": hl,
+                        }
+                    )
+
     def get_usgs_doi_mentions(self):
         """Pair publication with match of USGS data DOI.
 
@@ -243,6 +821,46 @@ class GetMentions:
                         self.mentions.append(related)
 
 
+def query_params(profile="full", fragment_limit=None, per_page=None):
+    """Get xDD query parameters requesting only what is needed.
+
+    Parameters
+    ----------
+    profile: str, default "full"
+        - ``'full'``: all metadata and highlights.
+        - ``'mentions'``: metadata and highlights read by
+        GetMentions.get_exact_mention, get_tolerant_mention,
+        get_title_mentions and get_doi_mentions.
+        - ``'dois'``: ids, DOIs and highlights read by
+        GetMentions.get_usgs_doi_mentions.
+        - ``'hits'``: ids and one highlight, e.g. for hits only
+        searches.  Not for searches with a limit, as documents are
+        confirmed against their highlights (see SearchXdd.is_mention).
+        - a GetMentions search type, e.g. ``'usgs'``, uses the profile
+        its extraction needs, see EXTRACTION_PROFILES.
+    fragment_limit: int, default None
+        maximum highlights per document, default of the profile
+    per_page: int, default None
+        documents per page, None uses xDD default
+
+    Returns
+    ----------
+    str
+        e.g. "full_results&clean&inclusive=True&fields=_gddid,doi,highlight"
+
+    """
+    profile = PROFILES[EXTRACTION_PROFILES.get(profile, profile)]
+    params = "full_results&clean&inclusive=True"
+    if profile["fields"] is not None:
+        params = f"{params}&fields={profile['fields']}"
+    fragment_limit = fragment_limit or profile["fragment_limit"]
+    if fragment_limit is not None:
+        params = f"{params}&fragment_limit={fragment_limit}"
+    if per_page is not None:
+        params = f"{params}&per_page={per_page}"
+    return params
+
+
 def clean_highlight(highlight_txt, search_terms, usgs_prefix="10.5066"):
     """Clean xDD highlight text.
 
@@ -259,6 +877,8 @@ def clean_highlight(highlight_txt, search_terms, usgs_prefix="10.5066"):
     hl_clean: str
 
     """
+    import bs4
+
     highlight_txt = highlight_txt.upper()
     hl_nohtml = bs4.BeautifulSoup(highlight_txt, features="html.parser").get_text()
     hl_clean = clean_unicode(hl_nohtml)
@@ -322,6 +942,25 @@ def extract_usgs_doi(hl_words, mention, usgs_prefix="10.5066"):
     return doi, doi_certainty
 
 
+def tolerant_pattern(term):
+    """Build regex matching term with breaks between characters.
+
+    Parameters
+    ----------
+    term: str
+        upper case search term
+
+    Returns
+    ----------
+    str
+        regex allowing whitespace, or a hyphen followed by whitespace,
+        between each character of term
+
+    """
+    chars = [re.escape(i) for i in term.replace(" ", "")]
+    return r"(?:-?\s+)?".join(chars)
+
+
 def clean_unicode(full_txt):
     """Deal with some escaped unicode issues.
 
@@ -347,7 +986,7 @@ def get_pub_doi(ref):
     ref: dict
 
     """
-    pub_doi = publink.doi_formatting(
+    pub_doi = doi_formatting(
         ref['doi']
     ) if "doi" in ref.keys() and ref["doi"] != "" else ""
 
@@ -36,6 +36,7 @@ setup(
     ],
     description="Process to help link publications to data using DOIs.",
     install_requires=requirements,
+    extras_require={"async": ["aiohttp>=3.6"]},
     long_description=readme,
     include_package_data=True,
     keywords="publink",
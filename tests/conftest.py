@@ -0,0 +1,65 @@
+"""Shared fixtures of publink tests."""
+
+import json
+
+import pytest
+
+from publink import throttle
+
+
+class FakeResponse:
+    """Minimal stand in for requests.Response."""
+
+    def __init__(self, body=None, status_code=200, headers=None, content=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {}
+        if content is None:
+            content = json.dumps(body).encode("utf-8")
+        self.content = content
+        self.closed = False
+
+    def json(self):
+        return self.body
+
+    def close(self):
+        self.closed = True
+
+
+class FakeApi:
+    """Answer requests offline and record them.
+
+    Each request is answered by respond, a function of the url or a list
+    answered in order.  Answers are a FakeResponse, a response body sent
+    with status 200, or an exception to raise.
+
+    """
+
+    def __init__(self, monkeypatch):
+        self.monkeypatch = monkeypatch
+        self.urls = []
+        self.kwargs = []
+        self.responses = []
+
+    def serve(self, respond, module=throttle):
+        """Replace module.request, default throttle.request."""
+
+        def fake_request(method, url, **kwargs):
+            self.urls.append(url)
+            self.kwargs.append(kwargs)
+            r = respond.pop(0) if isinstance(respond, list) else respond(url)
+            if isinstance(r, Exception):
+                raise r
+            if not isinstance(r, FakeResponse):
+                r = FakeResponse(r)
+            self.responses.append(r)
+            return r
+
+        self.monkeypatch.setattr(module, "request", fake_request)
+        return self
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Get a FakeApi, see FakeApi.serve."""
+    return FakeApi(monkeypatch)
@@ -0,0 +1,176 @@
+"""Tests for `aio` package."""
+
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+
+from publink import aio  # noqa: E402
+
+xdd_pages = {
+    "1": {"success": {"hits": 3, "next_page": "/api/snippets?page=2",
+                      "data": [{"_gddid": "a"}, {"_gddid": "b"}]}},
+    "2": {"success": {"hits": 3, "next_page": "", "data": [{"_gddid": "c"}]}},
+}
+
+event_page = {
+    "status": "ok",
+    "message": {
+        "total-results": 2,
+        "next-cursor": None,
+        "events": [
+            {"id": "1", "obj_id": "https://doi.org/10.5066/F7GB2257",
+             "subj_id": "https://doi.org/10.1007/s10040-016-1406-y",
+             "relation_type_id": "references", "source_id": "crossref",
+             "license": "https://creativecommons.org/publicdomain/zero/1.0/"},
+            {"id": "2", "obj_id": "https://doi.org/10.5066/f7wh2n65",
+             "subj_id": "https://www.usgs.gov/news",
+             "relation_type_id": "discusses"},
+        ],
+    },
+}
+
+
+async def serve(test):
+    """Run test coroutine against a local xDD and eventdata server."""
+    async def snippets(request):
+        return web.json_response(xdd_pages[request.query.get("page", "1")])
+
+    async def events(request):
+        return web.json_response(event_page)
+
+    app = web.Application()
+    app.router.add_get("/api/snippets", snippets)
+    app.router.add_get("/v1/events", events)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        await test(f"http://127.0.0.1:{port}")
+    finally:
+        await runner.cleanup()
+
+
+def run(coro):
+    """Run coroutine in a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_async_search_xdd():
+    """Ensure pages of all urls are collected."""
+    async def test(base):
+        s = aio.AsyncSearchXdd("10.5066")
+        s.search_urls = [f"{base}/api/snippets?page=1"]
+        xdd_pages["1"]["success"]["next_page"] = f"{base}/api/snippets?page=2"
+        await s.get_data(semaphore=asyncio.Semaphore(2))
+        assert s.response_status == "success"
+        assert [i["_gddid"] for i in s.response_data] == ["a", "b", "c"]
+        assert s.response_hits == 3
+
+    run(serve(test))
+
+
+def test_async_search_eventdata():
+    """Ensure projected events are returned."""
+    async def test(base):
+        s = aio.AsyncSearchEventdata("10.5066", "doi_prefix", projected=True)
+        s.base_url = f"{base}/v1/events?"
+        s.build_query_url()
+        await s.get_data()
+        assert s.response_status == "success"
+        assert [i["id"] for i in s.response_data] == ["1"]
+        assert "license" not in s.response_data[0]
+
+    run(serve(test))
+
+
+class FakeSession:
+    """Session answering HEAD requests of doi.org from a dict."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.urls = []
+
+    def head(self, url, allow_redirects=True):
+        self.urls.append(url)
+        session = self
+
+        class Response:
+            status = session.statuses[url.split("doi.org/")[1]]
+
+            async def __aenter__(self):
+                if isinstance(self.status, Exception):
+                    raise self.status
+                return self
+
+            async def __aexit__(self, *exc):
+                pass
+
+        return Response()
+
+
+class FakeIndex:
+    """DOI index holding a fixed set of DOIs."""
+
+    def __init__(self, dois):
+        self.dois = set(dois)
+
+    def __contains__(self, doi):
+        return doi in self.dois
+
+
+def test_resolve_doi():
+    """Ensure only redirected DOIs resolve."""
+    session = FakeSession({"10.5066/F79021VS": 302, "10.5066/BAD": 404})
+    assert run(aio.resolve_doi("10.5066/F79021VS", session))
+    assert not run(aio.resolve_doi("10.5066/BAD", session))
+    assert session.urls[0] == "https://doi.org/10.5066/F79021VS"
+
+
+def test_validate_dois():
+    """Ensure DOIs are split by resolution and indexed DOIs are not requested."""
+    session = FakeSession({"10.5066/F79021VS": 302, "10.5066/BAD": 404})
+
+    async def test():
+        return await aio.validate_dois(
+            ["10.5066/F79021VS", "10.5066/BAD", "10.5066/BAD", "10.5066/KNOWN"],
+            session,
+            limit=asyncio.Semaphore(1),
+            doi_index=FakeIndex(["10.5066/KNOWN"]),
+            return_timed_out=True,
+        )
+
+    resolving, non_resolving, timed_out = run(test())
+    assert sorted(resolving) == ["10.5066/F79021VS", "10.5066/KNOWN"]
+    assert non_resolving == ["10.5066/BAD"]
+    assert timed_out == []
+    assert len(session.urls) == 2
+
+
+def test_validate_dois_request_errors():
+    """Ensure a failed request does not lose results of the batch."""
+    session = FakeSession({
+        "10.5066/F79021VS": 302,
+        "10.5066/SLOW": asyncio.TimeoutError(),
+        "10.5066/DOWN": aiohttp.ClientConnectionError(),
+    })
+
+    async def test():
+        return await aio.validate_dois(
+            ["10.5066/F79021VS", "10.5066/SLOW", "10.5066/DOWN"],
+            session,
+            return_timed_out=True,
+        )
+
+    resolving, non_resolving, timed_out = run(test())
+    assert resolving == ["10.5066/F79021VS"]
+    assert non_resolving == ["10.5066/DOWN"]
+    assert timed_out == ["10.5066/SLOW"]
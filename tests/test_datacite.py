@@ -0,0 +1,81 @@
+"""Tests for `datacite` package."""
+
+import json
+
+from publink import datacite
+
+snapshot_records = [
+    {"id": "10.5066/f7k935kt",
+     "attributes": {
+         "doi": "10.5066/f7k935kt",
+         "relatedIdentifiers": [
+             {"relationType": "IsCitedBy", "relatedIdentifier": "10.1002/esp.4023",
+              "relatedIdentifierType": "DOI"},
+             {"relationType": "IsCitedBy", "relatedIdentifier": "10.3133/ofr20161132",
+              "relatedIdentifierType": "DOI"},
+             {"relationType": "IsNewVersionOf", "relatedIdentifier": "10.5066/f7aaaaaa",
+              "relatedIdentifierType": "DOI"},
+         ]}},
+    {"id": "10.5066/p9lyufrh",
+     "attributes": {"doi": "10.5066/p9lyufrh", "relatedIdentifiers": []}},
+]
+
+related_identifiers = [
+    {"doi": "10.5066/F7K935KT",
+     "identifier": "https://doi.org/10.5066/F7K935KT",
+     "related-identifiers": [
+         {"relation-type-id": "IsCitedBy",
+          "related-identifier": "https://doi.org/10.1002/ESP.4023"},
+         {"relation-type-id": "IsCitedBy",
+          "related-identifier": "https://doi.org/10.1002/WAT2.1164"},
+     ]},
+]
+
+
+def test_load_snapshot(tmp_path):
+    """Ensure JSON, JSON lines and API page exports are indexed alike."""
+    paths = [tmp_path / "a.json", tmp_path / "b.jsonl", tmp_path / "c.json"]
+    paths[0].write_text(json.dumps(snapshot_records, indent=2))
+    paths[1].write_text("\n".join(json.dumps(i) for i in snapshot_records))
+    paths[2].write_text(json.dumps({"data": snapshot_records}, indent=2))
+    for path in paths:
+        index = datacite.load_snapshot(str(path))
+        assert index == {
+            "10.5066/F7K935KT": {("IsCitedBy", "10.1002/ESP.4023"),
+                                 ("IsCitedBy", "10.3133/OFR20161132")},
+            "10.5066/P9LYUFRH": set(),
+        }
+
+
+def test_diff_related_identifiers(tmp_path):
+    """Ensure only changed relations are returned."""
+    path = tmp_path / "a.jsonl"
+    path.write_text("\n".join(json.dumps(i) for i in snapshot_records))
+    index = datacite.load_snapshot(str(path))
+    deltas = datacite.diff_related_identifiers(related_identifiers, index)
+    add = [{"relation-type-id": "IsCitedBy",
+            "related-identifier": "https://doi.org/10.1002/WAT2.1164"}]
+    assert deltas == [
+        {"doi": "10.5066/F7K935KT",
+         "identifier": "https://doi.org/10.5066/F7K935KT",
+         "add": add,
+         "remove": []}
+    ]
+    deltas = datacite.diff_related_identifiers(related_identifiers, index, full_sync=True)
+    assert deltas == [
+        {"doi": "10.5066/F7K935KT",
+         "identifier": "https://doi.org/10.5066/F7K935KT",
+         "add": add,
+         "remove": [{"relation-type-id": "IsCitedBy",
+                     "related-identifier": "https://doi.org/10.3133/OFR20161132"}]}
+    ]
+    deltas = datacite.diff_related_identifiers(
+        related_identifiers, index, full_sync=True, unchecked_dois=["10.3133/ofr20161132"]
+    )
+    assert deltas[0]["remove"] == []
+
+
+def test_delta_batches():
+    """Ensure deltas are split in batches."""
+    batches = list(datacite.delta_batches(list(range(5)), batch_size=2))
+    assert batches == [[0, 1], [2, 3], [4]]
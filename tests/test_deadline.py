@@ -0,0 +1,35 @@
+"""Tests for `deadline` package."""
+
+import pytest
+
+from publink import deadline
+
+
+def test_remaining_and_cap():
+    """Ensure timeouts are capped to the time remaining."""
+    d = deadline.Deadline(5)
+    assert 0 < d.remaining() <= 5
+    assert d.cap(120) <= 5
+    assert all(i <= 5 for i in d.cap((10, 120)))
+    assert deadline.Deadline().cap((10, 120)) == (10, 120)
+    assert not d.expired()
+
+
+def test_expired_and_cancelled():
+    """Ensure expired or cancelled deadlines raise DeadlineExceeded."""
+    with pytest.raises(deadline.DeadlineExceeded):
+        deadline.Deadline(0).check()
+    d = deadline.Deadline()
+    d.check()
+    d.cancel()
+    assert d.expired()
+    with pytest.raises(deadline.DeadlineExceeded):
+        d.check()
+
+
+def test_as_deadline():
+    """Ensure seconds are converted and deadlines are shared."""
+    d = deadline.Deadline(5)
+    assert deadline.as_deadline(d) is d
+    assert deadline.as_deadline(None) is None
+    assert deadline.as_deadline(5).seconds == 5
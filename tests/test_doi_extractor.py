@@ -0,0 +1,46 @@
+"""Tests for `doi_extractor` package."""
+
+from publink import doi_extractor
+from publink import xdd_search
+
+test_snippets = [
+    {"snippet": "data release. https://doi. org/10.5066/f7pg1pwz Lehtonen, J.",
+     "correct_doi": [("10.5066/F7PG1PWZ", "most certain")]},
+    {"snippet": " USGS ScienceBase https://doi.org/10.5066/ f7fx7aaa (Dibble, Sabo,",
+     "correct_doi": [("10.5066/F7FX7AAA", "most certain")]},
+    {"snippet": "from https://doi.org/10.50 66/f7fx7ddd.",
+     "correct_doi": [("10.5066/F7FX7DDD", "most certain")]},
+    {"snippet": "doi:10.5066/F7FX 7EEE and 10.5066/F7FX7EEEX",
+     "correct_doi": [("10.5066/F7FX7EEE", "certain"),
+                     ("10.5066/F7FX7EEE", "less certain")]},
+    {"snippet": ". Retrieved from 10.5066, M. E., P. C.", "correct_doi": []},
+    {"snippet": "Open-File Report 2019-1040, https://doi.org/10.3133/ofr20191040. "
+                "data at 10.5066/P9LYUFRH",
+     "correct_doi": [("10.3133/OFR20191040", "most certain"),
+                     ("10.5066/P9LYUFRH", "most certain")]},
+    {"snippet": "Earth Surf. Process. (10.1002/esp.4023). data 10.5066/F7K935KT. Next",
+     "correct_doi": [("10.1002/ESP.4023", "most certain"),
+                     ("10.5066/F7K935KT", "most certain")]},
+    {"snippet": "see 10.1002/(SICI)1099-1085 and 10.1002/x_y-z/1.",
+     "correct_doi": [("10.1002/X_Y-Z/1", "most certain")]},
+]
+
+
+def test_extract():
+    """Ensure DOIs of all registered prefixes are extracted in one pass."""
+    t = doi_extractor.usgs_extractor().register("10.3133", min_length=3)
+    t.register("10.1002")
+    for test in test_snippets:
+        dois = [i[:2] for i in t.extract(test["snippet"].upper())]
+        assert dois == test["correct_doi"], test["snippet"]
+
+
+def test_get_doi_mentions():
+    """Ensure mentions include prefix and certainty."""
+    response_data = [{"_gddid": "1", "doi": "10.3133/ofr20191040",
+                      "highlight": ["data <em>10.5066/P9LYUFRH</em>. and 10.3133/sir2020"]}]
+    t = xdd_search.GetMentions(response_data)
+    t.get_doi_mentions(doi_extractor.usgs_extractor().register("10.3133"))
+    assert sorted((i["search_term"], i["prefix"]) for i in t.mentions) == [
+        ("10.3133/SIR2020", "10.3133"), ("10.5066/P9LYUFRH", "10.5066")
+    ]
@@ -0,0 +1,43 @@
+"""Tests for `doi_index` package."""
+
+from publink import doi_index
+from publink import publink
+
+
+def test_doi_index(tmp_path):
+    """Ensure DOIs are found regardless of formatting."""
+    doi_file = tmp_path / "dois.txt"
+    doi_file.write_text(
+        "10.5066/F79021VS\nhttps://doi.org/10.5066/p9lyufrh\n\n10.5066/F79021VS\n"
+        "10.1002/esp.4023\n"
+    )
+    index_path = str(tmp_path / "dois.idx")
+    assert doi_index.build_doi_index([str(doi_file)], index_path) == 3
+    t = doi_index.DoiIndex(index_path)
+    assert len(t) == 3
+    assert "10.5066/P9LYUFRH" in t
+    assert "10.1002/ESP.4023" in t
+    assert "10.5066/F79021V" not in t
+    assert "10.5066/F79021VSX" not in t
+    t.close()
+
+
+def test_validate_dois_index(tmp_path, monkeypatch):
+    """Ensure indexed DOIs skip doi.org requests."""
+    doi_file = tmp_path / "dois.txt"
+    doi_file.write_text("10.5066/F79021VS\n")
+    index_path = str(tmp_path / "dois.idx")
+    doi_index.build_doi_index([str(doi_file)], index_path)
+    resolved = []
+
+    def resolve_doi(doi, deadline=None):
+        resolved.append(doi)
+        return False
+
+    monkeypatch.setattr(publink, "resolve_doi", resolve_doi)
+    good, bad = publink.validate_dois(
+        ["10.5066/F79021VS", "baddoi"], doi_index.DoiIndex(index_path)
+    )
+    assert good == ["10.5066/F79021VS"]
+    assert bad == ["baddoi"]
+    assert resolved == ["baddoi"]
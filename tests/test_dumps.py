@@ -0,0 +1,59 @@
+"""Tests for `dumps` package."""
+
+import gzip
+import json
+
+import pytest
+
+from publink import dumps
+
+events = [
+    {"obj_id": "https://doi.org/10.5066/f7gb2257",
+     "subj_id": "https://doi.org/10.1007/s10040-016-1406-y",
+     "id": "6cbe2817-1e54-42dd-929e-8444ada767bc",
+     "source_id": "crossref",
+     "terms": "https://doi.org/10.13003/CED-terms-of-use",
+     "relation_type_id": "references"},
+    {"obj_id": "https://doi.org/10.5066/f7wh2n65",
+     "subj_id": "https://www.usgs.gov/news/stitching-together",
+     "id": "696b6c1f-7dfe-4b5d-be4b-dfc8d123cb47",
+     "source_id": "newsfeed",
+     "relation_type_id": "discusses"},
+    {"obj_id": "https://doi.org/10.1234/other",
+     "subj_id": "https://doi.org/10.1007/s10040-016-1406-y",
+     "id": "ae3bc458-e865-49a3-90ae-bae76a8b500b",
+     "source_id": "crossref",
+     "relation_type_id": "references"},
+]
+
+
+@pytest.fixture
+def dump_files(tmp_path):
+    """Write events to a gzipped JSONL file and a JSON document."""
+    jsonl = str(tmp_path / "events-1.jsonl.gz")
+    with gzip.open(jsonl, "wt", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+    doc = str(tmp_path / "events-2.json")
+    with open(doc, "w", encoding="utf-8") as f:
+        json.dump({"status": "ok", "message": {"events": events}}, f)
+    return [jsonl, doc]
+
+
+def test_read_events(dump_files):
+    """Ensure events are filtered and projected during the scan."""
+    event_filter = dumps.EventFilter(prefixes=["10.5066"])
+    for path in dump_files:
+        found = list(dumps.read_events(path, event_filter))
+        assert [i["id"] for i in found] == ["6cbe2817-1e54-42dd-929e-8444ada767bc"]
+        assert "terms" not in found[0]
+    event_filter = dumps.EventFilter(relation_type=None)
+    assert len(list(dumps.read_events(dump_files[0], event_filter))) == 3
+
+
+def test_ingest_related(dump_files):
+    """Ensure files are scanned in parallel and fed to GetRelated."""
+    mention = dumps.ingest_related(dump_files, dois=["10.5066/F7GB2257"], processes=2)
+    assert [i["search_term"] for i in mention.related_dois] == ["10.5066/f7gb2257"] * 2
+    events = list(dumps.ingest(dump_files, processes=1))
+    assert len(events) == 4
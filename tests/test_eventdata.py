@@ -1,6 +1,8 @@
 """Tests for `xdd_search` package."""
 
+from publink import deadline
 from publink import eventdata
+from tests.conftest import FakeResponse
 import validators
 
 s = eventdata.SearchEventdata("10.5066/F7PG1PWZ", search_type="doi")
@@ -62,3 +64,125 @@ def test_get_related_dois():
     ]
     related = t.related_dois.sort()
     assert related == expected.sort()
+
+
+def test_build_query_url_relation_type():
+    """Ensure relation-type filter is added to query url."""
+    t = eventdata.SearchEventdata(
+        "10.5066", search_type="doi_prefix", relation_type="references"
+    )
+    t.build_query_url()
+    assert validators.url(t.search_url)
+    assert t.search_url.endswith("&relation-type=references")
+
+
+def test_estimate_cost():
+    """Ensure cheapest strategy is chosen from probe counts."""
+    dois = [f"10.5066/P9AAA{i:03d}" for i in range(3000)]
+    t = eventdata.BatchSearchEventdata(dois, max_workers=10)
+    t.prefix_hits = {"10.5066": 25000}
+    t.sample_hits = {dois[0]: 1, dois[1]: 0}
+    t.estimate_cost()
+    assert t.cost["prefix"]["requests"] == 3
+    assert t.cost["fanout"]["requests"] == 3001
+    assert t.strategy == "prefix"
+
+    t = eventdata.BatchSearchEventdata(dois[:5], max_workers=10)
+    t.prefix_hits = {"10.5066": 250000}
+    t.sample_hits = {dois[0]: 1}
+    t.estimate_cost()
+    assert t.strategy == "fanout"
+
+
+def test_filter_events():
+    """Ensure prefix crawl events are filtered to DOI list."""
+    events = eventdata.filter_events(response_data, {"10.5066/F7GB2257"})
+    assert [i["id"] for i in events] == ["6cbe2817-1e54-42dd-929e-8444ada767bc"]
+
+
+def test_sharded_search(monkeypatch):
+    """Ensure dense windows are subdivided and events deduplicated."""
+    daily = {"2020-01-01": 30, "2020-01-02": 0, "2020-01-03": 5, "2020-01-04": 40}
+
+    def get_total_results(self):
+        _, start, end = self.date_window
+        return sum(v for k, v in daily.items() if start <= k <= end)
+
+    def get_data(self):
+        _, start, end = self.date_window
+        self.response_data = [{"id": start}, {"id": "shared"}]
+        self.response_status = "success"
+
+    monkeypatch.setattr(eventdata.SearchEventdata, "get_total_results", get_total_results)
+    monkeypatch.setattr(eventdata.SearchEventdata, "get_data", get_data)
+    t = eventdata.ShardedSearchEventdata(
+        "10.5066", start_date="2020-01-01", end_date="2020-01-04",
+        max_shard_hits=35, max_workers=2,
+    )
+    t.get_data()
+    assert [(i["from"], i["until"], i["hits"]) for i in t.shards] == [
+        ("2020-01-01", "2020-01-02", 30),
+        ("2020-01-03", "2020-01-03", 5),
+        ("2020-01-04", "2020-01-04", 40),
+    ]
+    assert "from-occurred-date=2020-01-03" in t.searches[1].search_url
+    assert sorted(i["id"] for i in t.response_data) == [
+        "2020-01-01", "2020-01-03", "2020-01-04", "shared"
+    ]
+    assert t.response_status == "success"
+
+
+def test_query_timeout_keeps_partial_results(fake_api):
+    """Ensure a deadline stops paging and keeps pages already fetched."""
+    fake_api.serve([
+        {
+            "status": "ok",
+            "message": {
+                "total-results": 3,
+                "events": response_data[:1],
+                "next-cursor": "abc",
+            },
+        },
+        deadline.DeadlineExceeded("Deadline of 1 seconds exceeded."),
+    ])
+    t = eventdata.SearchEventdata("10.5066/F7PG1PWZ", search_type="doi")
+    t.set_deadline(1)
+    t.build_query_url()
+    t.get_data()
+    assert all(i["deadline"] is t.deadline for i in fake_api.kwargs)
+    assert t.response_status == "timeout"
+    assert "partial" in t.response_message
+    assert len(t.response_data) == 1
+
+
+def test_limit_stops_paging(fake_api):
+    """Ensure paging stops once enough references are found."""
+    requested = fake_api.serve(
+        lambda url: {
+            "status": "ok",
+            "message": {
+                "total-results": 30,
+                "events": response_data,
+                "next-cursor": "abc",
+            },
+        }
+    ).urls
+    t = eventdata.SearchEventdata("10.5066/F7PG1PWZ", search_type="doi")
+    t.build_query_url()
+    t.get_data(limit=2)
+    assert len(requested) == 2
+    assert len(t.response_data) == 6
+
+    t.get_data(hits_only=True)
+    assert "rows=1&" in requested[-1]
+    assert t.response_hits == 30
+
+
+def test_failed_streamed_page_is_closed(fake_api):
+    """Ensure streamed responses are closed when the request failed."""
+    fake_api.serve(lambda url: FakeResponse(status_code=503))
+    t = eventdata.SearchEventdata("10.5066", search_type="doi_prefix", projected=True)
+    t.build_query_url()
+    t.get_data()
+    assert t.response_status == "error"
+    assert [i.closed for i in fake_api.responses] == [True]
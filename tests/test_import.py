@@ -0,0 +1,51 @@
+"""Tests for import time of `publink` package."""
+
+import json
+import statistics
+import subprocess
+import sys
+
+# Startup budget in seconds for importing publink entry points, generous
+# compared to under 10 ms measured so slow machines do not flake
+IMPORT_BUDGET = 0.25
+
+# Runs per entry point, the median is compared to the budget
+IMPORT_RUNS = 5
+
+# Dependencies loaded on first use only
+LAZY_MODULES = ["requests", "bs4", "concurrent.futures", "sqlite3", "aiohttp"]
+
+ENTRY_POINTS = ["publink", "publink.publink", "publink.eventdata",
+                "publink.xdd_search", "publink.formatting"]
+
+
+def import_report(module):
+    """Import module in a fresh interpreter and report time and modules."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'elapsed': elapsed, 'modules': list(sys.modules)}))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_import_budget():
+    """Ensure the median import time of entry points is within budget."""
+    for module in ENTRY_POINTS:
+        elapsed = [import_report(module)["elapsed"] for _ in range(IMPORT_RUNS)]
+        assert statistics.median(elapsed) < IMPORT_BUDGET, module
+
+
+def test_lazy_imports():
+    """Ensure entry points import without heavy dependencies."""
+    for module in ENTRY_POINTS:
+        modules = import_report(module)["modules"]
+        assert [i for i in LAZY_MODULES if i in modules] == [], module
@@ -0,0 +1,80 @@
+"""Tests for `jsonstream` package."""
+
+import json
+
+import pytest
+
+from publink import jsonstream
+
+page = {
+    "status": "ok",
+    "message-type": "event-list",
+    "message": {
+        "next-cursor": "abc",
+        "events": [
+            {"id": "1", "obj_id": "https://doi.org/10.5066/F7GB2257",
+             "subj_id": "https://doi.org/10.1007/s10040-016-1406-y",
+             "relation_type_id": "references", "source_id": "crossref",
+             "license": "https://creativecommons.org/publicdomain/zero/1.0/"},
+            {"id": "2", "obj_id": "https://doi.org/10.5066/f7wh2n65",
+             "subj_id": "https://www.usgs.gov/news/café",
+             "relation_type_id": "discusses"},
+        ],
+        "total-results": 2,
+    },
+}
+
+
+def chunked(txt, size):
+    """Split encoded text into fixed size byte chunks."""
+    data = txt.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_streaming_array_decoder():
+    """Ensure items are projected and filtered across chunk boundaries."""
+    txt = json.dumps(page, ensure_ascii=False)
+    for size in [1, 7, 64, len(txt)]:
+        decoder = jsonstream.StreamingArrayDecoder(
+            chunked(txt, size),
+            "events",
+            fields=["id", "relation_type_id"],
+            predicate=lambda x: x["relation_type_id"] == "references",
+        )
+        items = list(decoder)
+        assert items == [{"id": "1", "relation_type_id": "references"}]
+        assert decoder.items_seen == 2
+        assert decoder.metadata["message"]["total-results"] == 2
+        assert decoder.metadata["message"]["next-cursor"] == "abc"
+        assert decoder.metadata["message"]["events"] == []
+
+
+def test_streaming_array_decoder_no_array():
+    """Ensure documents without the array are returned as metadata."""
+    decoder = jsonstream.StreamingArrayDecoder(
+        ['{"status": "failed", ', '"message": "bad"}'], "events"
+    )
+    assert list(decoder) == []
+    assert decoder.metadata == {"status": "failed", "message": "bad"}
+
+
+def test_streaming_array_decoder_feed():
+    """Ensure pushed chunks decode like iterated chunks."""
+    decoder = jsonstream.StreamingArrayDecoder([], "events", fields=["id"])
+    items = []
+    for chunk in chunked(json.dumps(page), 5):
+        items.extend(decoder.feed(chunk))
+    decoder.close()
+    assert items == [{"id": "1"}, {"id": "2"}]
+    assert decoder.metadata["status"] == "ok"
+
+    decoder = jsonstream.StreamingArrayDecoder([], "events")
+    decoder.feed('{"events": [{"id": "1"}, {"id"')
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+def test_project():
+    """Ensure only requested keys are kept."""
+    assert jsonstream.project({"a": 1, "b": 2}, ["a", "c"]) == {"a": 1}
+    assert jsonstream.project({"a": 1}) == {"a": 1}
@@ -0,0 +1,85 @@
+"""Tests for `mention_store` package."""
+
+from publink import eventdata
+from publink import mention_store
+from publink import xdd_search
+
+xdd_response = [
+    {'_gddid': '585b4a6ccf58f1a722da91ea',
+     'doi': '10.1002/esp.4023',
+     'title': 'Geomorphic monitoring',
+     'coverDate': '2017 01',
+     'highlight': [
+         'Greene S. 2015. USGS Dam Removal Science Database. DOI:10.5066/F7K935KT. Brandt SA.',
+         'Science Database. DOI:10.5066/F7K935KT. Brandt SA. 2000. Classification of geomorphological'
+     ]},
+]
+
+events = [
+    {"obj_id": "https://doi.org/10.5066/f7k935kt",
+     "subj_id": "https://doi.org/10.1002/esp.4023",
+     "id": "6cbe2817-1e54-42dd-929e-8444ada767bc",
+     "source_id": "crossref",
+     "relation_type_id": "references"},
+    {"obj_id": "https://doi.org/10.5066/F7K935KT",
+     "subj_id": "https://doi.org/10.1007/s10040-016-1406-y",
+     "id": "ae3bc458-e865-49a3-90ae-bae76a8b500b",
+     "source_id": "crossref",
+     "relation_type_id": "references"},
+]
+
+
+def test_upserts_are_idempotent():
+    """Ensure repeated harvests do not duplicate mentions or relations."""
+    t = mention_store.MentionStore()
+    m = xdd_search.GetMentions(xdd_response, ["10.5066/F7K935KT"])
+    m.get_exact_mention(is_doi=True)
+    r = eventdata.GetRelated(events)
+    r.get_related_dois()
+    for harvest_date in ["2020-07-31", "2020-08-01"]:
+        assert m.save(t, harvest_date) == 2
+        assert r.save(t, harvest_date) == 2
+    assert t.conn.execute("SELECT count(*) FROM mentions").fetchone()[0] == 1
+    assert t.conn.execute("SELECT count(*) FROM relations").fetchone()[0] == 2
+
+
+def test_queries():
+    """Ensure citing publications are merged across sources."""
+    t = mention_store.MentionStore()
+    m = xdd_search.GetMentions(xdd_response, ["10.5066/F7K935KT"])
+    m.get_exact_mention(is_doi=True)
+    m.save(t, "2020-07-31")
+    r = eventdata.GetRelated(events)
+    r.get_related_dois()
+    r.save(t, "2020-08-01")
+
+    citing = t.citing("https://doi.org/10.5066/f7k935kt")
+    assert [i["pub_doi"] for i in citing] == [
+        "10.1002/ESP.4023", "10.1007/S10040-016-1406-Y"
+    ]
+    assert citing[0]["sources"] == ["eventdata", "xdd"]
+    assert citing[0]["xdd_ids"] == ["585b4a6ccf58f1a722da91ea"]
+    assert t.cited_by("10.1002/esp.4023") == ["10.5066/F7K935KT"]
+    assert t.citation_counts() == {"10.5066/F7K935KT": 2}
+    assert t.citation_counts(since="2020-08-01") == {"10.5066/F7K935KT": 2}
+    assert t.citation_counts(since="2020-09-01") == {}
+
+
+def test_upserts_keep_first_harvest_and_metadata():
+    """Ensure re-harvests keep first harvest date and stored titles."""
+    t = mention_store.MentionStore()
+    m = xdd_search.GetMentions(xdd_response, ["10.5066/F7K935KT"])
+    m.get_exact_mention(is_doi=True)
+    m.save(t, "2020-07-31")
+    # Sparse mention, e.g. from GetMentions.get_usgs_doi_mentions
+    sparse = [{"xdd_id": "585b4a6ccf58f1a722da91ea", "pub_doi": "10.1002/esp.4023",
+               "search_term": "10.5066/F7K935KT", "certainty": "most certain",
+               "highlight": "DOI:10.5066/F7K935KT"}]
+    t.upsert_mentions(sparse, "2020-09-01")
+    assert t.conn.execute(
+        "SELECT pub_title, pub_date, harvest_date FROM documents"
+    ).fetchone() == ("Geomorphic monitoring", "2017 01", "2020-07-31")
+    assert t.conn.execute(
+        "SELECT certainty, harvest_date FROM mentions"
+    ).fetchone() == ("most certain", "2020-07-31")
+    assert t.citation_counts(since="2020-08-01") == {}
@@ -0,0 +1,78 @@
+"""Tests for `monitor` package."""
+
+import pytest
+
+from publink import mention_store
+from publink import monitor
+from tests.conftest import FakeResponse
+
+NOW = 1600000000.0
+DAY = monitor.DAY
+
+
+def test_add_staggers_first_checks():
+    """Ensure first checks are spread across the initial interval."""
+    t = monitor.MonitorSchedule(":memory:", sources=("xdd",))
+    t.add([f"10.5066/DOI{i}" for i in range(100)], now=NOW)
+    t.add(["10.5066/DOI0"], now=NOW + 10 * DAY)
+    assert len(t.due("xdd", NOW + 7 * DAY)) == 100
+    assert 20 < len(t.due("xdd", NOW + 3.5 * DAY)) < 80
+
+
+def test_adaptive_intervals_and_budget():
+    """Ensure active DOIs are checked sooner and first within budget."""
+    t = monitor.MonitorSchedule(
+        ":memory:", sources=("eventdata",), daily_budget={"eventdata": 3}
+    )
+    t.add(["10.5066/ACTIVE", "10.5066/DORMANT"], now=NOW)
+    now = NOW + 7 * DAY
+    active = t.record("10.5066/ACTIVE", "eventdata", 4, now=now)
+    dormant = t.record("10.5066/DORMANT", "eventdata", 0, now=now)
+    assert active - now < 3.5 * 1.1 * DAY
+    assert dormant - now > 10.5 * 0.9 * DAY
+    assert t.remaining_budget("eventdata", now) == 1
+
+    later = now + 30 * DAY
+    assert t.due("eventdata", later) == ["10.5066/ACTIVE", "10.5066/DORMANT"]
+    assert t.due("eventdata", now) == []
+
+
+def test_run_once():
+    """Ensure due checks run within budget and failures are retried later."""
+    t = monitor.MonitorSchedule(
+        ":memory:", sources=("xdd",), daily_budget={"xdd": 6}
+    )
+    t.add(["10.5066/A", "10.5066/B", "10.5066/C"], now=NOW)
+    calls = []
+
+    def check(doi, source):
+        calls.append(doi)
+        if doi == "10.5066/B":
+            raise monitor.CheckError("status code 503", requests=2)
+        return 1, 3
+
+    now = NOW + 7 * DAY
+    assert t.run_once(check, now) == {"xdd": 2}
+    assert calls == ["10.5066/A", "10.5066/B", "10.5066/C"]
+    assert t.remaining_budget("xdd", now) == 0
+    assert t.run_once(check, now + 7200) == {"xdd": 0}
+    assert t.due("xdd", now + 7200, limit=10) == []
+    t.daily_budget = {}
+    assert t.due("xdd", now + 7200) == ["10.5066/B"]
+
+
+def test_make_check_counts_requests(fake_api):
+    """Ensure follow-up pages and failed searches count their requests."""
+
+    def respond(url):
+        if "FAIL" in url:
+            return FakeResponse(status_code=500)
+        next_page = "" if url.endswith("next") else "https://geodeepdive.org/api/next"
+        return {"success": {"hits": 1, "data": [], "next_page": next_page}}
+
+    fake_api.serve(respond)
+    check = monitor.make_check(mention_store.MentionStore())
+    assert check("10.5066/F7K935KT", "xdd") == (0, 2)
+    with pytest.raises(monitor.CheckError) as e:
+        check("10.5066/FAIL", "xdd")
+    assert e.value.requests == 1
@@ -0,0 +1,64 @@
+"""Tests for `planner` package."""
+
+import requests
+
+from publink import deadline
+from publink import planner
+
+
+def first_page(url):
+    """Respond with xDD or eventdata first pages."""
+    if "geodeepdive" in url:
+        hits = 25 if "P9LYUFRH" in url else 250
+        return {"success": {"hits": hits, "data": [{"_gddid": "a"}] * 25,
+                            "next_page": "" if hits == 25 else "next"}}
+    if "BADDOI" in url:
+        return {"status": "failed", "message": "bad"}
+    return {"status": "ok", "message": {
+        "total-results": 25000, "events": [{"id": "e" * 90}]}}
+
+
+def test_probe_and_select(fake_api):
+    """Ensure costs are extrapolated and cheapest terms fit the budget."""
+    fake_api.serve(first_page)
+    p = planner.SweepPlanner(seconds_per_event=0.001)
+    xdd = p.probe_xdd(["10.5066/F7K935KT", "10.5066/P9LYUFRH"],
+                      account_for_spaces=False)
+    assert [(i["documents"], i["requests"]) for i in xdd] == [(250, 10), (25, 1)]
+    events = p.probe_eventdata(["10.5066/F7GB2257", "10.5066/BADDOI"])
+    assert events[0]["requests"] == 3
+    assert events[0]["bytes"] == 25000 * 100
+    assert events[0]["seconds"] >= 25
+    assert events[1]["status"] == "error"
+
+    assert [i["search_term"] for i in p.ordered()] == [
+        "10.5066/P9LYUFRH", "10.5066/F7K935KT", "10.5066/F7GB2257", "10.5066/BADDOI"
+    ]
+    selected, deferred = p.select(max_requests=11)
+    assert [i["search_term"] for i in selected] == [
+        "10.5066/P9LYUFRH", "10.5066/F7K935KT"
+    ]
+    assert len(deferred) == 2
+    assert p.totals()["requests"] == 14
+    assert p.totals()["failed"] == 1
+
+
+def test_failed_probes(fake_api):
+    """Ensure unreachable or late probes fail their estimate only."""
+
+    def respond(url):
+        if "F7K935KT" in url:
+            return requests.exceptions.ConnectionError()
+        if "F7GB2257" in url:
+            return deadline.RequestTimeout(f"Request timed out: {url}")
+        return first_page(url)
+
+    fake_api.serve(respond)
+    p = planner.SweepPlanner(max_workers=2)
+    p.set_deadline(60)
+    xdd = p.probe_xdd(["10.5066/F7K935KT", "10.5066/P9LYUFRH"],
+                      account_for_spaces=False)
+    assert [i["status"] for i in xdd] == ["error", "success"]
+    events = p.probe_eventdata(["10.5066/F7GB2257"])
+    assert events[0]["status"] == "error"
+    assert all(i["deadline"] is p.deadline for i in fake_api.kwargs)
@@ -0,0 +1,144 @@
+"""Tests for `publink` package that do not need network access."""
+
+from publink import deadline
+from publink import publink
+from tests.conftest import FakeResponse
+
+test_mentions = [{'pub_doi': '10.3133/OFR20191040',
+                  'search_term': '10.5066/P9LYUFRH'},
+                 {'pub_doi': '10.3133/OFR20191040',
+                 'search_term': '10.5066/P9LYUFRH'},
+                 {'pub_doi': '10.3133/OFR20191040',
+                 'search_term': '10.5066/F7PG1PWZ'},
+                 {'search_term': '10.5066/F7PG1PWZ'}
+                 ]
+
+
+def test_validate_dois_timeout(fake_api):
+    """Ensure DOIs not checked before the deadline are reported apart."""
+    def respond(url):
+        if url.endswith("LATE"):
+            return deadline.DeadlineExceeded("Deadline of 1 seconds exceeded.")
+        return FakeResponse(status_code=302)
+
+    fake_api.serve(respond)
+    assert publink.resolve_doi("10.5066/LATE") is None
+    doi_list = ["10.5066/F79021VS", "10.5066/LATE"]
+    good_dois, bad_dois, timed_out_dois = publink.validate_dois(
+        doi_list, deadline=60, return_timed_out=True
+    )
+    assert good_dois == ["10.5066/F79021VS"]
+    assert bad_dois == []
+    assert timed_out_dois == ["10.5066/LATE"]
+    assert publink.validate_dois(doi_list, deadline=60) == (
+        ["10.5066/F79021VS"], []
+    )
+
+
+def test_search_xdd_hits_only(fake_api):
+    """Ensure hits only searches send one request per search term."""
+    fake_api.serve(
+        lambda url: {"success": {"hits": 3, "data": [], "next_page": "next"}}
+    )
+    search = publink.search_xdd("10.5066/P9LYUFRH,10.5066/F7K935KT", hits_only=True)
+    assert len(fake_api.urls) == 2
+    assert search.response_hits == 6
+    assert all("fields=" not in i for i in fake_api.urls)
+
+
+def test_search_xdd_limit(fake_api):
+    """Ensure limit confirms mentions with the default profile."""
+    data = [{"_gddid": "1", "highlight": ["data at 10.5066/P9LYUFRH"]}]
+    fake_api.serve(
+        lambda url: {"success": {"hits": 5, "data": data, "next_page": "next"}}
+    )
+    search = publink.search_xdd("10.5066/P9LYUFRH", limit=1)
+    assert search.confirmed == ["1"]
+    assert len(fake_api.urls) == 1
+    assert "fields=" not in fake_api.urls[0]
+
+
+def test_search_spill_dir(fake_api, tmp_path):
+    """Ensure search wrappers spill response data into spill_dir."""
+    data = [{"_gddid": str(i), "highlight": []} for i in range(3)]
+    fake_api.serve(
+        lambda url: {"success": {"hits": 3, "data": data, "next_page": ""}}
+    )
+    search = publink.search_xdd(
+        "10.5066/P9LYUFRH", account_for_spaces=False, max_records=1,
+        spill_dir=str(tmp_path)
+    )
+    assert len(search.response_data) == 3
+    assert search.response_data.path.startswith(str(tmp_path))
+
+    fake_api.serve(lambda url: {"status": "ok", "message": {
+        "total-results": 3, "events": data, "next-cursor": None}})
+    search = publink.search_eventdata(
+        "10.5066/P9LYUFRH", "doi", "", max_records=1, spill_dir=str(tmp_path)
+    )
+    assert len(search.response_data) == 3
+    assert search.response_data.path.startswith(str(tmp_path))
+
+
+def test_get_unique_pairs_out_of_core(tmp_path):
+    """Test unique pairs spilled to disk in runs of one pair."""
+    test_out = publink.get_unique_pairs(
+        test_mentions * 3, max_pairs=1, spill_dir=str(tmp_path)
+    )
+    assert next(test_out) == {'pub_doi': '10.3133/OFR20191040',
+                              'search_term': '10.5066/F7PG1PWZ'}
+    assert list(tmp_path.iterdir()) != []
+    assert list(test_out) == [{'pub_doi': '10.3133/OFR20191040',
+                               'search_term': '10.5066/P9LYUFRH'}]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_to_related_identifiers_out_of_core(monkeypatch, tmp_path):
+    """Test related identifiers of pairs streamed from disk."""
+    monkeypatch.setattr(publink, "resolve_doi", lambda doi, deadline=None: True)
+    in_memory = publink.to_related_identifiers(test_mentions * 3)
+    out_of_core = publink.to_related_identifiers(
+        test_mentions * 3, max_pairs=1, spill_dir=str(tmp_path)
+    )
+    assert sorted(out_of_core, key=lambda x: x['doi']) == sorted(
+        in_memory, key=lambda x: x['doi']
+    )
+    assert [i['related-identifiers'] for i in out_of_core] == [
+        [{'relation-type-id': 'IsCitedBy',
+          'related-identifier': 'https://doi.org/10.3133/OFR20191040'}]
+    ] * 2
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_merge_relations():
+    """Test merge of xDD and eventdata relations.
+
+    Pair is found by both sources with different DOI casing,
+    expect one relation with provenance from each source.
+
+    """
+    xdd = [{'xdd_id': '5d41e5e40b45c76cafa2778c',
+            'pub_doi': '10.3133/OFR20191040',
+            'search_term': '10.5066/P9LYUFRH',
+            'certainty': 'less certain'},
+           {'xdd_id': '5d41e5e40b45c76cafa2778c',
+            'pub_doi': '10.3133/OFR20191040',
+            'search_term': '10.5066/P9LYUFRH',
+            'certainty': 'most certain'},
+           {'xdd_id': '57d99165cf58f191c21a5829',
+            'pub_doi': '',
+            'search_term': '10.5066/P9LYUFRH'}]
+    events = [{'event_id': '6cbe2817-1e54-42dd-929e-8444ada767bc',
+               'pub_doi': '10.3133/ofr20191040',
+               'search_term': '10.5066/p9lyufrh',
+               'source': 'crossref'}]
+    merged = list(publink.merge_relations(iter(xdd), iter(events)))
+    assert merged == [{'pub_doi': '10.3133/OFR20191040',
+                       'search_term': '10.5066/P9LYUFRH',
+                       'xdd_ids': ['5d41e5e40b45c76cafa2778c'],
+                       'event_ids': ['6cbe2817-1e54-42dd-929e-8444ada767bc'],
+                       'sources': ['crossref', 'xdd'],
+                       'certainty': 'most certain'}]
+    assert publink.get_unique_pairs(merged) == [
+        {'pub_doi': '10.3133/OFR20191040', 'search_term': '10.5066/P9LYUFRH'}
+    ]
@@ -0,0 +1,25 @@
+"""Tests for `sharding` package."""
+
+from publink import sharding
+
+
+def test_split_window():
+    """Ensure windows split into disjoint halves."""
+    assert sharding.split_window("2020-01-01", "2020-01-04") == [
+        ("2020-01-01", "2020-01-02"), ("2020-01-03", "2020-01-04")
+    ]
+    assert sharding.split_window("2020-01-01", "2020-01-01") == []
+
+
+def test_plan_windows():
+    """Ensure dense windows are halved and empty windows dropped."""
+    daily = {"2020-01-01": 30, "2020-01-02": 0, "2020-01-03": 0, "2020-01-04": 40}
+
+    def count(window):
+        return sum(v for k, v in daily.items() if window[0] <= k <= window[1])
+
+    shards = sharding.plan_windows("2020-01-01", "2020-01-04", count, 35)
+    assert shards == [
+        {"from": "2020-01-01", "until": "2020-01-02", "hits": 30},
+        {"from": "2020-01-04", "until": "2020-01-04", "hits": 40},
+    ]
@@ -0,0 +1,85 @@
+"""Tests for `snippet_index` package."""
+
+from publink import snippet_index
+from publink import xdd_search
+
+response_data = [
+    {'_gddid': '585b4a6ccf58f1a722da91ea',
+     'doi': '10.1002/esp.4023',
+     'title': 'Geomorphic monitoring',
+     'highlight': [
+         'Greene S. 2015. USGS Dam Removal Science Database. DOI:10.5066/F7K935KT. Brandt SA.'
+     ]},
+    {'_gddid': '57d99165cf58f191c21a5829',
+     'highlight': [
+         'U.S. Geological Survey data release, http://doi.org/10.50 66/F7PG1PWZ. Berners-Lee,'
+     ]},
+    {'_gddid': '5c1c34751faed655488963fc',
+     'highlight': [
+         'THE PROTECTED AREAS DATABASE OF THE UNITED STATES (PAD-US) (USGS, 2013).'
+     ]},
+]
+
+
+def test_add_documents():
+    """Ensure documents are upserted and highlights merged."""
+    t = snippet_index.SnippetIndex()
+    t.add_documents(response_data, harvest_date="2020-07-31")
+    t.add_documents(
+        [{'_gddid': '5c1c34751faed655488963fc', 'highlight': ['PAD-US again']}],
+        harvest_date="2020-08-01",
+    )
+    assert len(t) == 3
+    assert t.last_harvest() == "2020-08-01"
+    refs = t.candidates(["pad-us again"])
+    assert [i['_gddid'] for i in refs] == ['5c1c34751faed655488963fc']
+    assert len(refs[0]['highlight']) == 2
+
+
+def test_search_exact_match():
+    """Ensure exact mentions are found in local index."""
+    t = snippet_index.SnippetIndex()
+    t.add_documents(response_data)
+    m = t.search(["10.5066/F7K935KT"], is_doi=True)
+    assert [i['pub_doi'] for i in m.mentions] == ['10.1002/ESP.4023']
+    m = t.search(["PAD-US"])
+    assert [i['xdd_id'] for i in m.mentions] == ['5c1c34751faed655488963fc']
+
+
+def test_search_usgs():
+    """Ensure split usgs dois are found in local index."""
+    t = snippet_index.SnippetIndex()
+    t.add_documents(response_data)
+    m = t.search(["10.5066", "10.50 66"], search_type="usgs")
+    assert sorted(i['search_term'] for i in m.mentions) == [
+        '10.5066/F7K935KT', '10.5066/F7PG1PWZ'
+    ]
+
+
+def test_update_from_max_acquired(monkeypatch):
+    """Ensure each term resumes from the newest date acquired for it."""
+    urls = []
+    pages = {"10.5066/F7K935KT": [dict(response_data[0],
+                                       acquired="2020-07-15T10:31:00"),
+                                  dict(response_data[1],
+                                       acquired="2020-06-01T08:00:00")],
+             "PAD-US": [response_data[2]]}
+
+    def get_data(self):
+        urls.extend(self.search_urls)
+        self.response_status = "success"
+        self.response_data = pages.get(self.search_terms[0], [])
+
+    monkeypatch.setattr(xdd_search.SearchXdd, "get_data", get_data)
+    t = snippet_index.SnippetIndex()
+    t.update("10.5066/F7K935KT,PAD-US")
+    assert all("min_acquired" not in i for i in urls)
+    assert t.max_acquired("10.5066/F7K935KT") == "2020-07-15"
+    assert t.max_acquired("PAD-US") is None
+    assert len(t) == 3
+
+    urls.clear()
+    t.update("10.5066/F7K935KT,PAD-US,10.5066/F7PG1PWZ")
+    assert urls[0].endswith("&min_acquired=2020-07-15")
+    assert "min_acquired" not in urls[1]
+    assert "min_acquired" not in urls[2]
@@ -0,0 +1,71 @@
+"""Tests for `spill` package."""
+
+import os
+
+from publink import spill
+from publink import xdd_search
+
+
+def test_spill_buffer():
+    """Ensure records spill to disk and iterate in order."""
+    t = spill.SpillBuffer(max_records=3)
+    t.extend([{"_gddid": str(i)} for i in range(10)])
+    assert len(t) == 10
+    assert t.spilled > 0
+    assert os.path.exists(t.path)
+    assert [i["_gddid"] for i in t] == [str(i) for i in range(10)]
+    # iterating twice reads segment again
+    assert len(list(t)) == 10
+    path = t.path
+    t.close()
+    assert not os.path.exists(path)
+    assert len(t) == 0
+
+
+def test_response_buffer():
+    """Ensure list is used without memory ceiling."""
+    assert spill.response_buffer() == []
+    assert isinstance(spill.response_buffer(5), spill.SpillBuffer)
+
+
+def test_get_mentions_spill_buffer():
+    """Ensure mentions are extracted from spilled response data."""
+    t = spill.SpillBuffer(max_records=1)
+    t.extend([
+        {"_gddid": "1", "highlight": ["doi:10.5066/F7K935KT."]},
+        {"_gddid": "2", "highlight": ["doi:10.5066/F7K935KT."]},
+    ])
+    m = xdd_search.GetMentions(t, ["10.5066/F7K935KT"])
+    m.get_exact_mention()
+    assert [i["xdd_id"] for i in m.mentions] == ["1", "2"]
+
+
+def test_external_unique(tmp_path):
+    """Ensure keys are deduplicated across sorted runs on disk."""
+    keys = [("b", "1"), ("a", "2"), ("b", "1"), ("c", "3"), ("a", "2"), ("a", "1")]
+    unique = spill.external_unique(keys, max_keys=2, directory=str(tmp_path))
+    assert next(unique) == ("a", "1")
+    assert len(list(tmp_path.iterdir())) == 3
+    assert list(unique) == [("a", "2"), ("b", "1"), ("c", "3")]
+    assert list(tmp_path.iterdir()) == []
+    assert list(spill.external_unique(keys)) == sorted(set(keys))
+
+
+def test_external_unique_max_files(tmp_path, monkeypatch):
+    """Ensure runs past max_files are merged in passes."""
+    opened = []
+    merge_runs = spill._merge_runs
+
+    def fake_merge_runs(paths):
+        opened.append(len(paths))
+        return merge_runs(paths)
+
+    monkeypatch.setattr(spill, "_merge_runs", fake_merge_runs)
+    keys = [(str(i % 7), str(i % 3)) for i in range(40)]
+    unique = spill.external_unique(
+        keys, max_keys=2, directory=str(tmp_path), max_files=3
+    )
+    assert list(unique) == sorted(set(keys))
+    assert max(opened) <= 3
+    assert len(opened) > 1
+    assert list(tmp_path.iterdir()) == []
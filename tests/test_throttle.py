@@ -0,0 +1,101 @@
+"""Tests for `throttle` package."""
+
+import pytest
+import requests
+
+from publink import deadline
+from publink import throttle
+from tests.conftest import FakeResponse
+
+
+def test_additive_increase():
+    """Ensure limit grows by about one per limit healthy responses."""
+    t = throttle.AdaptiveLimiter(initial_limit=2, max_limit=4)
+    for _ in range(2):
+        t.release(t.acquire(), 200, 0.1)
+    assert t.snapshot()["limit"] == 3
+    for _ in range(20):
+        t.release(t.acquire(), 200, 0.1)
+    assert t.snapshot()["limit"] == 4
+    assert [i["limit"] for i in t.history] == [3, 4]
+
+
+def test_multiplicative_decrease():
+    """Ensure throttling and slow responses halve the limit once per window."""
+    t = throttle.AdaptiveLimiter(initial_limit=8, max_limit=8)
+    t.release(t.acquire(), 200, 0.1)
+    tickets = [t.acquire() for _ in range(8)]
+    for ticket in tickets:
+        t.release(ticket, 429, 0.1)
+    assert t.snapshot()["limit"] == 4
+    t.release(t.acquire(), 200, 5.0)
+    assert t.snapshot()["limit"] == 2
+    assert t.history[-1]["reason"] == "slow"
+
+
+def test_request_retries(fake_api):
+    """Ensure throttled responses and connection errors are retried."""
+    responses = [requests.exceptions.ConnectionError(),
+                 FakeResponse(status_code=429, headers={"Retry-After": "0"}),
+                 FakeResponse()]
+    fake_api.serve(responses, module=requests)
+    r = throttle.request("get", "https://example.org/api", backoff=0)
+    assert r.status_code == 200
+    assert responses == []
+    assert [i.closed for i in fake_api.responses] == [True, False]
+    assert "example.org" in throttle.limiter_snapshots()
+
+
+def test_request_timeout(fake_api):
+    """Ensure timeouts are passed, retried and raised as RequestTimeout."""
+    fake_api.serve(lambda url: requests.exceptions.ReadTimeout(), module=requests)
+    with pytest.raises(deadline.RequestTimeout):
+        throttle.request("get", "https://example.org/api", retries=1, backoff=0)
+    assert [i["timeout"] for i in fake_api.kwargs] == [throttle.DEFAULT_TIMEOUT] * 2
+
+    with pytest.raises(deadline.DeadlineExceeded):
+        throttle.request(
+            "get", "https://example.org/api", deadline=deadline.Deadline(0)
+        )
+    assert len(fake_api.urls) == 2
+
+
+def test_request_frees_slot_on_any_error():
+    """Ensure invalid requests do not leak slots of the host limiter."""
+    for _ in range(40):
+        with pytest.raises(requests.exceptions.MissingSchema):
+            throttle.request("get", "nota-url", retries=0)
+    snapshot = throttle.get_limiter("").snapshot()
+    assert snapshot["in_flight"] == 0
+    assert snapshot["history"] == []
+
+
+def test_retry_after_is_capped(monkeypatch, fake_api):
+    """Ensure a long Retry-After does not stall requests without deadline."""
+    sleeps = []
+
+    def fake_sleep(seconds, deadline=None):
+        sleeps.append(seconds)
+
+    fake_api.serve(
+        [FakeResponse(status_code=503, headers={"Retry-After": "86400"}),
+         FakeResponse()],
+        module=requests,
+    )
+    monkeypatch.setattr(throttle, "_sleep", fake_sleep)
+    r = throttle.request("get", "https://example.org/api")
+    assert r.status_code == 200
+    assert sleeps == [throttle.MAX_RETRY_AFTER]
+
+
+def test_acquire_honors_deadline():
+    """Ensure waiting for a slot stops at the deadline or on cancel."""
+    t = throttle.AdaptiveLimiter(initial_limit=1, max_limit=1)
+    t.acquire()
+    with pytest.raises(deadline.DeadlineExceeded):
+        t.acquire(deadline.Deadline(0.05))
+    d = deadline.Deadline()
+    d.cancel()
+    with pytest.raises(deadline.DeadlineExceeded):
+        t.acquire(d)
+    assert t.snapshot()["in_flight"] == 1
@@ -0,0 +1,63 @@
+"""Tests for `title_match` package."""
+
+from publink import publink
+from publink import title_match
+
+titles = {
+    "10.5066/P955KPLE": "Protected Areas Database of the United States (PAD-US) 2.0",
+    "10.5066/F7K935KT": "USGS Dam Removal Science Database",
+    "10.5066/SHORT": "Soils",
+}
+
+response_data = [
+    {'_gddid': '5c1c34751faed655488963fc',
+     'doi': '10.1111/cobi.13289',
+     'highlight': [
+         'U.S. Geological Survey, 2018, protected areas data- base of the united '
+         'states (PAD-US): U.S. Geological Survey data release.',
+         'Unrelated highlight about the united states and dam removal.',
+     ]},
+]
+
+
+def test_index():
+    """Ensure short titles are skipped and only rare n-grams are indexed."""
+    t = title_match.TitleIndex(titles)
+    assert len(t) == 2
+    assert t.skipped == ["10.5066/SHORT"]
+    indexed = sum(len(i) for i in t.index.values())
+    assert indexed < sum(len(i) for i in t.grams.values())
+
+
+def test_match_variations():
+    """Ensure titles match despite casing, punctuation and truncation."""
+    t = title_match.TitleIndex(titles)
+    hl = response_data[0]["highlight"][0]
+    assert [i[0] for i in t.match(hl)] == ["10.5066/P955KPLE"]
+    assert t.match(hl)[0][1] >= 0.8
+    assert t.match(response_data[0]["highlight"][1]) == []
+    assert t.match("usgs dam-removal science\n data base, 2015") == [
+        ("10.5066/F7K935KT", 1.0)
+    ]
+
+
+def test_xdd_title_mentions():
+    """Ensure title mentions are emitted with scores."""
+    t = title_match.TitleIndex(titles)
+    m = publink.xdd_mentions(response_data, [], "title", title_index=t)
+    assert [(i["search_term"], i["pub_doi"]) for i in m.mentions] == [
+        ("10.5066/P955KPLE", "10.1111/COBI.13289")
+    ]
+    assert 0.8 <= m.mentions[0]["score"] < 1
+
+
+def test_xdd_title_mentions_strip_html():
+    """Ensure xDD hit markup does not break title n-grams."""
+    t = title_match.TitleIndex(titles)
+    hl = " ".join(f"<em>{i}</em>" for i in "USGS Dam Removal Science Database".split())
+    m = publink.xdd_mentions(
+        [{"_gddid": "1", "doi": "", "highlight": [hl]}], [], "title", title_index=t
+    )
+    assert [(i["search_term"], i["score"]) for i in m.mentions] == [
+        ("10.5066/F7K935KT", 1.0)
+    ]
@@ -0,0 +1,66 @@
+"""Tests for `validation` package."""
+
+import threading
+
+from publink import publink
+from publink import validation
+
+page = [
+    {'_gddid': '585b4a6ccf58f1a722da91ea',
+     'doi': '10.1002/esp.4023',
+     'highlight': [
+         'Greene S. 2015. USGS Dam Removal Science Database. DOI:10.5066/F7K935KT. Brandt SA.',
+         'Science Database. DOI:10.5066/F7K935KT. Brandt SA. 2000. Classification of geomorphological'
+     ]},
+]
+
+
+def test_validator_deduplicates(monkeypatch):
+    """Ensure each DOI is resolved once and results wait for checks."""
+    resolved = []
+    lock = threading.Lock()
+
+    def resolve_doi(doi, deadline=None):
+        with lock:
+            resolved.append(doi)
+        return doi != "10.5066/BADDOI"
+
+    monkeypatch.setattr(publink, "resolve_doi", resolve_doi)
+    with validation.PipelinedValidator(max_workers=2) as v:
+        v.submit_mentions([{"pub_doi": "10.1002/ESP.4023",
+                            "search_term": "10.5066/BADDOI"}] * 3)
+        v.submit("")
+        good, bad, timed_out = v.results(
+            ["10.1002/ESP.4023", "10.5066/BADDOI", ""], return_timed_out=True
+        )
+    assert good == ["10.1002/ESP.4023"]
+    assert bad == ["10.5066/BADDOI", ""]
+    assert timed_out == []
+    assert sorted(resolved) == ["10.1002/ESP.4023", "10.5066/BADDOI"]
+
+
+def test_xdd_related_identifiers(monkeypatch, fake_api):
+    """Ensure DOIs are submitted while pages are harvested."""
+    events = []
+
+    def respond(url):
+        events.append("page")
+        return {"success": {"hits": 1, "data": page, "next_page": ""}}
+
+    def resolve_doi(doi, deadline=None):
+        events.append(doi)
+        return True
+
+    fake_api.serve(respond)
+    monkeypatch.setattr(publink, "resolve_doi", resolve_doi)
+    search, mentions, related = validation.xdd_related_identifiers(
+        "10.5066/F7K935KT", max_workers=1
+    )
+    assert search.response_status == "success"
+    assert len(mentions) == 2
+    assert sorted(events[1:]) == ["10.1002/ESP.4023", "10.5066/F7K935KT"]
+    assert related[0]["doi"] == "10.5066/F7K935KT"
+    assert related[0]["related-identifiers"] == [
+        {"relation-type-id": "IsCitedBy",
+         "related-identifier": "https://doi.org/10.1002/ESP.4023"}
+    ]
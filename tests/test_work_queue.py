@@ -0,0 +1,79 @@
+"""Tests for `work_queue` package."""
+
+import pytest
+
+from publink import mention_store
+from publink import work_queue
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    """Path of a queue holding three eventdata tasks."""
+    path = str(tmp_path / "queue.db")
+    q = work_queue.WorkQueue(path)
+    work_queue.enqueue_eventdata(
+        q, ["10.5066/F7K935KT", "10.5066/F7GB2257"], mailto="test@usgs.gov",
+        windows=[("2020-01-01", "2020-06-30"), ("2020-07-01", "2020-12-31")],
+    )
+    q.close()
+    return path
+
+
+def test_enqueue_is_idempotent(queue_path):
+    """Ensure tasks already queued are not added again."""
+    q = work_queue.WorkQueue(queue_path)
+    added = work_queue.enqueue_eventdata(
+        q, ["10.5066/F7K935KT"], mailto="test@usgs.gov",
+        windows=[("2020-01-01", "2020-06-30")],
+    )
+    assert added == 0
+    assert q.counts() == {"pending": 4}
+
+
+def test_lease_expiry_and_retry(queue_path):
+    """Ensure expired leases are handed out again until max_attempts."""
+    q = work_queue.WorkQueue(queue_path, lease_seconds=-1, max_attempts=2)
+    task = q.lease("a")
+    assert task["payload"]["window"] == ["2020-01-01", "2020-06-30"]
+    again = q.lease("b")
+    assert again["id"] == task["id"]
+    assert again["attempts"] == 2
+    assert not q.complete(task["id"], "a")
+    assert q.lease("c")["id"] != task["id"]
+    assert q.counts()["failed"] == 1
+
+    q = work_queue.WorkQueue(queue_path, max_attempts=2)
+    task = q.lease("d")
+    assert q.fail(task["id"], "d", "RuntimeError: status code 500")
+    assert q.counts()["pending"] == 2
+
+
+def test_run_worker(queue_path, tmp_path):
+    """Ensure workers retry failed tasks and results merge idempotently."""
+    store_path = str(tmp_path / "store.db")
+    calls = []
+
+    def handler(task, store):
+        calls.append(task["key"])
+        if len(calls) == 1:
+            raise RuntimeError("status code 503")
+        doi = task["payload"]["search_term"]
+        store.upsert_relations([{"event_id": "e1", "pub_doi": "10.1002/esp.4023",
+                                 "search_term": doi, "source": "crossref"}])
+
+    stats = work_queue.run_worker(queue_path, store_path, "w1", handler=handler)
+    assert stats == {"done": 4, "failed": 1, "lost": 0}
+    assert len(calls) == 5
+    assert work_queue.WorkQueue(queue_path).counts() == {"done": 4}
+    counts = mention_store.MentionStore(store_path).citation_counts()
+    assert counts == {"10.5066/F7GB2257": 1, "10.5066/F7K935KT": 1}
+
+
+def test_run_worker_lost_lease(queue_path, tmp_path, monkeypatch):
+    """Ensure tasks whose lease was lost are not counted as done."""
+    monkeypatch.setattr(work_queue.WorkQueue, "complete", lambda *args: False)
+    stats = work_queue.run_worker(
+        queue_path, str(tmp_path / "store.db"), "w1", max_tasks=1,
+        handler=lambda task, store: None,
+    )
+    assert stats == {"done": 0, "failed": 0, "lost": 1}
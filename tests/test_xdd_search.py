@@ -1,6 +1,8 @@
 """Tests for `xdd_search` package."""
 
+from publink import deadline
 from publink import xdd_search
+from tests.conftest import FakeResponse
 import validators
 
 s = xdd_search.SearchXdd()
@@ -177,3 +179,156 @@ def test_get_pub_doi():
     """Verify DOI is extracted and doesn't fail if no DOI."""
     for ref in test_response['response_data']:
         assert xdd_search.get_pub_doi(ref) == ref['out_doi']
+
+
+def test_all_search_terms_multiple():
+    """Assert space iterations are created for every search term."""
+    t = xdd_search.SearchXdd("abc,de")
+    t.all_search_terms()
+    assert sorted(t.search_terms) == sorted(["abc", "de", "a bc", "ab c", "d e"])
+
+
+def test_anchor_search_terms():
+    """Assert each term is searched with a head and tail anchor."""
+    t = xdd_search.SearchXdd("10.5066/P9LYUFRH,10.5066/ABCDEFGHIJKL,PAD-US")
+    t.anchor_search_terms()
+    assert t.search_terms == [
+        "10.5066/P9LYUFRH", "10.5066/P9L", "YUFRH",
+        "10.5066/ABCDEFGHIJKL", "10.5066/ABCDEF", "GHIJKL",
+        "PAD-US", "P AD-US", "PA D-US", "PAD -US", "PAD- US", "PAD-U S",
+    ]
+    assert t.input_terms == ["10.5066/P9LYUFRH", "10.5066/ABCDEFGHIJKL", "PAD-US"]
+
+    t = xdd_search.SearchXdd("10.5066/AB12CD")
+    t.anchor_search_terms()
+    assert len(t.search_terms) == len("10.5066/AB12CD")
+
+
+def test_get_tolerant_mention():
+    """Verify split and hyphenated terms are matched."""
+    response_data = [
+        {'_gddid': '1', 'highlight': ['data release, doi:10.5066/P9LY UFRH. Smith']},
+        {'_gddid': '2', 'highlight': ['data release, doi:10.50-\n66/P9LYUFRH']},
+        {'_gddid': '3', 'highlight': ['data release, doi:10.5066/P9LYUFRX']},
+        {'_gddid': '4', 'highlight': ['doi:<em>10.5066/P9LY</em>UFRH']},
+    ]
+    t = xdd_search.GetMentions(response_data, ["10.5066/P9LYUFRH"])
+    t.get_tolerant_mention(is_doi=True)
+    assert [i['xdd_id'] for i in t.mentions] == ['1', '2', '4']
+    assert "<EM>" not in t.mentions[2]['highlight']
+    assert {i['search_term'] for i in t.mentions} == {'10.5066/P9LYUFRH'}
+
+
+def test_sharded_search_xdd(monkeypatch, tmp_path):
+    """Ensure high hit queries are split by date and merged by _gddid."""
+    yearly = {"2018": 90, "2019": 0, "2020": 80}
+
+    def probe_hits(self, url):
+        start = url.split("min_published=")[1][:4]
+        end = url.split("max_published=")[1][:4]
+        return sum(v for k, v in yearly.items() if start <= k <= end)
+
+    def get_data(self):
+        start = self.search_urls[0].split("min_published=")[1][:10]
+        self.response_data = [{"_gddid": start, "highlight": ["a"]},
+                              {"_gddid": "shared", "highlight": [start]}]
+        self.response_hits = 2
+        self.response_status = "success"
+
+    monkeypatch.setattr(xdd_search.SearchXdd, "probe_hits", probe_hits)
+    monkeypatch.setattr(xdd_search.SearchXdd, "get_data", get_data)
+    t = xdd_search.ShardedSearchXdd(
+        "10.5066", start_date="2018-01-01", end_date="2020-12-31", max_shard_hits=100
+    )
+    t.build_query_urls()
+    t.get_data()
+    assert [(i["from"], i["until"], i["hits"]) for i in t.shards] == [
+        ("2018-01-01", "2019-07-02", 90), ("2019-07-03", "2020-12-31", 80)
+    ]
+    assert t.response_hits == 4
+    assert t.response_documents == 3
+    shared = [i["highlight"] for i in t.response_data if i["_gddid"] == "shared"]
+    assert shared == [["2018-01-01"], ["2019-07-03"]]
+    assert t.response_status == "success"
+    assert all(i.response_data == [] for i in t.searches)
+
+    t = xdd_search.ShardedSearchXdd(
+        "10.5066", start_date="2018-01-01", end_date="2020-12-31",
+        max_shard_hits=100, max_records=1, spill_dir=str(tmp_path)
+    )
+    t.build_query_urls()
+    t.get_data()
+    assert t.response_data.spilled == 4
+    assert len(t.response_data) == 4
+
+
+def test_limit_stops_paging(fake_api):
+    """Ensure a confirmed mention stops paging and remaining variant queries."""
+    requested = fake_api.serve(
+        lambda url: {"success": {"hits": 2,
+                                 "data": test_response["response_data"][:1],
+                                 "next_page": "https://geodeepdive.org/api/next"}}
+    ).urls
+    t = xdd_search.SearchXdd("10.5066/F7K935KT")
+    t.all_search_terms()
+    t.build_query_urls()
+    t.get_data(limit=1)
+    assert len(requested) == 1
+    assert t.confirmed == ["585b4a6ccf58f1a722da91ea"]
+
+    requested.clear()
+    t = xdd_search.SearchXdd("10.5066/F7K935KT,10.5066/P9LYUFRH")
+    t.build_query_urls()
+    t.get_data(hits_only=True)
+    assert len(requested) == 2
+    assert t.response_hits == 4
+
+    t = xdd_search.SearchXdd("10.5066/P9LYUFRH")
+    assert not t.is_mention(test_response["response_data"][0])
+    assert t.is_mention({"highlight": ["doi:<em>10.5066/P9LY</em>UFRH"]})
+
+
+def test_query_params():
+    """Ensure profiles request only fields their extraction reads."""
+    assert xdd_search.query_params() == "full_results&clean&inclusive=True"
+    assert xdd_search.query_params("usgs") == xdd_search.query_params("dois")
+    assert "fields=_gddid,doi,highlight" in xdd_search.query_params("dois")
+    assert "title" in xdd_search.query_params("exact_match")
+    assert xdd_search.query_params("doi_pattern") == xdd_search.query_params(
+        "mentions"
+    )
+    params = xdd_search.query_params("hits", per_page=50)
+    assert params.endswith("&fields=_gddid,highlight&fragment_limit=1&per_page=50")
+    for mode, fields in xdd_search.EXTRACTION_FIELDS.items():
+        profile = xdd_search.PROFILES[xdd_search.EXTRACTION_PROFILES[mode]]
+        assert set(fields) <= set(profile["fields"].split(","))
+
+
+def test_measure_savings(fake_api):
+    """Ensure bytes received are counted and savings are extrapolated."""
+    fake_api.serve(lambda url: FakeResponse(
+        {"success": {"hits": 1, "data": [], "next_page": ""}},
+        content=b"x" * (400 if "fields=" in url else 1000),
+    ))
+    t = xdd_search.SearchXdd("10.5066/F7K935KT,10.5066/P9LYUFRH")
+    t.build_query_urls(params=xdd_search.query_params("dois"))
+    t.get_data()
+    assert t.response_bytes == 800
+    assert t.measure_savings() == 1200
+    assert t.bytes_saved == 1200
+
+
+def test_query_timeout_keeps_hits(fake_api):
+    """Ensure hits of pages fetched before a timeout are kept."""
+    fake_api.serve([
+        {"success": {"hits": 5,
+                     "data": test_response["response_data"][:1],
+                     "next_page": "https://geodeepdive.org/api/next"}},
+        deadline.DeadlineExceeded("Deadline of 1 seconds exceeded."),
+    ])
+    t = xdd_search.SearchXdd("10.5066/F7K935KT")
+    t.build_query_urls()
+    t.get_data()
+    assert t.response_status == "timeout"
+    assert t.response_hits == 5
+    assert len(t.response_data) == 1